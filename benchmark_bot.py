@@ -0,0 +1,1105 @@
+#!/usr/bin/env python3
+"""
+قياس أداء المكونات الحساسة للسرعة في البوت
+"""
+import logging
+import sys
+import os
+import asyncio
+import random
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# إضافة مجلد المشروع للمسار
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.signal_parser import SignalParser
+from src.signal_tracker import SignalBook
+from src.database import DatabaseManager
+from src.db_writers import SentMessageWriter, ActivityWriter
+from src.retention import RetentionManager
+from src.backtester import Backtester, CandleStore
+from src.backtest_runner import ParallelBacktestRunner
+from config.config import MAX_SIGNAL_LENGTH, SIGNAL_PARSE_TIMEOUT, DB_PRAGMAS
+from signal_samples import REAL_SIGNAL_SAMPLES
+
+# إعداد التسجيل
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# نماذج إشارات بالصيغ المستخدمة فعلياً
+SIGNAL_SAMPLES = [
+    """🎯 إشارة تداول - SPOT
+
+الزوج: BTC/USDT
+الاتجاه: BUY
+
+نقطة الدخول: 61,500 - 61,800
+وقف الخسارة: 60,900
+
+أهداف البيع:
+1️⃣ T1: 62,200
+2️⃣ T2: 63,000
+3️⃣ T3: 64,500
+
+الدعم: 61,200 - 60,900
+المقاومة: 63,000 - 64,500""",
+    """
+    🚀 إشارة جديدة
+
+    العملة: BTCUSDT
+    الاتجاه: شراء
+    سعر الدخول: 50000
+    الأهداف: 51000, 52000, 53000
+    وقف الخسارة: 49000
+    الرافعة: 10x
+    """,
+    """#ETH SHORT
+Entry: 3,450 - 3,480
+SL: 3,560
+TP1: 3,400
+T2: 3,300
+Support: 3,350
+Resistance: 3,500 - 3,560""",
+    """pair: sol/usdt
+direction: long
+entry price: 142.5
+stop loss: 138.2
+targets: 146, 150, 155""",
+]
+
+# مقاطع تُكرر لبناء مدخلات عدائية (كل منها يستهدف نمطاً قابلاً للتراجع)
+ADVERSARIAL_PIECES = {
+    "وقف متكرر": "وقف",
+    "stop ثم نقاط": "stop" + "." * 64,
+    "buy ثم مسافات": "buy" + " " * 64,
+    "أرقام وفواصل": "1,",
+    "أرقام وشرطات": "1 -",
+    "علامات أهداف": "T1:",
+    "وسوم": "#",
+    "أرقام طويلة": "9",
+    "سطور فارغة": "\n \n",
+}
+
+# مفردات الإشارات المستخدمة في توليد المدخلات العشوائية
+FUZZ_VOCABULARY = [
+    "buy ", "sell ", "شراء ", "بيع ", "وقف ", "stop ", "sl ", "الأهداف:", "targets:",
+    "نقطة الدخول:", "entry:", "T1:", "TP2 ", "1️⃣", "#BTC ", "ETH/USDT ", "الدعم:",
+    "مقاومة ", "1", "23", "4,500", "0.75", ",", ".", "-", " ", "\n", ":", "(", ")"
+]
+
+# رموز مجموعة الاختبار: (الرمز، السعر التقريبي، عدد المنازل العشرية)
+CORPUS_SYMBOLS = [
+    ("BTC", 61500, 0), ("ETH", 3450, 1), ("SOL", 142.5, 2), ("BNB", 580, 1),
+    ("XRP", 0.62, 4), ("DOGE", 0.155, 5), ("ADA", 0.45, 4), ("LINK", 14.2, 3),
+    ("AVAX", 31.5, 2), ("DOT", 7.1, 3), ("LTC", 84, 2), ("ATOM", 9.8, 3),
+]
+
+
+def _corpus_price(value: float, decimals: int, thousands: bool) -> str:
+    """تنسيق السعر كما يكتبه الناشرون (بفواصل الآلاف أحياناً)"""
+    return f"{value:,.{decimals}f}" if thousands else f"{value:.{decimals}f}"
+
+
+def _corpus_signal(rng: random.Random) -> dict:
+    """قيم إشارة عشوائية متسقة مع اتجاهها ونصوصها المنسقة"""
+    coin, base, decimals = rng.choice(CORPUS_SYMBOLS)
+    buy = rng.random() < 0.6
+    side = 1 if buy else -1
+    thousands = rng.random() < 0.5
+    price = base * rng.uniform(0.8, 1.2)
+    step = price * rng.uniform(0.005, 0.02)
+
+    def fmt(value):
+        return _corpus_price(value, decimals, thousands)
+
+    entry_low = fmt(price - step / 2)
+    entry_high = fmt(price + step / 2) if rng.random() < 0.6 else entry_low
+    stop = fmt(price - side * step * rng.uniform(2, 4))
+    targets = [fmt(price + side * step * (i + 1) * rng.uniform(1.5, 2.5)) for i in range(rng.randint(1, 5))]
+    targets = sorted(set(targets), key=lambda text: side * float(text.replace(",", "")))
+    support = fmt(price - step * 3)
+    resistance = fmt(price + step * 3)
+
+    def value(text):
+        return float(text.replace(",", ""))
+
+    return {
+        "coin": coin, "buy": buy,
+        "entry_low": entry_low, "entry_high": entry_high, "stop": stop, "targets": targets,
+        "support": support, "resistance": resistance,
+        "expected": {
+            "symbol": f"{coin}USDT",
+            "direction": "BUY" if buy else "SELL",
+            "entry_price_min": min(value(entry_low), value(entry_high)),
+            "entry_price_max": max(value(entry_low), value(entry_high)),
+            "stop_loss": value(stop),
+            "targets": sorted(value(target) for target in targets),
+        },
+    }
+
+
+def _entry_text(s: dict, separator: str = " - ") -> str:
+    return s["entry_low"] if s["entry_low"] == s["entry_high"] else f"{s['entry_low']}{separator}{s['entry_high']}"
+
+
+# قوالب الصيغ المنتشرة في قنوات الإشارات العربية والإنجليزية
+CORPUS_TEMPLATES = {
+    "قناة عربية بأرقام رمزية": lambda s, rng: (
+        f"🎯 إشارة تداول - SPOT\n\nالزوج: {s['coin']}/USDT\nالاتجاه: {'BUY' if s['buy'] else 'SELL'}\n\n"
+        f"نقطة الدخول: {_entry_text(s)}\nوقف الخسارة: {s['stop']}\n\n"
+        f"{'أهداف البيع' if s['buy'] else 'أهداف الشراء'}:\n"
+        + "\n".join(f"{i}\ufe0f\u20e3 T{i}: {t}" for i, t in enumerate(s["targets"], 1))
+        + f"\n\nالدعم: {s['support']}\nالمقاومة: {s['resistance']}"
+    ),
+    "عربية بقائمة أهداف في سطر": lambda s, rng: (
+        f"🚀 إشارة جديدة\n\nالعملة: {s['coin']}USDT\nالاتجاه: {'شراء' if s['buy'] else 'بيع'}\n"
+        f"سعر الدخول: {_entry_text(s)}\nالأهداف: {', '.join(s['targets'])}\n"
+        f"وقف الخسارة: {s['stop']}\nالرافعة: {rng.choice([5, 10, 20])}x"
+    ),
+    "عربية مختصرة بكلمة هدف": lambda s, rng: (
+        f"{'شراء' if s['buy'] else 'بيع'} {s['coin']}/USDT\nالدخول: {_entry_text(s)}\n"
+        + "\n".join(f"هدف {i}: {t}" for i, t in enumerate(s["targets"], 1))
+        + f"\nوقف: {s['stop']}"
+    ),
+    "عربية بوسم ومنطقة دخول": lambda s, rng: (
+        f"{'🟢' if s['buy'] else '🔴'} #{s['coin']} {'شراء' if s['buy'] else 'بيع'}\n"
+        f"منطقة الدخول: {_entry_text(s)}\nالأهداف:\n"
+        + "\n".join(f"{i}. {t}" for i, t in enumerate(s["targets"], 1))
+        + f"\nوقف الخسارة: {s['stop']}"
+    ),
+    "إنجليزية بوسم و TP": lambda s, rng: (
+        f"#{s['coin']} {'LONG' if s['buy'] else 'SHORT'}\nEntry: {_entry_text(s)}\nSL: {s['stop']}\n"
+        + "\n".join(f"TP{i}: {t}" for i, t in enumerate(s["targets"], 1))
+        + f"\nSupport: {s['support']}\nResistance: {s['resistance']}"
+    ),
+    "إنجليزية بعناوين صغيرة": lambda s, rng: (
+        f"pair: {s['coin'].lower()}/usdt\ndirection: {'long' if s['buy'] else 'short'}\n"
+        f"entry price: {_entry_text(s)}\nstop loss: {s['stop']}\ntargets: {', '.join(s['targets'])}"
+    ),
+    "إنجليزية بقائمة مرقمة": lambda s, rng: (
+        f"{s['coin']}/USDT {'BUY 📈' if s['buy'] else 'SELL 📉'}\n\nEntry zone: {_entry_text(s, '-')}\n\nTargets:\n"
+        + "\n".join(f"{i}) {t}" for i, t in enumerate(s["targets"], 1))
+        + f"\n\nStop: {s['stop']}"
+    ),
+    "إنجليزية في سطر واحد": lambda s, rng: (
+        f"#{s['coin']}USDT {'buy' if s['buy'] else 'sell'} entry {_entry_text(s)} "
+        f"sl {s['stop']} tp {' '.join(s['targets'])}"
+    ),
+    "إنجليزية بمسافات بادئة": lambda s, rng: (
+        f"    Symbol: {s['coin']}USDT\n    Direction: {'Long' if s['buy'] else 'Short'}\n"
+        f"    Entry: {_entry_text(s)}\n    Stop Loss: {s['stop']}\n    Take Profit: {', '.join(s['targets'])}\n"
+    ),
+    "مختلطة عربية وإنجليزية": lambda s, rng: (
+        f"إشارة {'LONG' if s['buy'] else 'SHORT'} على {s['coin']}/USDT\nنقطة الدخول: {_entry_text(s)}\n"
+        f"SL: {s['stop']}\nالأهداف: {' - '.join(s['targets'])}"
+    ),
+    "عربية بصيغة من إلى": lambda s, rng: (
+        f"#{s['coin']}/USDT\n{'شراء' if s['buy'] else 'بيع'} من {s['entry_low']} إلى {s['entry_high']}\n"
+        f"الأهداف: {' / '.join(s['targets'])}\nوقف الخسارة: {s['stop']}"
+    ),
+    "إنجليزية دون عنوان دخول": lambda s, rng: (
+        f"{s['coin']}USDT {'long' if s['buy'] else 'short'} {_entry_text(s)}\n"
+        f"targets {', '.join(s['targets'])}\nstop {s['stop']}"
+    ),
+}
+
+
+def build_signal_corpus(size: int = 480, seed: int = 11):
+    """مجموعة إشارات مولدة من القوالب مع الحقول المتوقعة لكل منها"""
+    rng = random.Random(seed)
+    names = list(CORPUS_TEMPLATES)
+    corpus = []
+    for number in range(size):
+        name = names[number % len(names)]
+        signal = _corpus_signal(rng)
+        corpus.append((name, CORPUS_TEMPLATES[name](signal, rng), signal["expected"]))
+    return corpus
+
+
+class RegexSignalParser(SignalParser):
+    """
+    المحلل القديم متعدد المرور
+    
+    يمسح النص بتعبير منفصل لكل حقل. لا يُستخدم في البوت، ويُحتفظ به هنا
+    فقط كمرجع لقياس الأداء والدقة مقارنة بالمحلل أحادي المرور.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        # أنماط التعبيرات النمطية لاستخراج البيانات
+        self.patterns = {
+            'symbol': [
+                r'(?:زوج|الزوج|pair):\s*([A-Z]{3,10}/?USDT?)',
+                r'([A-Z]{3,10}/?USDT?)',
+                r'#([A-Z]{3,10})',
+            ],
+            'direction': [
+                r'(?:اتجاه|direction):\s*(BUY|SELL|شراء|بيع|LONG|SHORT)',
+                r'(BUY|SELL|شراء|بيع|LONG|SHORT)',
+            ],
+            'entry_price': [
+                r'(?:نقطة الدخول|entry|دخول):\s*([\d,.\-\s]+)',
+                r'(?:entry price|دخول):\s*([\d,.\-\s]+)',
+                r'(?:buy|شراء).*?([\d,.\-\s]+)',
+            ],
+            'stop_loss': [
+                r'(?:وقف الخسارة|stop loss|sl):\s*([\d,.]+)',
+                r'(?:stop|وقف).*?([\d,.]+)',
+            ],
+            'targets': [
+                r'(?:أهداف|targets?|take profit|tp):\s*(.*?)(?:\n|$)',
+                r'(?:T\d+|هدف\s*\d*):\s*([\d,.]+)',
+                r'(\d+)\s*[️⃣]\s*T\d+:\s*([\d,.]+)',
+            ],
+            'support': [
+                r'(?:الدعم|support):\s*([\d,.\-\s]+)',
+                r'(?:دعم).*?([\d,.\-\s]+)',
+            ],
+            'resistance': [
+                r'(?:المقاومة|resistance):\s*([\d,.\-\s]+)',
+                r'(?:مقاومة).*?([\d,.\-\s]+)',
+            ]
+        }
+    
+    def _extract_fields(self, signal_text: str) -> Dict:
+        """استخراج الحقول بمسح منفصل لكل حقل"""
+        return {
+            'symbol': self._extract_symbol(signal_text),
+            'direction': self._extract_direction(signal_text),
+            'entry_prices': self._extract_entry_price(signal_text),
+            'stop_loss': self._extract_stop_loss(signal_text),
+            'targets': self._extract_targets(signal_text),
+            'support_levels': self._extract_support_levels(signal_text),
+            'resistance_levels': self._extract_resistance_levels(signal_text)
+        }
+    
+    def _extract_symbol(self, text: str) -> Optional[str]:
+        """استخراج رمز العملة"""
+        for pattern in self.patterns['symbol']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                symbol = match.group(1).upper().replace('/', '')
+                # تأكد من أن الرمز ينتهي بـ USDT
+                if not symbol.endswith('USDT'):
+                    symbol += 'USDT'
+                return symbol
+        return None
+    
+    def _extract_direction(self, text: str) -> Optional[str]:
+        """استخراج اتجاه التداول"""
+        for pattern in self.patterns['direction']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                direction = match.group(1).upper()
+                # توحيد الاتجاهات
+                if direction in ['BUY', 'شراء', 'LONG']:
+                    return 'BUY'
+                elif direction in ['SELL', 'بيع', 'SHORT']:
+                    return 'SELL'
+        return None
+    
+    def _extract_entry_price(self, text: str) -> List[float]:
+        """استخراج أسعار الدخول"""
+        prices = []
+        for pattern in self.patterns['entry_price']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                price_text = match.group(1)
+                # استخراج الأرقام من النص
+                numbers = re.findall(r'[\d,.]+', price_text)
+                for num in numbers:
+                    try:
+                        price = float(num.replace(',', ''))
+                        prices.append(price)
+                    except ValueError:
+                        continue
+                if prices:
+                    break
+        
+        return sorted(prices) if prices else []
+    
+    def _extract_stop_loss(self, text: str) -> Optional[float]:
+        """استخراج وقف الخسارة"""
+        for pattern in self.patterns['stop_loss']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                try:
+                    return float(match.group(1).replace(',', ''))
+                except ValueError:
+                    continue
+        return None
+    
+    def _extract_targets(self, text: str) -> List[float]:
+        """استخراج أهداف الربح"""
+        targets = []
+        
+        # البحث عن الأهداف بأنماط مختلفة
+        target_patterns = [
+            r'(\d+)[️⃣]\s*T\d+:\s*([\d,.]+)',  # 1️⃣ T1: 62,200
+            r'T(\d+):\s*([\d,.]+)',             # T1: 62,200
+            r'هدف\s*(\d+):\s*([\d,.]+)',        # هدف 1: 62,200
+            r'(\d+)\.\s*([\d,.]+)',             # 1. 62,200
+        ]
+        
+        for pattern in target_patterns:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            for match in matches:
+                try:
+                    target_num = int(match[0])
+                    target_price = float(match[1].replace(',', ''))
+                    targets.append(target_price)
+                except (ValueError, IndexError):
+                    continue
+        
+        # إزالة المكررات وترتيب
+        targets = sorted(list(set(targets)))
+        return targets[:5]  # أقصى 5 أهداف
+    
+    def _extract_support_levels(self, text: str) -> List[float]:
+        """استخراج مستويات الدعم"""
+        levels = []
+        for pattern in self.patterns['support']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                level_text = match.group(1)
+                numbers = re.findall(r'[\d,.]+', level_text)
+                for num in numbers:
+                    try:
+                        level = float(num.replace(',', ''))
+                        levels.append(level)
+                    except ValueError:
+                        continue
+        return sorted(list(set(levels)))
+    
+    def _extract_resistance_levels(self, text: str) -> List[float]:
+        """استخراج مستويات المقاومة"""
+        levels = []
+        for pattern in self.patterns['resistance']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                level_text = match.group(1)
+                numbers = re.findall(r'[\d,.]+', level_text)
+                for num in numbers:
+                    try:
+                        level = float(num.replace(',', ''))
+                        levels.append(level)
+                    except ValueError:
+                        continue
+        return sorted(list(set(levels)), reverse=True)
+
+
+class BotBenchmark:
+    """فئة قياس الأداء"""
+
+    def __init__(self, rounds: int = 500):
+        self.rounds = rounds
+        self.results = []
+
+    def run_all(self):
+        """تشغيل جميع القياسات"""
+        logger.info("⏱️ بدء قياس الأداء...")
+
+        benchmarks = [
+            ("محلل الإشارات", self.bench_signal_parser),
+            ("مدخلات عدائية للمحلل", self.bench_adversarial_signals),
+            ("دقة المحلل على مجموعة الإشارات", self.bench_parser_corpus),
+            ("تتبع الإشارات", self.bench_signal_tracking),
+            ("الاختبار الرجعي المتوازي", self.bench_parallel_backtest),
+            ("اتصالات قاعدة البيانات", self.bench_database_connections),
+            ("ملف أداء SQLite", self.bench_database_pragmas),
+            ("تسجيل الرسائل المرسلة", self.bench_sent_message_log),
+            ("التحقق من صلاحية المستخدم", self.bench_allowed_users),
+            ("تحديث نشاط المستخدمين", self.bench_user_activity),
+            ("شاشة الإحصائيات المفصلة", self.bench_detailed_stats),
+            ("استعلامات تقرير المراقبة", self.bench_monitoring_queries),
+            ("حجم سجل الرسائل المرسلة", self.bench_message_storage),
+            ("أرشفة سجل الرسائل المرسلة", self.bench_retention),
+        ]
+
+        for name, bench_func in benchmarks:
+            try:
+                self.results.append(f"📊 {name}:\n{bench_func()}")
+            except Exception as e:
+                self.results.append(f"❌ {name}: {e}")
+                logger.error(f"❌ خطأ في قياس {name}: {e}")
+
+        print("\n\n".join(self.results))
+
+    def _measure(self, func, inputs, repeats: int = 5) -> float:
+        """قياس عدد الاستدعاءات في الثانية (أفضل نتيجة من عدة تكرارات)"""
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(self.rounds):
+                for item in inputs:
+                    func(item)
+            best = min(best, time.perf_counter() - start)
+        return self.rounds * len(inputs) / best
+
+    def bench_signal_parser(self) -> str:
+        """مقارنة المحلل أحادي المرور بالمحلل القديم متعدد التعابير"""
+        logging.getLogger('src.signal_parser').setLevel(logging.CRITICAL)
+
+        legacy = RegexSignalParser()
+        single_pass = SignalParser()
+
+        legacy_rate = self._measure(legacy.parse_signal_text, SIGNAL_SAMPLES)
+        single_rate = self._measure(single_pass.parse_signal_text, SIGNAL_SAMPLES)
+
+        # مقارنة عدد الأهداف المستخرجة للتحقق من عدم فقدان حقول
+        lines = []
+        for i, sample in enumerate(SIGNAL_SAMPLES, 1):
+            old = legacy.parse_signal_text(sample)
+            new = single_pass.parse_signal_text(sample)
+            lines.append(
+                f"  نموذج {i}: أهداف {len(old['targets'])} ← {len(new['targets'])}، "
+                f"الرمز {old['symbol']} ← {new['symbol']}"
+            )
+
+        return (
+            f"  المحلل القديم: {legacy_rate:,.0f} إشارة/ثانية\n"
+            f"  المحلل أحادي المرور: {single_rate:,.0f} إشارة/ثانية\n"
+            f"  التسريع: {single_rate / legacy_rate:.2f}x\n"
+            + "\n".join(lines)
+        )
+
+    def _worst_parse_time(self, parser, text: str, repeats: int = 3) -> float:
+        """أسوأ زمن تحليل لنص واحد بالميكروثانية"""
+        worst = 0.0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            parser.parse_signal_text(text)
+            worst = max(worst, time.perf_counter() - start)
+        return worst * 1e6
+
+    def bench_adversarial_signals(self) -> str:
+        """
+        التحقق من أن أسوأ المدخلات تنتهي في زمن خطي
+
+        يبني مدخلات بأقصى طول مسموح من مقاطع تستهدف التراجع في
+        التعابير القديمة، ثم مئات المدخلات العشوائية من مفردات الإشارات.
+        """
+        logging.getLogger('src.signal_parser').setLevel(logging.CRITICAL)
+
+        legacy = RegexSignalParser()
+        single_pass = SignalParser()
+        lines = []
+        failures = []
+
+        for name, piece in ADVERSARIAL_PIECES.items():
+            text = (piece * (MAX_SIGNAL_LENGTH // len(piece) + 1))[:MAX_SIGNAL_LENGTH]
+            elapsed = self._worst_parse_time(single_pass, text)
+            lines.append(f"  {name}: {elapsed:,.0f} ميكروثانية ({elapsed / len(text):.2f} لكل حرف)")
+            if elapsed > SIGNAL_PARSE_TIMEOUT * 1e6:
+                failures.append(name)
+
+        # نمو زمن المحلل القديم مع طول المدخل مقارنة بالمحلل الخطي
+        for size in (1000, 2000, 4000):
+            text = "وقف" * (size // 3)
+            lines.append(
+                f"  وقف × {size // 3}: القديم {self._worst_parse_time(legacy, text, 1):,.0f} "
+                f"ميكروثانية، الجديد {self._worst_parse_time(single_pass, text, 1):,.0f} ميكروثانية"
+            )
+
+        rng = random.Random(42)
+        fuzz_times = []
+        for _ in range(300):
+            parts = []
+            length = rng.randint(1, MAX_SIGNAL_LENGTH)
+            while sum(map(len, parts)) < length:
+                parts.append(rng.choice(FUZZ_VOCABULARY))
+            text = "".join(parts)[:length]
+            fuzz_times.append(self._worst_parse_time(single_pass, text, 1))
+
+        fuzz_times.sort()
+        lines.append(
+            f"  عشوائي ({len(fuzz_times)} مدخل): الوسيط {fuzz_times[len(fuzz_times) // 2]:,.0f} "
+            f"ميكروثانية، الأسوأ {fuzz_times[-1]:,.0f} ميكروثانية"
+        )
+        if fuzz_times[-1] > SIGNAL_PARSE_TIMEOUT * 1e6:
+            failures.append("عشوائي")
+
+        if failures:
+            lines.append(f"  ❌ تجاوزت المهلة: {', '.join(failures)}")
+        else:
+            lines.append(f"  ✅ جميع المدخلات ضمن المهلة ({SIGNAL_PARSE_TIMEOUT * 1000:.0f} مللي ثانية)")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _field_matches(parsed: dict, expected: dict) -> dict:
+        """مقارنة كل حقل مستخرج بالقيمة المتوقعة"""
+        def close(a, b):
+            return a is not None and b is not None and abs(a - b) <= 1e-9 * max(1.0, abs(b))
+
+        targets = parsed.get("targets") or []
+        return {
+            "الرمز": parsed.get("symbol") == expected["symbol"],
+            "الاتجاه": parsed.get("direction") == expected["direction"],
+            "الدخول": close(parsed.get("entry_price_min"), expected["entry_price_min"])
+                and close(parsed.get("entry_price_max"), expected["entry_price_max"]),
+            "وقف الخسارة": close(parsed.get("stop_loss"), expected["stop_loss"]),
+            "الأهداف": len(targets) == len(expected["targets"])
+                and all(close(a, b) for a, b in zip(targets, expected["targets"])),
+        }
+
+    def _corpus_report(self, parser, corpus, rounds: int = 5) -> dict:
+        """زمن كل تحليل ودقة الحقول لمحلل واحد على المجموعة كاملة"""
+        latencies = []
+        for _ in range(rounds):
+            for _, text, _ in corpus:
+                start = time.perf_counter()
+                parser.parse_signal_text(text)
+                latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        field_hits = {}
+        exact = 0
+        failed_templates = {}
+        for name, text, expected in corpus:
+            matches = self._field_matches(parser.parse_signal_text(text), expected)
+            for field, ok in matches.items():
+                field_hits[field] = field_hits.get(field, 0) + ok
+            if all(matches.values()):
+                exact += 1
+            else:
+                failed_templates[name] = failed_templates.get(name, 0) + 1
+
+        return {
+            "throughput": len(latencies) / sum(latencies),
+            "p50": latencies[len(latencies) // 2] * 1e6,
+            "p99": latencies[int(len(latencies) * 0.99)] * 1e6,
+            "fields": {field: hits / len(corpus) * 100 for field, hits in field_hits.items()},
+            "exact": exact / len(corpus) * 100,
+            "failed_templates": failed_templates,
+        }
+
+    def bench_parser_corpus(self) -> str:
+        """
+        سرعة ودقة المحللين على مئات الإشارات بصيغ عربية وإنجليزية
+
+        كل إشارة مولدة من قالب بقيم عشوائية والحقول المتوقعة معروفة،
+        فيُقاس أي تعديل على المحلل من حيث السرعة والصحة معاً. القوالب
+        كُتبت مع المحلل نفسه، لذلك تُعرض دقة نماذج القنوات الفعلية
+        (REAL_SIGNAL_SAMPLES) بشكل منفصل.
+        """
+        logging.getLogger('src.signal_parser').setLevel(logging.CRITICAL)
+        corpus = build_signal_corpus()
+        real = [(name, text, expected) for name, (text, expected) in REAL_SIGNAL_SAMPLES.items()]
+        lines = [
+            f"  المجموعة: {len(corpus)} إشارة من {len(CORPUS_TEMPLATES)} صيغة، "
+            f"و{len(real)} نموذجاً من القنوات الفعلية"
+        ]
+
+        for label, parser in (("أحادي المرور", SignalParser()), ("القديم", RegexSignalParser())):
+            report = self._corpus_report(parser, corpus)
+            fields = "، ".join(f"{field} {rate:.1f}%" for field, rate in report["fields"].items())
+            lines.append(
+                f"  {label}: {report['throughput']:,.0f} إشارة/ثانية، "
+                f"p50 {report['p50']:,.0f} ميكروثانية، p99 {report['p99']:,.0f} ميكروثانية\n"
+                f"    الحقول: {fields}\n"
+                f"    مطابقة كاملة: {report['exact']:.1f}%"
+            )
+            for name, count in sorted(report["failed_templates"].items(), key=lambda item: -item[1]):
+                lines.append(f"    ✗ {name}: {count}")
+
+            real_report = self._corpus_report(parser, real, rounds=1)
+            lines.append(f"    النماذج الفعلية: مطابقة كاملة {real_report['exact']:.1f}%")
+            for name in real_report["failed_templates"]:
+                lines.append(f"    ✗ {name}")
+
+        return "\n".join(lines)
+
+    def _random_signals(self, rng: random.Random, count: int):
+        """إشارات عشوائية حول سعر 100 لرمز واحد"""
+        signals = []
+        for signal_id in range(count):
+            entry = rng.uniform(80, 120)
+            width = rng.uniform(0, 2)
+            if rng.random() < 0.5:
+                signals.append({
+                    'id': signal_id, 'direction': 'BUY',
+                    'entry_price_min': entry, 'entry_price_max': entry + width,
+                    'stop_loss': entry - rng.uniform(2, 10),
+                    'targets': sorted(entry + width + rng.uniform(1, 15) for _ in range(3))
+                })
+            else:
+                signals.append({
+                    'id': signal_id, 'direction': 'SELL',
+                    'entry_price_min': entry, 'entry_price_max': entry + width,
+                    'stop_loss': entry + width + rng.uniform(2, 10),
+                    'targets': sorted(entry - rng.uniform(1, 15) for _ in range(3))
+                })
+        return signals
+
+    def bench_signal_tracking(self) -> str:
+        """مقارنة التقييم الكامل بفهرس المستويات على آلاف الإشارات لرمز واحد"""
+        lines = []
+        for count in (1000, 10000, 50000):
+            rng = random.Random(7)
+            signals = self._random_signals(rng, count)
+            prices = [100.0]
+            for _ in range(500):
+                prices.append(prices[-1] * (1 + rng.gauss(0, 0.0005)))
+
+            full_scan = SignalBook(signals, use_index=False)
+            start = time.perf_counter()
+            for price in prices:
+                full_scan.evaluate(price)
+            full_time = time.perf_counter() - start
+
+            indexed = SignalBook(signals)
+            start = time.perf_counter()
+            for price in prices:
+                indexed.evaluate(price)
+            indexed_time = time.perf_counter() - start
+
+            lines.append(
+                f"  {count:,} إشارة: تقييم كامل {full_time / len(prices) * 1e6:,.0f} ميكروثانية/سعر، "
+                f"فهرس المستويات {indexed_time / len(prices) * 1e6:,.0f} ميكروثانية/سعر"
+            )
+
+        return "\n".join(lines)
+
+    def _backtest_data(self, directory: str, symbols: int = 8, bars: int = 20000, signals_per_symbol: int = 1000):
+        """شموع ساعية عشوائية محفوظة كملفات .npy مع إشارات شراء عليها"""
+        import numpy as np
+
+        hour = 3_600_000
+        store = CandleStore(directory)
+        rng = np.random.default_rng(3)
+        by_symbol = {}
+        signal_id = 0
+        for number in range(symbols):
+            symbol = f"COIN{number}/USDT"
+            closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+            candles = np.column_stack([
+                np.arange(bars) * hour, closes, closes * 1.005, closes * 0.995, closes, np.ones(bars)
+            ])
+            store.save(symbol, "1h", candles)
+
+            signals = []
+            for bar in rng.integers(0, bars - 1, signals_per_symbol).tolist():
+                entry = float(closes[bar])
+                signals.append({
+                    'id': signal_id, 'symbol': symbol, 'direction': 'BUY',
+                    'entry_price_min': entry * 0.99, 'entry_price_max': entry,
+                    'stop_loss': entry * 0.95, 'targets': [entry * 1.03, entry * 1.06, entry * 1.1],
+                    'created_ts': bar * hour
+                })
+                signal_id += 1
+            by_symbol[symbol] = signals
+        return store, by_symbol
+
+    def bench_parallel_backtest(self) -> str:
+        """زمن الاختبار الرجعي لكل المتغيرات مع عدد مختلف من العمليات"""
+        cores = os.cpu_count() or 1
+        lines = [f"  أنوية المعالج: {cores}"]
+
+        with tempfile.TemporaryDirectory() as directory:
+            store, by_symbol = self._backtest_data(directory)
+            engine = Backtester(store=store, interval="1h")
+            total = sum(len(signals) for signals in by_symbol.values())
+
+            baseline = None
+            for workers in sorted({1, 2, cores}):
+                runner = ParallelBacktestRunner(engine, workers=workers)
+                try:
+                    # التشغيل الأول يبدأ العمليات ويستورد الوحدات
+                    asyncio.run(runner.run_jobs({symbol: signals[:1] for symbol, signals in by_symbol.items()}))
+                    start = time.perf_counter()
+                    reports = asyncio.run(runner.run_jobs(by_symbol))
+                    elapsed = time.perf_counter() - start
+                finally:
+                    runner.close()
+
+                baseline = baseline or elapsed
+                simulated = sum(len(report['results']) for report in reports.values())
+                lines.append(
+                    f"  {workers} عملية: {elapsed:.2f} ثانية لـ {simulated:,} محاكاة "
+                    f"({total:,} إشارة × {len(reports)} متغير)، التسريع {baseline / elapsed:.2f}x"
+                )
+
+        return "\n".join(lines)
+
+    async def _time_queries(self, db: DatabaseManager, count: int) -> tuple:
+        """متوسط زمن قراءة وكتابة نموذجيتين بالميكروثانية"""
+        start = time.perf_counter()
+        for user_id in range(count):
+            await db.get_user_info(user_id)
+        read_time = (time.perf_counter() - start) / count * 1e6
+
+        start = time.perf_counter()
+        for user_id in range(count):
+            await db.update_user_activity(user_id)
+        write_time = (time.perf_counter() - start) / count * 1e6
+        return read_time, write_time
+
+    def bench_database_connections(self, count: int = 300) -> str:
+        """زمن الاستعلام الواحد باتصال جديد لكل استدعاء مقارنة بالاتصالات الدائمة"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+
+        async def run(path: str) -> tuple:
+            db = DatabaseManager(path)
+            await db.init_database()
+            for user_id in range(count):
+                await db.add_user(user_id)
+
+            pooled = await self._time_queries(db, count)
+            await db.close()
+            # بعد الإغلاق يفتح كل استدعاء اتصالاً مؤقتاً كما كان سابقاً
+            per_call = await self._time_queries(db, count)
+            return pooled, per_call
+
+        with tempfile.TemporaryDirectory() as directory:
+            (pooled_read, pooled_write), (single_read, single_write) = asyncio.run(
+                run(os.path.join(directory, "bench.db"))
+            )
+
+        return (
+            f"  قراءة (get_user_info): اتصال لكل استدعاء {single_read:,.0f} ميكروثانية، "
+            f"اتصالات دائمة {pooled_read:,.0f} ميكروثانية\n"
+            f"  كتابة (update_user_activity): اتصال لكل استدعاء {single_write:,.0f} ميكروثانية، "
+            f"اتصالات دائمة {pooled_write:,.0f} ميكروثانية"
+        )
+
+    def bench_database_pragmas(self, count: int = 1000) -> str:
+        """إنتاجية القراءة والكتابة بإعدادات SQLite الافتراضية مقارنة بملف الأداء"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+        profiles = {
+            "الافتراضي (DELETE، FULL)": {"journal_mode": "DELETE", "synchronous": "FULL"},
+            "ملف الأداء": DB_PRAGMAS,
+        }
+
+        async def run(path: str, pragmas: dict) -> dict:
+            db = DatabaseManager(path, pragmas=pragmas)
+            await db.init_database()
+            for user_id in range(100):
+                await db.add_user(user_id)
+
+            rates = {}
+            start = time.perf_counter()
+            for number in range(count):
+                await db.log_sent_message(number % 100, "signal", "نص الإشارة", True)
+            rates["كتابة"] = count / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for number in range(count):
+                await db.get_user_info(number % 100)
+            rates["قراءة"] = count / (time.perf_counter() - start)
+
+            # بث: تسجيل الرسائل بالتوازي مع قراءات المستخدمين
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(db.log_sent_message(number % 100, "signal", "نص الإشارة", True) for number in range(count)),
+                *(db.get_user_info(number % 100) for number in range(count))
+            )
+            rates["مختلط"] = 2 * count / (time.perf_counter() - start)
+
+            await db.close()
+            return rates
+
+        lines = []
+        with tempfile.TemporaryDirectory() as directory:
+            for number, (name, pragmas) in enumerate(profiles.items()):
+                rates = asyncio.run(run(os.path.join(directory, f"profile{number}.db"), pragmas))
+                lines.append(f"  {name}: " + "، ".join(f"{kind} {rate:,.0f} عملية/ثانية" for kind, rate in rates.items()))
+
+        return "\n".join(lines)
+
+    def bench_sent_message_log(self, count: int = 2000) -> str:
+        """تسجيل بث لعدد من المستلمين: إدراج ومعاملة لكل رسالة مقارنة بالكتابة على دفعات"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+
+        async def run(path: str) -> tuple:
+            db = DatabaseManager(path)
+            await db.init_database()
+
+            start = time.perf_counter()
+            for user_id in range(count):
+                await db.log_sent_message(user_id, "broadcast", "رسالة عامة", True)
+            per_message = time.perf_counter() - start
+
+            writer = SentMessageWriter(db)
+            start = time.perf_counter()
+            for user_id in range(count):
+                writer.log(user_id, "broadcast", "رسالة عامة", True)
+            logged = time.perf_counter() - start
+            await writer.flush()
+            batched = time.perf_counter() - start
+
+            await db.close()
+            return per_message, logged, batched
+
+        with tempfile.TemporaryDirectory() as directory:
+            per_message, logged, batched = asyncio.run(run(os.path.join(directory, "bench.db")))
+
+        return (
+            f"  إدراج لكل رسالة: {per_message * 1000:,.1f} مللي ثانية ({count / per_message:,.0f} رسالة/ثانية)\n"
+            f"  على دفعات: {batched * 1000:,.1f} مللي ثانية ({count / batched:,.0f} رسالة/ثانية)، "
+            f"منها {logged * 1000:,.2f} مللي ثانية فقط في مسار الإرسال"
+        )
+
+    def bench_allowed_users(self, count: int = 2000) -> str:
+        """زمن is_user_allowed من الذاكرة مقارنة باستعلام قاعدة البيانات"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+
+        async def timed(db: DatabaseManager) -> float:
+            start = time.perf_counter()
+            for user_id in range(count):
+                await db.is_user_allowed(user_id)
+            return (time.perf_counter() - start) / count * 1e6
+
+        async def run(path: str) -> tuple:
+            db = DatabaseManager(path)
+            await db.init_database()
+            for user_id in range(0, count, 2):
+                await db.add_allowed_user(user_id)
+
+            cached = await timed(db)
+            # بدون الذاكرة يعود التحقق إلى استعلام لكل استدعاء
+            db._allowed_users = None
+            queried = await timed(db)
+            await db.close()
+            return cached, queried
+
+        with tempfile.TemporaryDirectory() as directory:
+            cached, queried = asyncio.run(run(os.path.join(directory, "bench.db")))
+
+        return (
+            f"  استعلام قاعدة البيانات: {queried:,.1f} ميكروثانية، "
+            f"من الذاكرة: {cached:,.2f} ميكروثانية ({queried / cached:,.0f}x)"
+        )
+
+    def bench_user_activity(self, count: int = 2000, users: int = 50) -> str:
+        """نقرات متتالية من عدد محدود من المستخدمين: تحديث لكل نقرة مقارنة بالدمج"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+
+        async def run(path: str) -> tuple:
+            db = DatabaseManager(path)
+            await db.init_database()
+            for user_id in range(users):
+                await db.add_user(user_id)
+
+            start = time.perf_counter()
+            for number in range(count):
+                await db.update_user_activity(number % users)
+            per_click = time.perf_counter() - start
+
+            writer = ActivityWriter(db)
+            start = time.perf_counter()
+            for number in range(count):
+                writer.touch(number % users)
+            written = await writer.flush()
+            coalesced = time.perf_counter() - start
+
+            await db.close()
+            return per_click, coalesced, written
+
+        with tempfile.TemporaryDirectory() as directory:
+            per_click, coalesced, written = asyncio.run(run(os.path.join(directory, "bench.db")))
+
+        return (
+            f"  تحديث لكل نقرة: {count:,} كتابة في {per_click * 1000:,.1f} مللي ثانية\n"
+            f"  مدمج: {written} صف في معاملة واحدة خلال {coalesced * 1000:,.1f} مللي ثانية"
+        )
+
+    # استعلامات COUNT(*) التي كانت تنفذها get_detailed_stats قبل العدادات المحفوظة
+    LEGACY_STATS_QUERIES = [
+        "SELECT COUNT(*) FROM users",
+        "SELECT COUNT(*) FROM allowed_users",
+        "SELECT COUNT(*) FROM allowed_users WHERE is_premium = 1",
+        "SELECT COUNT(*) FROM signals",
+        "SELECT COUNT(*) FROM signals WHERE is_active = 1",
+        "SELECT COUNT(*) FROM signals WHERE created_date >= date('now', '-7 days')",
+        "SELECT COUNT(*) FROM signals WHERE created_date >= date('now', '-30 days')",
+        "SELECT COUNT(*) FROM users WHERE last_activity >= datetime('now', '-24 hours')",
+        "SELECT COUNT(*) FROM users WHERE last_activity >= datetime('now', '-7 days')",
+    ]
+
+    def bench_detailed_stats(self, sizes: tuple = (1000, 50000), repeats: int = 50) -> str:
+        """زمن get_detailed_stats مع نمو جداول الإشارات والمستخدمين"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+
+        async def run(path: str, size: int) -> tuple:
+            db = DatabaseManager(path)
+            await db.init_database()
+            async with db._write() as conn:
+                await conn.executemany(
+                    "INSERT INTO users (user_id, last_activity) VALUES (?, datetime('now', ?))",
+                    [(number, f"-{number % 365} days") for number in range(size)]
+                )
+                await conn.executemany(
+                    "INSERT INTO signals (signal_text, symbol, direction, is_active, created_date) "
+                    "VALUES ('x', 'BTCUSDT', 'BUY', ?, datetime('now', ?))",
+                    [(number % 2, f"-{number % 365} days") for number in range(size)]
+                )
+                await conn.commit()
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                async with db._read() as conn:
+                    for query in self.LEGACY_STATS_QUERIES:
+                        await (await conn.execute(query)).fetchone()
+            legacy = (time.perf_counter() - start) / repeats * 1000
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                await db.get_detailed_stats()
+            current = (time.perf_counter() - start) / repeats * 1000
+
+            await db.close()
+            return legacy, current
+
+        lines = []
+        with tempfile.TemporaryDirectory() as directory:
+            for size in sizes:
+                legacy, current = asyncio.run(run(os.path.join(directory, f"stats{size}.db"), size))
+                lines.append(
+                    f"  {size:,} إشارة ومستخدم: COUNT(*) {legacy:.2f} مللي ثانية، "
+                    f"العدادات المحفوظة {current:.2f} مللي ثانية"
+                )
+
+        return "\n".join(lines)
+
+    def bench_monitoring_queries(self, sizes: tuple = (1000, 100000), repeats: int = 20) -> str:
+        """زمن استعلامات قاعدة البيانات في تقرير BotMonitor مع نمو سجل الرسائل"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+
+        async def report(db: DatabaseManager):
+            today = datetime.now().date()
+            await db.get_messages_count_by_date(today)
+            await db.get_messages_count_by_date_range(today - timedelta(days=7), today)
+            await db.get_messages_count_by_date_range(today - timedelta(days=30), today)
+            await db.get_total_sent_messages()
+            await db.get_successful_sent_messages()
+            await db.get_active_users_count(today)
+            await db.get_new_users_count(today)
+            await db.get_new_users_count_range(today - timedelta(days=7), today)
+            await db.get_new_users_count_range(today - timedelta(days=30), today)
+            await db.get_signals_count_by_date(today)
+            await db.get_signals_count_by_date_range(today - timedelta(days=7), today)
+            await db.get_peak_activity_hours()
+
+        async def run(path: str, size: int) -> float:
+            db = DatabaseManager(path)
+            await db.init_database()
+            async with db._write() as conn:
+                await conn.executemany(
+                    "INSERT INTO sent_messages (user_id, message_type, message_text, sent_date) "
+                    "VALUES (?, 'signal', 'x', datetime('now', ?))",
+                    [(number % 500, f"-{number % 8760} hours") for number in range(size)]
+                )
+                await conn.commit()
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                await report(db)
+            elapsed = (time.perf_counter() - start) / repeats * 1000
+            await db.close()
+            return elapsed
+
+        lines = []
+        with tempfile.TemporaryDirectory() as directory:
+            for size in sizes:
+                elapsed = asyncio.run(run(os.path.join(directory, f"monitor{size}.db"), size))
+                lines.append(f"  {size:,} رسالة في السجل: {elapsed:.2f} مللي ثانية لاستعلامات التقرير الاثني عشر")
+
+        return "\n".join(lines)
+
+    def bench_message_storage(self, recipients: int = 2000, broadcasts: int = 5) -> str:
+        """حجم قاعدة البيانات لكل سجل إرسال: النص في كل صف مقارنة بنص مخزن مرة واحدة"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+        texts = [SIGNAL_SAMPLES[number % len(SIGNAL_SAMPLES)][:500] + str(number) for number in range(broadcasts)]
+
+        async def used_bytes(db: DatabaseManager) -> int:
+            async with db._read() as conn:
+                page_count = (await (await conn.execute("PRAGMA page_count")).fetchone())[0]
+                free_pages = (await (await conn.execute("PRAGMA freelist_count")).fetchone())[0]
+                page_size = (await (await conn.execute("PRAGMA page_size")).fetchone())[0]
+            return (page_count - free_pages) * page_size
+
+        async def run(path: str, inline: bool) -> float:
+            db = DatabaseManager(path)
+            await db.init_database()
+            await db.checkpoint("TRUNCATE")
+            start = await used_bytes(db)
+
+            for text in texts:
+                rows = [(user_id, "broadcast", text, 1, None) for user_id in range(recipients)]
+                if inline:
+                    # التخزين السابق: النص كاملاً في كل سجل إرسال
+                    async with db._write() as conn:
+                        await conn.executemany(
+                            "INSERT INTO sent_messages (user_id, message_type, message_text, is_successful) "
+                            "VALUES (?, ?, ?, ?)", [row[:4] for row in rows]
+                        )
+                        await conn.commit()
+                else:
+                    await db.log_sent_messages_batch(rows)
+
+            await db.checkpoint("TRUNCATE")
+            per_row = (await used_bytes(db) - start) / (recipients * broadcasts)
+            await db.close()
+            return per_row
+
+        with tempfile.TemporaryDirectory() as directory:
+            inline = asyncio.run(run(os.path.join(directory, "inline.db"), True))
+            shared = asyncio.run(run(os.path.join(directory, "shared.db"), False))
+
+        return (
+            f"  {broadcasts} رسائل عامة × {recipients:,} مستخدم: النص في كل صف {inline:,.0f} بايت/سجل، "
+            f"نص مشترك {shared:,.0f} بايت/سجل"
+        )
+
+    def bench_retention(self, count: int = 50000) -> str:
+        """أرشفة سجل رسائل قديم: الزمن الكلي وأطول حجز لقفل الكتابة في دفعة واحدة"""
+        logging.getLogger('src.database').setLevel(logging.WARNING)
+        logging.getLogger('src.retention').setLevel(logging.WARNING)
+
+        async def run(directory: str) -> tuple:
+            db = DatabaseManager(os.path.join(directory, "bench.db"))
+            await db.init_database()
+            for start in range(0, count, 5000):
+                await db.log_sent_messages_batch([
+                    (number % 500, "broadcast", f"رسالة عامة {number // 2000}", 1, f"2020-01-{1 + number * 28 // count:02d} 12:00:00")
+                    for number in range(start, min(start + 5000, count))
+                ])
+
+            # قياس زمن كل معاملة حذف (مدة حجز قفل الكتابة)
+            batch_times = []
+            delete = db.delete_sent_messages
+
+            async def timed_delete(message_ids):
+                started = time.perf_counter()
+                result = await delete(message_ids)
+                batch_times.append(time.perf_counter() - started)
+                return result
+
+            db.delete_sent_messages = timed_delete
+            manager = RetentionManager(db, retention_days=30, archive_dir=os.path.join(directory, "archive"))
+            start = time.perf_counter()
+            result = await manager.run()
+            elapsed = time.perf_counter() - start
+
+            await db.close()
+            return result, elapsed, max(batch_times or [0])
+
+        with tempfile.TemporaryDirectory() as directory:
+            result, elapsed, longest = asyncio.run(run(directory))
+
+        return (
+            f"  {result['archived']:,} سجل في {elapsed:.2f} ثانية ({result['archived'] / elapsed:,.0f} سجل/ثانية)، "
+            f"أطول معاملة حذف {longest * 1000:.1f} مللي ثانية، صفحات مُرجعة {result['freed_pages']:,}"
+        )
+
+
+if __name__ == "__main__":
+    BotBenchmark().run_all()
@@ -19,6 +19,30 @@ GITHUB_API_TOKEN = os.getenv("GITHUB_API_TOKEN", "your_github_token_here")
 
 # إعدادات قاعدة البيانات
 DATABASE_PATH = "data/trading_bot.db"
+DB_READER_POOL_SIZE = 3  # عدد اتصالات القراءة الدائمة
+DB_CHECKPOINT_INTERVAL = 300  # ثوانٍ بين نقاط تفتيش سجل WAL
+SENT_LOG_BATCH_SIZE = 200  # سجلات الرسائل المرسلة في كل دفعة كتابة
+SENT_LOG_FLUSH_INTERVAL = 2.0  # ثوانٍ كحد أقصى قبل كتابة السجلات المعلقة
+SENT_LOG_MAX_PENDING = 20000  # أقصى عدد سجلات معلقة إذا تعذرت الكتابة
+ACTIVITY_FLUSH_INTERVAL = 60  # ثوانٍ كحد أقصى لتأخر last_activity عن نشاط المستخدم
+
+# ملف أداء SQLite يُطبق على كل اتصال دائم عند فتحه
+DB_PRAGMAS = {
+    "auto_vacuum": "INCREMENTAL",  # إرجاع الصفحات الفارغة للنظام على دفعات (للقواعد الجديدة)
+    "journal_mode": "WAL",  # القراءة لا تنتظر الكتابة
+    "synchronous": "NORMAL",  # آمن مع WAL ويتجنب مزامنة القرص عند كل معاملة
+    "cache_size": -32000,  # ذاكرة الصفحات بالكيلوبايت (32 ميجابايت)
+    "mmap_size": 134217728,  # قراءة حتى 128 ميجابايت من الملف عبر mmap
+    "temp_store": "MEMORY",  # الجداول المؤقتة والفرز في الذاكرة
+    "busy_timeout": 5000,  # مللي ثانية انتظار عند قفل القاعدة بدلاً من الخطأ الفوري
+}
+
+# الاحتفاظ بسجل الرسائل المرسلة وأرشفته
+SENT_MESSAGES_RETENTION_DAYS = 90  # الأيام التي تبقى فيها سجلات الإرسال في القاعدة
+RETENTION_ARCHIVE_DIR = "data/archive"  # ملفات .jsonl.gz شهرية للسجلات المحذوفة
+RETENTION_BATCH_SIZE = 500  # سجلات كل معاملة حذف (أقل من حد معاملات SQLite)
+RETENTION_INTERVAL = 86400  # ثوانٍ بين كل تشغيل للأرشفة
+RETENTION_VACUUM_PAGES = 1000  # صفحات تُعاد للنظام في كل خطوة تفريغ
 
 # إعدادات المسؤول
 ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", "123456789"))
@@ -35,6 +59,48 @@ TIMEZONE = "Asia/Riyadh"
 RATE_LIMIT_MESSAGES = 30
 RATE_LIMIT_DURATION = 60
 
+# إعدادات تنبيهات المتداولين المتابَعين
+TRADER_ALERTS_INTERVAL = 120  # ثانية بين كل استطلاع للمراكز
+TRADER_ALERTS_BATCH_SIZE = 20  # عدد المتداولين في كل طلب مراكز
+MAX_FOLLOWED_TRADERS = 10  # أقصى عدد متداولين يتابعهم المستخدم الواحد
+DELIVERY_BATCH_SIZE = 25  # عدد الرسائل المرسلة في كل دفعة
+DELIVERY_BATCH_DELAY = 1.0  # ثانية بين الدفعات لتجنب حد المعدل
+
+# حدود تحليل الإشارات
+MAX_SIGNAL_LENGTH = 4096  # أقصى عدد أحرف لنص إشارة واحدة (حد رسائل تيليجرام)
+SIGNAL_PARSE_TIMEOUT = 0.05  # ثانية كحد أقصى لتحليل إشارة واحدة
+
+# ذاكرة نتائج تحليل الإشارات وكشف التكرار
+SIGNAL_CACHE_TTL = 300  # ثانية لصلاحية نتيجة التحليل والسعر المخزنة
+SIGNAL_CACHE_MAX_ENTRIES = 256  # أقصى عدد نصوص مخزنة
+SIGNAL_DEDUP_WINDOW_HOURS = 24  # الإشارة المطابقة خلال هذه المدة تُعتبر مكررة
+
+# إعدادات تتبع الإشارات
+SIGNAL_TRACKER_INTERVAL = 30  # ثانية بين كل تحديث للأسعار
+SIGNAL_TRACKER_RELOAD_EVERY = 10  # إعادة تحميل الإشارات النشطة كل عدد من التحديثات
+
+# إعدادات الاختبار الرجعي للإشارات
+CANDLES_DIR = "data/candles"  # مخزن الشموع المحلي (ملفات .npy)
+BACKTEST_INTERVAL = "1h"  # فاصل الشموع المستخدم في الاختبار
+BACKTEST_MAX_BARS = 720  # أقصى عدد شموع لمتابعة الإشارة بعد نشرها (30 يوماً)
+BACKTEST_WORKERS = 0  # عدد عمليات الاختبار المتوازية (0 = عدد أنوية المعالج)
+BACKTEST_CHUNK_SIZE = 500  # أقصى عدد إشارات في كل مهمة لتوزيع الرموز الكبيرة على العمليات
+BACKTEST_PROGRESS_INTERVAL = 3  # ثوانٍ بين تحديثات رسالة التقدم للمسؤول
+
+# متغيرات الاختبار الرجعي: الاسم -> (قاعدة الدخول، نسب جني الأرباح عند كل هدف)
+BACKTEST_VARIANTS = {
+    "limit_equal": ("limit", None),
+    "mid_equal": ("mid", None),
+    "market_equal": ("market", None),
+    "limit_first_target": ("limit", [1]),
+    "limit_scaled": ("limit", [0.5, 0.3, 0.2]),
+}
+
+# إعدادات الاستيراد الجماعي للإشارات
+BULK_IMPORT_MAX_SIGNALS = 500  # أقصى عدد إشارات في عملية استيراد واحدة
+BULK_IMPORT_MAX_FILE_SIZE = 1024 * 1024  # أقصى حجم لملف الاستيراد (بايت)
+BULK_IMPORT_REPORT_ERRORS = 20  # عدد الأخطاء المعروضة في تقرير الاستيراد
+
 # رسائل البوت
 MESSAGES = {
     "welcome": """
@@ -15,9 +15,14 @@ sys.path.append(str(Path(__file__).parent))
 
 from config.config import BOT_TOKEN, ADMIN_USER_ID
 from src.database import db_manager
+from src.db_writers import sent_message_writer, activity_writer
+from src.retention import retention_manager
 from src.handlers import router
 from src.admin_handlers import admin_router
 from src.api_clients import APIManager
+from src.trader_alerts import trader_alerts
+from src.signal_tracker import signal_tracker
+from src.backtest_runner import backtest_runner
 from config.config import BINANCE_API_KEY, BINANCE_SECRET_KEY
 
 # إعداد التسجيل
@@ -40,6 +45,14 @@ dp = Dispatcher(storage=MemoryStorage())
 dp.include_router(router)
 dp.include_router(admin_router)
 
+@dp.update.outer_middleware()
+async def track_user_activity(handler, event, data):
+    """تسجيل نشاط المستخدم مع كل تحديث (يُكتب على دفعات)"""
+    user = data.get("event_from_user")
+    if user:
+        activity_writer.touch(user.id)
+    return await handler(event, data)
+
 # مدير APIs العام
 api_manager = None
 
@@ -62,6 +75,22 @@ async def on_startup():
         await api_manager.init_all()
         logger.info("✅ تم تهيئة جميع APIs")
         
+        # بدء استطلاع مراكز المتداولين المتابَعين
+        asyncio.create_task(trader_alerts.start_polling(bot))
+        
+        # بدء تتبع الإشارات النشطة
+        asyncio.create_task(signal_tracker.start_tracking(api_manager.binance))
+        
+        # نقاط تفتيش سجل WAL الدورية
+        asyncio.create_task(db_manager.start_checkpointing())
+        
+        # كتابة سجلات الرسائل المرسلة على دفعات
+        asyncio.create_task(sent_message_writer.start_flushing())
+        asyncio.create_task(activity_writer.start_flushing())
+        
+        # أرشفة سجل الرسائل المرسلة القديم
+        asyncio.create_task(retention_manager.start_retention())
+        
         # إرسال رسالة للمسؤول
         try:
             await bot.send_message(
@@ -83,10 +112,24 @@ async def on_shutdown():
     try:
         logger.info("🛑 إيقاف البوت...")
         
+        # إيقاف استطلاع مراكز المتداولين
+        trader_alerts.stop_polling()
+        signal_tracker.stop_tracking()
+        backtest_runner.close()
+        db_manager.stop_checkpointing()
+        sent_message_writer.stop_flushing()
+        activity_writer.stop_flushing()
+        retention_manager.stop_retention()
+        
         # إغلاق اتصالات APIs
         if api_manager:
             await api_manager.close_all()
         
+        # كتابة السجلات والنشاط المعلق ثم إغلاق اتصالات قاعدة البيانات
+        await sent_message_writer.flush()
+        await activity_writer.flush()
+        await db_manager.close()
+        
         # إرسال رسالة للمسؤول
         try:
             await bot.send_message(
@@ -0,0 +1,89 @@
+"""
+نماذج إشارات بصيغ قنوات التداول الفعلية مع نتائج تحليلها المتوقعة
+
+النتائج مكتوبة يدوياً من قراءة كل رسالة، لا من مخرجات المحلل، وتُستخدم
+كاختبار انحدار في test_bot.py وكقياس دقة مستقل في benchmark_bot.py بجانب
+المجموعة المولدة من القوالب.
+"""
+
+
+def _expected(symbol, direction, entry_min, entry_max, stop_loss, targets):
+    return {
+        "symbol": symbol,
+        "direction": direction,
+        "entry_price_min": entry_min,
+        "entry_price_max": entry_max,
+        "stop_loss": stop_loss,
+        "targets": targets,
+    }
+
+
+# الاسم -> (نص الرسالة، الحقول المتوقعة مع الأهداف مرتبة تصاعدياً)
+REAL_SIGNAL_SAMPLES = {
+    "عملة وأهداف مرقمة بالكلمات": (
+        "📍Coin : #AVAX/USDT\n\n🟢 LONG \n\n👉 Entry: 31.20 - 30.50\n\n🌐 Leverage: 10x\n\n"
+        "🎯 Target 1: 31.80\n🎯 Target 2: 32.40\n🎯 Target 3: 33.10\n\n❌ StopLoss: 29.70",
+        _expected("AVAXUSDT", "BUY", 30.5, 31.2, 29.7, [31.8, 32.4, 33.1])
+    ),
+    "منطقة شراء": (
+        "#BTCUSDT LONG\nBuy zone: 61200-61800\nTP1: 62500\nTP2: 63400\nTP3: 65000\nSL: 60200",
+        _expected("BTCUSDT", "BUY", 61200.0, 61800.0, 60200.0, [62500.0, 63400.0, 65000.0])
+    ),
+    "رمز بعلامة الدولار وقائمة مرقمة": (
+        "$ETH Short 🔴\nEntry Zone: 3480 - 3520\nTake-Profit Targets:\n1) 3420\n2) 3360\n3) 3290\nStop: 3590",
+        _expected("ETHUSDT", "SELL", 3480.0, 3520.0, 3590.0, [3290.0, 3360.0, 3420.0])
+    ),
+    "صفقة عربية بأهداف على أسطر": (
+        "🔥 صفقة جديدة 🔥\n\nالعملة: XRP/USDT\nنوع الصفقة: شراء (Long)\nمنطقة الدخول: 0.6150 - 0.6050\n"
+        "الأهداف:\n🎯 0.6300\n🎯 0.6450\n🎯 0.6700\nوقف الخسارة: 0.5890",
+        _expected("XRPUSDT", "BUY", 0.605, 0.615, 0.589, [0.63, 0.645, 0.67])
+    ),
+    "أهداف مفصولة بشرطات": (
+        "DOGE/USDT 📈 BUY\n\nEntry: 0.1550\nTargets: 0.1600 - 0.1650 - 0.1720\nSL: 0.1490",
+        _expected("DOGEUSDT", "BUY", 0.155, 0.155, 0.149, [0.16, 0.165, 0.172])
+    ),
+    "أهداف مفصولة بشرطات مائلة": (
+        "SOLUSDT\nLONG 🚀\nEntry: 142.5\nTP: 146 / 150 / 155\nSL: 138.2",
+        _expected("SOLUSDT", "BUY", 142.5, 142.5, 138.2, [146.0, 150.0, 155.0])
+    ),
+    "أهداف عربية بالترتيب": (
+        "#LINK\nبيع 🔻\nالدخول: 14.80\nالهدف الأول: 14.20\nالهدف الثاني: 13.60\nالوقف: 15.40",
+        _expected("LINKUSDT", "SELL", 14.8, 14.8, 15.4, [13.6, 14.2])
+    ),
+    "جني ربح مرقم ووقف بشرطة": (
+        "Pair: ADA/USDT\nSide: SELL\nEntry price: 0.4520\nStop-loss: 0.4680\n"
+        "Take profit 1: 0.4400\nTake profit 2: 0.4280",
+        _expected("ADAUSDT", "SELL", 0.452, 0.452, 0.468, [0.428, 0.44])
+    ),
+    "سطر واحد": (
+        "BNB/USDT long entry 578-582 sl 565 tp 590 600 615",
+        _expected("BNBUSDT", "BUY", 578.0, 582.0, 565.0, [590.0, 600.0, 615.0])
+    ),
+    "رموز تعبيرية قبل العناوين": (
+        "🪙 LTCUSDT\n📊 Direction: Short\n💰 Entry: 84.50 - 85.20\n🛑 SL: 87.00\n"
+        "✅ TP1: 83.00\n✅ TP2: 81.50\n✅ TP3: 79.00",
+        _expected("LTCUSDT", "SELL", 84.5, 85.2, 87.0, [79.0, 81.5, 83.0])
+    ),
+    "أهداف دخول ووقف": (
+        "⚡️⚡️ #DOT/USDT ⚡️⚡️\nSignal Type: Regular (Long)\nLeverage: Cross (20x)\n"
+        "Entry Targets: 7.05 - 7.15\nTake-Profit Targets:\n1) 7.30\n2) 7.45\n3) 7.70\nStop Targets: 6.85",
+        _expected("DOTUSDT", "BUY", 7.05, 7.15, 6.85, [7.3, 7.45, 7.7])
+    ),
+    "توصية عربية بأهداف مفصولة بشرطات": (
+        "توصية شراء 📈\n#ATOMUSDT\nسعر الدخول: 9.80\nالأهداف: 10.10 - 10.40 - 10.90\nوقف الخسارة: 9.45",
+        _expected("ATOMUSDT", "BUY", 9.8, 9.8, 9.45, [10.1, 10.4, 10.9])
+    ),
+    "نسب مئوية بجانب الأهداف": (
+        "BTC/USDT 🔴 SHORT\nLeverage 20x\nEntry 67,850\nTP1 67,100 (+1.1%)\nTP2 66,300 (+2.3%)\nSL 68,600 (-1.1%)",
+        _expected("BTCUSDT", "SELL", 67850.0, 67850.0, 68600.0, [66300.0, 67100.0])
+    ),
+    "تاريخ النشر وأرقام الأزرار": (
+        "⏰ 2024-05-01 14:30\n#ADA\nشراء\nنقطة الدخول: 0.4450\n1️⃣ 0.4550\n2️⃣ 0.4650\nوقف الخسارة: 0.4320",
+        _expected("ADAUSDT", "BUY", 0.445, 0.445, 0.432, [0.455, 0.465])
+    ),
+    "وقف بكلمة واحدة وأهداف بفواصل": (
+        "📢 Binance Futures\nCoin: #MATIC\nPosition: LONG ⬆️\nEntry: 0.7200 - 0.7050\n"
+        "Targets: 0.7350, 0.7500, 0.7700, 0.8000\nStoploss: 0.6900",
+        _expected("MATICUSDT", "BUY", 0.705, 0.72, 0.69, [0.735, 0.75, 0.77, 0.8])
+    ),
+}
@@ -14,6 +14,7 @@ from aiogram.fsm.state import State, StatesGroup
 
 from .keyboards import *
 from .database import db_manager
+from .db_writers import sent_message_writer
 from .signal_parser import signal_parser
 from .monitoring import bot_monitor
 from config.config import ADMIN_USER_ID, MESSAGES
@@ -109,6 +110,56 @@ async def show_detailed_stats(callback: CallbackQuery):
         logger.error(f"خطأ في عرض الإحصائيات: {e}")
         await callback.answer("حدث خطأ في جلب الإحصائيات", show_alert=True)
 
+def format_performance_rows(rows: List[Dict]) -> str:
+    """تنسيق صفوف أداء الإشارات"""
+    if not rows:
+        return "• لا توجد إشارات مغلقة بعد\n"
+    
+    text = ""
+    for row in rows:
+        text += f"• **{row['bucket']}**: {row['total']} إشارة، فوز {row['win_rate']:.0f}%، متوسط {row['avg_result_percent']:+.2f}%"
+        if row['avg_hours_to_target'] is not None:
+            text += f"، الهدف الأول خلال {row['avg_hours_to_target']:.1f} ساعة"
+        text += "\n"
+    return text
+
+@admin_router.callback_query(F.data == "admin_performance")
+async def show_signal_performance(callback: CallbackQuery):
+    """عرض أداء الإشارات حسب الرمز والاتجاه والشهر"""
+    try:
+        user_id = callback.from_user.id
+        
+        if user_id != ADMIN_USER_ID:
+            await callback.answer(MESSAGES["admin_only"], show_alert=True)
+            return
+        
+        await callback.answer()
+        
+        # الأرقام مجمعة مسبقاً عند إغلاق كل إشارة، فالاستعلامات لا تمسح جدول الإشارات
+        by_direction = await db_manager.get_signal_performance('direction')
+        by_symbol = await db_manager.get_signal_performance('symbol', limit=10, min_signals=3)
+        by_month = await db_manager.get_signal_performance('month', limit=6)
+        
+        performance_message = f"""🏅 **أداء الإشارات المغلقة**
+
+🧭 **حسب الاتجاه:**
+{format_performance_rows(by_direction)}
+💰 **أفضل الرموز (3 إشارات على الأقل):**
+{format_performance_rows(by_symbol)}
+📅 **آخر الأشهر:**
+{format_performance_rows(by_month)}
+⏰ **آخر تحديث:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"""
+        
+        await callback.message.edit_text(
+            performance_message,
+            reply_markup=get_back_keyboard(),
+            parse_mode="Markdown"
+        )
+        
+    except Exception as e:
+        logger.error(f"خطأ في عرض أداء الإشارات: {e}")
+        await callback.answer("حدث خطأ في جلب أداء الإشارات", show_alert=True)
+
 @admin_router.callback_query(F.data == "admin_users")
 async def show_user_management(callback: CallbackQuery):
     """عرض إدارة المستخدمين"""
@@ -505,7 +556,7 @@ async def confirm_broadcast(callback: CallbackQuery, state: FSMContext):
                     broadcast_message,
                     parse_mode="Markdown"
                 )
-                await db_manager.log_sent_message(target_user_id, "broadcast", broadcast_message, True)
+                sent_message_writer.log(target_user_id, "broadcast", broadcast_message, True)
                 sent_count += 1
                 
                 # تأخير قصير لتجنب حد المعدل
@@ -513,7 +564,7 @@ async def confirm_broadcast(callback: CallbackQuery, state: FSMContext):
                 
             except Exception as e:
                 logger.error(f"فشل في إرسال الرسالة للمستخدم {target_user_id}: {e}")
-                await db_manager.log_sent_message(target_user_id, "broadcast", broadcast_message, False)
+                sent_message_writer.log(target_user_id, "broadcast", broadcast_message, False)
                 failed_count += 1
         
         # تقرير النتائج
@@ -682,6 +733,27 @@ async def quick_users_count(message: Message):
         logger.error(f"خطأ في عدد المستخدمين السريع: {e}")
         await message.answer("حدث خطأ")
 
+@admin_router.message(Command("vacuum"))
+async def vacuum_database(message: Message):
+    """تفعيل التفريغ التدريجي لقاعدة بيانات قديمة (VACUUM كامل لمرة واحدة)"""
+    try:
+        user_id = message.from_user.id
+        
+        if user_id != ADMIN_USER_ID:
+            await message.answer(MESSAGES["admin_only"])
+            return
+        
+        await message.answer("⏳ جاري إعادة كتابة قاعدة البيانات، قد يستغرق ذلك بعض الوقت...")
+        
+        if await db_manager.enable_incremental_vacuum():
+            await message.answer("✅ التفريغ التدريجي مفعل، وستُرجع الأرشفة الدورية المساحة الفارغة")
+        else:
+            await message.answer("❌ فشل في تفعيل التفريغ التدريجي")
+        
+    except Exception as e:
+        logger.error(f"خطأ في تفعيل التفريغ التدريجي: {e}")
+        await message.answer("حدث خطأ")
+
 @admin_router.callback_query(F.data == "admin_monitoring")
 async def show_system_monitoring(callback: CallbackQuery):
     """عرض مراقبة النظام"""
@@ -49,6 +49,40 @@ class BinanceAPIClient:
             logger.error(f"خطأ في الحصول على السعر الحالي لـ {symbol}: {e}")
             return None
     
+    async def get_current_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        الحصول على الأسعار الحالية لعدة رموز في طلب واحد
+        
+        Returns:
+            قاموس {الرمز كما طُلب: السعر}، والرموز غير المعروفة لا تظهر فيه
+        """
+        try:
+            if not self.exchange:
+                await self.init_client()
+            
+            await self.exchange.load_markets()
+            
+            # تحويل BTCUSDT إلى الصيغة الموحدة BTC/USDT
+            unified = {}
+            for symbol in set(symbols):
+                try:
+                    unified[self.exchange.market(symbol)['symbol']] = symbol
+                except Exception:
+                    logger.warning(f"رمز غير معروف في Binance: {symbol}")
+            
+            if not unified:
+                return {}
+            
+            tickers = await self.exchange.fetch_tickers(list(unified))
+            return {
+                unified[market_symbol]: float(ticker['last'])
+                for market_symbol, ticker in tickers.items()
+                if market_symbol in unified and ticker.get('last') is not None
+            }
+        except Exception as e:
+            logger.error(f"خطأ في الحصول على الأسعار الحالية لـ {len(symbols)} رمز: {e}")
+            return {}
+    
     async def get_24h_stats(self, symbol: str) -> Optional[Dict]:
         """إحصائيات 24 ساعة"""
         try:
@@ -69,13 +103,13 @@ class BinanceAPIClient:
             logger.error(f"خطأ في الحصول على إحصائيات 24 ساعة لـ {symbol}: {e}")
             return None
     
-    async def get_klines(self, symbol: str, interval: str = '1d', limit: int = 30) -> Optional[List]:
-        """الحصول على بيانات الشموع"""
+    async def get_klines(self, symbol: str, interval: str = '1d', limit: int = 30, since: int = None) -> Optional[List]:
+        """الحصول على بيانات الشموع (since بالمللي ثانية لبدء الجلب من تاريخ محدد)"""
         try:
             if not self.exchange:
                 await self.init_client()
             
-            ohlcv = await self.exchange.fetch_ohlcv(symbol, interval, limit=limit)
+            ohlcv = await self.exchange.fetch_ohlcv(symbol, interval, since=since, limit=limit)
             return ohlcv
         except Exception as e:
             logger.error(f"خطأ في الحصول على بيانات الشموع لـ {symbol}: {e}")
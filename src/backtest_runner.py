@@ -0,0 +1,212 @@
+"""
+تشغيل الاختبار الرجعي بالتوازي على عدة عمليات
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backtester import Backtester, backtester, simulate_signal, summarize_results, TS
+from config.config import BACKTEST_WORKERS, BACKTEST_CHUNK_SIZE, BACKTEST_VARIANTS
+
+logger = logging.getLogger(__name__)
+
+# متغير اختبار: (قاعدة الدخول، نسب جني الأرباح)
+Variant = Tuple[str, Optional[Sequence[float]]]
+
+# دالة تقدم: (المهام المنتهية، إجمالي المهام، النتائج حتى الآن لكل متغير)
+ProgressCallback = Callable[[int, int, Dict[str, List[Dict]]], Awaitable[None]]
+
+
+def run_backtest_job(
+    candles_path: str,
+    signals: List[Dict],
+    variants: Dict[str, Variant],
+    max_bars: int
+) -> Dict[str, List[Dict]]:
+    """
+    مهمة عملية فرعية: محاكاة مجموعة إشارات لرمز واحد بكل المتغيرات
+
+    الشموع تُفتح من ملف .npy بـ mmap فتتشارك العمليات صفحات الملف
+    بدلاً من نسخ المصفوفة إلى كل عملية.
+    """
+    if Path(candles_path).exists():
+        candles = np.load(candles_path, mmap_mode='r')
+    else:
+        candles = np.empty((0, 6))
+    timestamps = np.ascontiguousarray(candles[:, TS])
+
+    return {
+        name: [
+            simulate_signal(signal, candles, fill_rule, tp_weights, max_bars, timestamps)
+            for signal in signals
+        ]
+        for name, (fill_rule, tp_weights) in variants.items()
+    }
+
+
+class ParallelBacktestRunner:
+    """توزيع الاختبار الرجعي على ProcessPoolExecutor حسب الرمز"""
+
+    def __init__(
+        self,
+        engine: Backtester = backtester,
+        workers: int = BACKTEST_WORKERS,
+        chunk_size: int = BACKTEST_CHUNK_SIZE
+    ):
+        self.engine = engine
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.running = False
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _split_jobs(self, by_symbol: Dict[str, List[Dict]]) -> List[Tuple[str, List[Dict]]]:
+        """تقسيم إشارات كل رمز إلى مهام، الأكبر أولاً لتوازن الحمل بين العمليات"""
+        jobs = []
+        for symbol, signals in by_symbol.items():
+            for start in range(0, len(signals), self.chunk_size):
+                jobs.append((symbol, signals[start:start + self.chunk_size]))
+        jobs.sort(key=lambda job: len(job[1]), reverse=True)
+        return jobs
+
+    async def run_jobs(
+        self,
+        by_symbol: Dict[str, List[Dict]],
+        variants: Dict[str, Variant] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Dict]:
+        """
+        تشغيل المهام على العمليات وتجميع النتائج عند انتهاء كل مهمة
+
+        إشارات المهمة التي تفشل لا تدخل في النتائج، ويُسجل عددها وعدد
+        المهام الفاشلة في ملخص كل متغير (failed_signals و failed_jobs).
+        """
+        variants = variants or BACKTEST_VARIANTS
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        async def run_job(symbol: str, signals: List[Dict]) -> Tuple[int, Optional[Dict[str, List[Dict]]]]:
+            try:
+                return len(signals), await loop.run_in_executor(
+                    executor, run_backtest_job,
+                    str(self.engine.store.path(symbol, self.engine.interval)),
+                    signals, variants, self.engine.max_bars
+                )
+            except Exception as e:
+                logger.error(f"خطأ في مهمة الاختبار الرجعي ({symbol}، {len(signals)} إشارة): {e}")
+                return len(signals), None
+
+        futures = [run_job(symbol, signals) for symbol, signals in self._split_jobs(by_symbol)]
+
+        results: Dict[str, List[Dict]] = {name: [] for name in variants}
+        failed_jobs = 0
+        failed_signals = 0
+        done = 0
+        for future in asyncio.as_completed(futures):
+            signal_count, job_results = await future
+            if job_results is None:
+                failed_jobs += 1
+                failed_signals += signal_count
+                job_results = {}
+
+            for name, items in job_results.items():
+                results[name].extend(items)
+            done += 1
+
+            if on_progress:
+                await on_progress(done, len(futures), results)
+
+        reports = {}
+        for name, items in results.items():
+            summary = summarize_results(items)
+            summary['failed_jobs'] = failed_jobs
+            summary['failed_signals'] = failed_signals
+            reports[name] = {'summary': summary, 'results': items}
+        return reports
+
+    async def run(
+        self,
+        client,
+        days: int = None,
+        symbol: str = None,
+        variants: Dict[str, Variant] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Optional[Dict[str, Dict]]:
+        """
+        اختبار رجعي كامل بكل المتغيرات دون حجب حلقة الأحداث
+
+        Returns:
+            {اسم المتغير: {'summary', 'results'}} أو None إذا كان اختبار آخر قيد التشغيل
+        """
+        if self.running:
+            return None
+
+        self.running = True
+        try:
+            by_symbol = await self.engine.load_signals(days, symbol)
+            await self.engine.prepare_candles(client, by_symbol)
+            reports = await self.run_jobs(by_symbol, variants, on_progress)
+
+            logger.info(f"تم الاختبار الرجعي المتوازي لـ {len(by_symbol)} رمز على {self.workers} عملية")
+            return reports
+        finally:
+            self.running = False
+
+    def format_progress(self, done: int, total: int, results: Dict[str, List[Dict]]) -> str:
+        """رسالة التقدم مع النتائج الجزئية"""
+        message = f"⏳ **الاختبار الرجعي قيد التشغيل:** {done}/{total} مهمة\n"
+        for name, items in results.items():
+            summary = summarize_results(items)
+            message += (
+                f"\n• `{name}`: {summary['closed']} مغلقة، "
+                f"فوز {summary['win_rate']:.1f}%، توقع {summary['expectancy']:+.2f}R"
+            )
+        return message
+
+    def format_report(self, reports: Dict[str, Dict]) -> str:
+        """مقارنة متغيرات الاختبار الرجعي"""
+        if not reports or not any(
+            report['summary']['total'] or report['summary'].get('failed_signals')
+            for report in reports.values()
+        ):
+            return "📭 لا توجد إشارات للاختبار الرجعي"
+
+        first = next(iter(reports.values()))['summary']
+        failed_signals = first.get('failed_signals', 0)
+        message = f"""🧪 **نتائج الاختبار الرجعي**
+
+📊 الإشارات: {first['total'] + failed_signals} (بدون بيانات: {first['no_data']}، فشل اختبارها: {failed_signals})
+"""
+        if failed_signals:
+            message += (
+                f"⚠️ فشلت {first['failed_jobs']} مهمة، والنسب التالية محسوبة على "
+                f"{first['total']} إشارة فقط\n"
+            )
+        for name, report in reports.items():
+            summary = report['summary']
+            message += f"""
+**{name}**
+• تم الدخول: {summary['filled']}، مغلقة: {summary['closed']}
+• نسبة الفوز: {summary['win_rate']:.1f}%
+• التوقع: {summary['expectancy']:+.2f}R، الإجمالي: {summary['total_r']:+.2f}R
+• متوسط أقصى تراجع: {summary['avg_drawdown_percent']:.2f}%
+"""
+        return message
+
+    def close(self):
+        """إيقاف عمليات الاختبار"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+# إنشاء مثيل عام
+backtest_runner = ParallelBacktestRunner()
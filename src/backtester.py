@@ -0,0 +1,363 @@
+"""
+الاختبار الرجعي للإشارات المخزنة على بيانات الشموع التاريخية
+"""
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .database import db_manager
+from config.config import CANDLES_DIR, BACKTEST_INTERVAL, BACKTEST_MAX_BARS
+
+logger = logging.getLogger(__name__)
+
+# أعمدة مصفوفة الشموع (نفس ترتيب fetch_ohlcv)
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+# أقصى عدد شموع في طلب واحد من Binance
+KLINES_PAGE_SIZE = 1000
+
+# قواعد تنفيذ الدخول
+FILL_RULES = ('limit', 'mid', 'market')
+
+# حالات نتيجة الإشارة
+CLOSED_STATUSES = ('target', 'stopped')
+FILLED_STATUSES = ('target', 'stopped', 'open')
+
+
+def created_timestamp(created_date: str) -> int:
+    """تحويل created_date من SQLite (توقيت UTC) إلى مللي ثانية"""
+    moment = datetime.strptime(created_date[:19], '%Y-%m-%d %H:%M:%S')
+    return int(moment.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def simulate_signal(
+    signal: Dict,
+    candles: np.ndarray,
+    fill_rule: str = 'limit',
+    tp_weights: Optional[Sequence[float]] = None,
+    max_bars: int = BACKTEST_MAX_BARS,
+    timestamps: Optional[np.ndarray] = None
+) -> Dict:
+    """
+    محاكاة إشارة واحدة على نافذة الشموع التي تلي نشرها
+
+    Args:
+        signal: الإشارة مع created_ts بالمللي ثانية
+        candles: مصفوفة شموع الرمز مرتبة زمنياً
+        fill_rule: limit (حد نطاق الدخول)، mid (منتصف النطاق)، market (افتتاح أول شمعة)
+        tp_weights: نسب إغلاق المركز عند كل هدف (افتراضياً بالتساوي)
+        max_bars: أقصى عدد شموع لمتابعة الإشارة
+        timestamps: عمود أوقات الشموع متصلاً في الذاكرة (يُحسب مرة لكل رمز)
+
+    عند وصول الشمعة نفسها إلى الهدف ووقف الخسارة يُفترض ضرب الوقف أولاً.
+    """
+    result = {
+        'signal_id': signal['id'],
+        'symbol': signal['symbol'],
+        'direction': signal['direction'],
+        'status': 'no_data',
+        'entry_price': None,
+        'exit_price': None,
+        'targets_hit': 0,
+        'r_multiple': None,
+        'max_drawdown_percent': None,
+        'max_profit_percent': None,
+        'hours_to_first_target': None,
+        'hours_in_trade': None
+    }
+
+    if timestamps is None:
+        timestamps = candles[:, TS]
+    start = int(np.searchsorted(timestamps, signal['created_ts'], side='left'))
+    window = candles[start:start + max_bars]
+    if not len(window):
+        return result
+
+    buy = signal['direction'] == 'BUY'
+    side = 1.0 if buy else -1.0
+    favorable = window[:, HIGH] if buy else window[:, LOW]
+    adverse = window[:, LOW] if buy else window[:, HIGH]
+
+    entry_min = signal['entry_price_min']
+    entry_max = signal['entry_price_max'] or entry_min
+    stop_loss = signal['stop_loss']
+
+    # تحديد شمعة وسعر الدخول
+    if fill_rule == 'market':
+        fill_index = 0
+        entry = float(window[0, OPEN])
+    else:
+        if fill_rule == 'mid':
+            entry = (entry_min + entry_max) / 2
+        else:
+            entry = float(entry_max if buy else entry_min)
+
+        touched = side * (adverse - entry) <= 0
+        if not touched.any():
+            result['status'] = 'no_fill'
+            return result
+        fill_index = int(touched.argmax())
+
+        # فجوة سعرية تجاوزت حد الدخول: التنفيذ بسعر الافتتاح
+        open_price = float(window[fill_index, OPEN])
+        if side * (open_price - entry) < 0:
+            entry = open_price
+
+    risk = side * (entry - stop_loss)
+    if risk <= 0:
+        result['status'] = 'invalid'
+        return result
+
+    trade = window[fill_index:]
+    favorable = favorable[fill_index:]
+    adverse = adverse[fill_index:]
+    bars = len(trade)
+
+    stop_bars = np.flatnonzero(side * (adverse - stop_loss) <= 0)
+    stop_index = int(stop_bars[0]) if len(stop_bars) else bars
+
+    # الأهداف من الأقرب إلى الأبعد، مع تجاهل الأهداف الواقعة خلف سعر الدخول
+    targets = np.asarray(signal.get('targets') or [], dtype=float)
+    targets = targets[side * (targets - entry) > 0]
+    targets = targets[np.argsort(side * targets)]
+
+    if len(targets):
+        weights = np.ones(len(targets)) if tp_weights is None else np.zeros(len(targets))
+        if tp_weights is not None:
+            count = min(len(tp_weights), len(targets))
+            weights[:count] = tp_weights[:count]
+        if weights.sum() <= 0:
+            weights[-1] = 1.0
+        weights = weights / weights.sum()
+
+        # أول شمعة يصل فيها السعر إلى كل هدف
+        reached = side * (favorable[None, :] - targets[:, None]) >= 0
+        target_index = np.where(reached.any(axis=1), reached.argmax(axis=1), bars)
+
+        # المركز يُغلق بالكامل عند آخر هدف له وزن
+        closing_target = int(np.flatnonzero(weights > 0)[-1])
+        fully_closed = target_index[closing_target] < stop_index
+    else:
+        weights = np.zeros(0)
+        target_index = np.zeros(0, dtype=np.int64)
+        fully_closed = False
+
+    if fully_closed:
+        status = 'target'
+        exit_index = int(target_index[closing_target])
+        hit = target_index <= exit_index
+        exit_price = float(targets[closing_target])
+        remaining = 0.0
+        exit_r = 0.0
+    else:
+        hit = target_index < stop_index
+        remaining = 1.0 - float(weights[hit].sum())
+        if stop_index < bars:
+            status = 'stopped'
+            exit_index = stop_index
+            exit_price = float(stop_loss)
+            exit_r = -1.0
+        else:
+            status = 'open'
+            exit_index = bars - 1
+            exit_price = float(trade[-1, CLOSE])
+            exit_r = side * (exit_price - entry) / risk
+
+    realized_r = float((weights[hit] * side * (targets[hit] - entry) / risk).sum()) if len(targets) else 0.0
+
+    result.update({
+        'status': status,
+        'entry_price': entry,
+        'exit_price': exit_price,
+        'targets_hit': int(hit.sum()),
+        'r_multiple': realized_r + remaining * exit_r,
+        'max_drawdown_percent': max(0.0, float((side * (entry - adverse[:exit_index + 1])).max()) / entry * 100),
+        'max_profit_percent': max(0.0, float((side * (favorable[:exit_index + 1] - entry)).max()) / entry * 100),
+        'hours_in_trade': float(trade[exit_index, TS] - trade[0, TS]) / 3_600_000
+    })
+    if hit.any():
+        result['hours_to_first_target'] = float(trade[int(target_index[0]), TS] - trade[0, TS]) / 3_600_000
+
+    return result
+
+
+def summarize_results(results: List[Dict]) -> Dict:
+    """تجميع نتائج الإشارات إلى نسبة فوز وتوقع رياضي"""
+    closed = [r for r in results if r['status'] in CLOSED_STATUSES]
+    filled = [r for r in results if r['status'] in FILLED_STATUSES]
+    r_values = np.array([r['r_multiple'] for r in closed], dtype=float)
+    wins = r_values[r_values > 0]
+    losses = r_values[r_values <= 0]
+    to_target = [r['hours_to_first_target'] for r in filled if r['hours_to_first_target'] is not None]
+
+    return {
+        'total': len(results),
+        'filled': len(filled),
+        'closed': len(closed),
+        'open': len(filled) - len(closed),
+        'no_fill': sum(1 for r in results if r['status'] == 'no_fill'),
+        'no_data': sum(1 for r in results if r['status'] in ('no_data', 'invalid')),
+        'win_rate': len(wins) / len(closed) * 100 if closed else 0.0,
+        'expectancy': float(r_values.mean()) if len(r_values) else 0.0,
+        'total_r': float(r_values.sum()),
+        'avg_win_r': float(wins.mean()) if len(wins) else 0.0,
+        'avg_loss_r': float(losses.mean()) if len(losses) else 0.0,
+        'avg_drawdown_percent': float(np.mean([r['max_drawdown_percent'] for r in filled])) if filled else 0.0,
+        'avg_hours_to_target': float(np.mean(to_target)) if to_target else None,
+        'targets_hit': sum(r['targets_hit'] for r in filled)
+    }
+
+
+class CandleStore:
+    """مخزن شموع محلي: ملف .npy لكل رمز وفاصل زمني"""
+
+    def __init__(self, directory: str = CANDLES_DIR):
+        self.directory = Path(directory)
+
+    def path(self, symbol: str, interval: str) -> Path:
+        return self.directory / f"{symbol.replace('/', '')}_{interval}.npy"
+
+    def load(self, symbol: str, interval: str) -> np.ndarray:
+        """تحميل الشموع المخزنة (مصفوفة فارغة إذا لم توجد)"""
+        path = self.path(symbol, interval)
+        if not path.exists():
+            return np.empty((0, 6))
+        return np.load(path)
+
+    def save(self, symbol: str, interval: str, candles: np.ndarray):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        np.save(self.path(symbol, interval), candles)
+
+    async def _fetch_range(self, client, symbol: str, interval: str, since: int, until: int = None) -> List[List]:
+        """جلب الشموع على صفحات من since حتى until أو حتى الآن"""
+        rows = []
+        cursor = since
+        while True:
+            batch = await client.get_klines(symbol, interval, limit=KLINES_PAGE_SIZE, since=cursor)
+            if not batch:
+                break
+            rows.extend(batch)
+            cursor = int(batch[-1][TS]) + 1
+            if len(batch) < KLINES_PAGE_SIZE or (until is not None and cursor >= until):
+                break
+        return rows
+
+    async def update(self, client, symbol: str, interval: str, since: int) -> np.ndarray:
+        """استكمال الشموع الناقصة من since حتى الآن وحفظها"""
+        candles = self.load(symbol, interval)
+
+        new_rows = []
+        if not len(candles):
+            new_rows += await self._fetch_range(client, symbol, interval, since)
+        else:
+            if since < candles[0, TS]:
+                new_rows += await self._fetch_range(client, symbol, interval, since, int(candles[0, TS]))
+            new_rows += await self._fetch_range(client, symbol, interval, int(candles[-1, TS]) + 1)
+
+        if new_rows:
+            merged = np.vstack([candles, np.asarray(new_rows, dtype=float)[:, :6]])
+            _, unique_index = np.unique(merged[:, TS], return_index=True)
+            candles = merged[unique_index]
+            self.save(symbol, interval, candles)
+
+        return candles
+
+
+class Backtester:
+    """تشغيل الاختبار الرجعي على الإشارات المخزنة"""
+
+    def __init__(
+        self,
+        store: CandleStore = None,
+        interval: str = BACKTEST_INTERVAL,
+        max_bars: int = BACKTEST_MAX_BARS
+    ):
+        self.store = store or CandleStore()
+        self.interval = interval
+        self.max_bars = max_bars
+
+    async def load_signals(self, days: int = None, symbol: str = None) -> Dict[str, List[Dict]]:
+        """تحميل الإشارات وتجميعها حسب الرمز"""
+        by_symbol: Dict[str, List[Dict]] = {}
+        for signal in await db_manager.get_signals_for_backtest(days, symbol):
+            try:
+                signal['created_ts'] = created_timestamp(signal['created_date'])
+            except (TypeError, ValueError):
+                continue
+            by_symbol.setdefault(signal['symbol'], []).append(signal)
+        return by_symbol
+
+    async def prepare_candles(self, client, by_symbol: Dict[str, List[Dict]]) -> Dict[str, np.ndarray]:
+        """تحديث مخزن الشموع لكل رمز من تاريخ أقدم إشارة"""
+        candles = {}
+        for symbol, signals in by_symbol.items():
+            try:
+                since = min(signal['created_ts'] for signal in signals)
+                candles[symbol] = await self.store.update(client, symbol, self.interval, since)
+            except Exception as e:
+                logger.error(f"خطأ في تحديث شموع {symbol}: {e}")
+                candles[symbol] = self.store.load(symbol, self.interval)
+        return candles
+
+    async def run(
+        self,
+        client,
+        days: int = None,
+        symbol: str = None,
+        fill_rule: str = 'limit',
+        tp_weights: Optional[Sequence[float]] = None
+    ) -> Dict:
+        """
+        اختبار رجعي كامل: تحميل الإشارات والشموع ثم محاكاة كل إشارة
+
+        Returns:
+            {'summary': ملخص مجمع، 'results': نتيجة كل إشارة}
+        """
+        by_symbol = await self.load_signals(days, symbol)
+        candles = await self.prepare_candles(client, by_symbol)
+
+        results = []
+        for symbol_name, signals in by_symbol.items():
+            symbol_candles = candles.get(symbol_name, np.empty((0, 6)))
+            timestamps = np.ascontiguousarray(symbol_candles[:, TS])
+            for signal in signals:
+                results.append(
+                    simulate_signal(signal, symbol_candles, fill_rule, tp_weights, self.max_bars, timestamps)
+                )
+
+        logger.info(f"تم الاختبار الرجعي لـ {len(results)} إشارة على {len(by_symbol)} رمز")
+        return {'summary': summarize_results(results), 'results': results}
+
+    def format_report(self, report: Dict, title: str = "نتائج الاختبار الرجعي") -> str:
+        """تنسيق ملخص الاختبار الرجعي"""
+        summary = report['summary']
+        if not summary['total']:
+            return "📭 لا توجد إشارات للاختبار الرجعي"
+
+        message = f"""🧪 **{title}**
+
+📊 **الإشارات:**
+• الإجمالي: {summary['total']}
+• تم الدخول: {summary['filled']} (مغلقة: {summary['closed']}، مفتوحة: {summary['open']})
+• لم يتم الدخول: {summary['no_fill']}
+• بدون بيانات: {summary['no_data']}
+
+📈 **الأداء:**
+• نسبة الفوز: {summary['win_rate']:.1f}%
+• التوقع الرياضي: {summary['expectancy']:+.2f}R
+• إجمالي العائد: {summary['total_r']:+.2f}R
+• متوسط الربح: {summary['avg_win_r']:+.2f}R
+• متوسط الخسارة: {summary['avg_loss_r']:+.2f}R
+• متوسط أقصى تراجع: {summary['avg_drawdown_percent']:.2f}%
+• الأهداف المحققة: {summary['targets_hit']}"""
+
+        if summary['avg_hours_to_target'] is not None:
+            message += f"\n• متوسط الوقت للهدف الأول: {summary['avg_hours_to_target']:.1f} ساعة"
+
+        return message
+
+# إنشاء مثيل عام
+backtester = Backtester()
@@ -4,20 +4,564 @@
 import sqlite3
 import aiosqlite
 import asyncio
-from datetime import datetime
+from datetime import datetime, timezone
+import hashlib
 import json
 import logging
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional, Tuple
 
+from config.config import DB_READER_POOL_SIZE, DB_PRAGMAS, DB_CHECKPOINT_INTERVAL
+
 logger = logging.getLogger(__name__)
 
+# أخطاء سببها الصفوف نفسها (قيد أو قيمة غير صالحة) لا حالة قاعدة البيانات
+_ROW_ERRORS = (sqlite3.IntegrityError, sqlite3.InterfaceError, sqlite3.DataError, TypeError, ValueError, AttributeError)
+
+
+def _is_row_error(error: Exception) -> bool:
+    """هل رُفضت الصفوف نفسها؟ (قيمة لا يمكن ربطها تظهر كـ ProgrammingError في Python 3.11)"""
+    if isinstance(error, sqlite3.ProgrammingError):
+        return 'binding parameter' in str(error)
+    return isinstance(error, _ROW_ERRORS)
+
+# أبعاد تجميع أداء الإشارات: البعد -> تعبير القيمة من جدول signals
+_PERFORMANCE_DIMENSIONS = {
+    'symbol': "s.symbol",
+    'direction': "s.direction",
+    'month': "strftime('%Y-%m', s.created_date)",
+}
+
+# القيم المجمعة لإشارة واحدة من جدول signal_stats (st) وجدول signals (s)
+_PERFORMANCE_VALUES = """
+    1,
+    {st}.final_result = 'profit',
+    COALESCE(
+        CASE WHEN s.direction = 'BUY' THEN 1 ELSE -1 END
+        * ({st}.current_price - (s.entry_price_min + COALESCE(s.entry_price_max, s.entry_price_min)) / 2)
+        / ((s.entry_price_min + COALESCE(s.entry_price_max, s.entry_price_min)) / 2) * 100,
+        0
+    ),
+    COALESCE({st}.max_profit_percent, 0),
+    COALESCE((julianday({st}.first_target_date) - julianday(s.created_date)) * 24, 0),
+    {st}.first_target_date IS NOT NULL
+"""
+
+_PERFORMANCE_COLUMNS = (
+    "dimension, bucket, total, wins, result_sum, max_profit_sum, target_hours_sum, target_count"
+)
+
+_PERFORMANCE_UPSERT = """
+    ON CONFLICT(dimension, bucket) DO UPDATE SET
+        total = total + excluded.total,
+        wins = wins + excluded.wins,
+        result_sum = result_sum + excluded.result_sum,
+        max_profit_sum = max_profit_sum + excluded.max_profit_sum,
+        target_hours_sum = target_hours_sum + excluded.target_hours_sum,
+        target_count = target_count + excluded.target_count
+"""
+
+
+# عدادات stats_counters: الاسم -> (الجدول، قيمة الصف، العمود الذي يغيرها عند التحديث)
+_STATS_COUNTERS = {
+    'total_users': ('users', "1", None),
+    'allowed_users': ('allowed_users', "1", None),
+    'premium_users': ('allowed_users', "{row}.is_premium IS 1", 'is_premium'),
+    'total_signals': ('signals', "1", None),
+    'active_signals': ('signals', "{row}.is_active IS 1", 'is_active'),
+    'total_sent_messages': ('sent_messages', "1", None),
+    'successful_sent_messages': ('sent_messages', "{row}.is_successful IS 1", None),
+}
+
+# مقاييس daily_stats: المقياس -> (الجدول، قيمة الصف، عمود التاريخ)
+_DAILY_METRICS = {
+    'new_users': ('users', "1", 'join_date'),
+    # الإشارات المستوردة من قنوات أخرى ليست إشارات نشرها البوت
+    'signals': ('signals', "{row}.status IS NOT 'imported'", 'created_date'),
+    'sent_messages': ('sent_messages', "1", 'sent_date'),
+    'successful_messages': ('sent_messages', "{row}.is_successful IS 1", 'sent_date'),
+}
+
+# جداول سجل تاريخي: حذف صفوفها (الأرشفة) لا ينقص العدادات ولا المجاميع اليومية
+_HISTORY_TABLES = {'sent_messages'}
+
+
+def _daily_upsert(metric: str, value: str, date_column: str, row: str) -> str:
+    return f"""
+        INSERT INTO daily_stats (metric, day, value)
+        VALUES ('{metric}', COALESCE(date({row}.{date_column}), date('now')), {value})
+        ON CONFLICT(metric, day) DO UPDATE SET value = value + excluded.value;
+    """
+
+
+def _stats_table_triggers(table: str) -> List[str]:
+    """محفزات الإدراج والحذف التي تحدّث عدادات جدول واحد ومجاميعه اليومية"""
+    statements = []
+    events = [('insert', 'INSERT', 'NEW', '+')]
+    if table not in _HISTORY_TABLES:
+        events.append(('delete', 'DELETE', 'OLD', '-'))
+
+    for suffix, event, row, sign in events:
+        body = "".join(
+            f"UPDATE stats_counters SET value = value {sign} ({value.format(row=row)}) WHERE name = '{name}';"
+            for name, (counter_table, value, _) in _STATS_COUNTERS.items() if counter_table == table
+        )
+        body += "".join(
+            _daily_upsert(metric, f"{sign}({value.format(row=row)})", date_column, row)
+            for metric, (metric_table, value, date_column) in _DAILY_METRICS.items() if metric_table == table
+        )
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS stats_{table}_on_{suffix}
+            AFTER {event} ON {table}
+            BEGIN {body} END
+        """)
+
+    return statements
+
+
+def _stats_migration() -> List[str]:
+    """
+    جداول العدادات والمجاميع اليومية مع محفزات تحدّثها وبنائها من البيانات الحالية
+
+    شاشات الإحصائيات تقرأ صفوفاً قليلة جاهزة بدلاً من COUNT(*) على جداول
+    تكبر مع الوقت.
+    """
+    statements = [
+        """
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS daily_stats (
+                metric TEXT NOT NULL,
+                day TEXT NOT NULL,
+                value INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (metric, day)
+            ) WITHOUT ROWID
+        """,
+    ]
+
+    for name, (table, value, _) in _STATS_COUNTERS.items():
+        statements.append(f"""
+            INSERT OR REPLACE INTO stats_counters (name, value)
+            SELECT '{name}', COALESCE(SUM({value.format(row=table)}), 0) FROM {table}
+        """)
+    for metric, (table, value, date_column) in _DAILY_METRICS.items():
+        statements.append(f"""
+            INSERT OR REPLACE INTO daily_stats (metric, day, value)
+            SELECT '{metric}', COALESCE(date({date_column}), date('now')), SUM({value.format(row=table)})
+            FROM {table} GROUP BY 2
+        """)
+
+    tables = sorted({table for table, _, _ in list(_STATS_COUNTERS.values()) + list(_DAILY_METRICS.values())})
+    for table in tables:
+        statements.extend(_stats_table_triggers(table))
+
+    # العدادات التي تتغير بتحديث عمود (تفعيل الإشارة، الاشتراك المميز)
+    for name, (table, value, column) in _STATS_COUNTERS.items():
+        if column:
+            statements.append(f"""
+                CREATE TRIGGER IF NOT EXISTS stats_{name}_on_update
+                AFTER UPDATE OF {column} ON {table}
+                BEGIN
+                    UPDATE stats_counters
+                    SET value = value + ({value.format(row='NEW')}) - ({value.format(row='OLD')})
+                    WHERE name = '{name}';
+                END
+            """)
+
+    return statements
+
+
+def _hourly_upsert(metric: str, hour: str) -> str:
+    return f"""
+        INSERT INTO hourly_stats (metric, hour, value) VALUES ('{metric}', {hour}, 1)
+        ON CONFLICT(metric, hour) DO UPDATE SET value = value + 1;
+    """
+
+
+def _activity_migration() -> List[str]:
+    """
+    مجاميع الساعات ونشاط المستخدمين اليومي لتقارير المراقبة
+
+    last_activity لا يتراجع، فانتقاله إلى ساعة (أو يوم) جديدة يعني أول نشاط
+    للمستخدم فيها، فيُحتسب المستخدمون النشطون دون جدول لكل مستخدم ويوم.
+    الساعات بصيغة 'YYYY-MM-DD HH:00' بتوقيت UTC مثل بقية تواريخ القاعدة.
+    """
+    new_hour = "strftime('%Y-%m-%d %H:00', NEW.last_activity)"
+    return [
+        """
+            CREATE TABLE IF NOT EXISTS hourly_stats (
+                metric TEXT NOT NULL,
+                hour TEXT NOT NULL,
+                value INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (metric, hour)
+            ) WITHOUT ROWID
+        """,
+        # آخر نشاط معروف لكل مستخدم هو كل ما يتوفر من النشاط السابق
+        """
+            INSERT OR REPLACE INTO hourly_stats (metric, hour, value)
+            SELECT 'active_users', strftime('%Y-%m-%d %H:00', last_activity), COUNT(*)
+            FROM users WHERE last_activity IS NOT NULL GROUP BY 2
+        """,
+        """
+            INSERT OR REPLACE INTO daily_stats (metric, day, value)
+            SELECT 'active_users', date(last_activity), COUNT(*)
+            FROM users WHERE last_activity IS NOT NULL GROUP BY 2
+        """,
+        """
+            INSERT OR REPLACE INTO hourly_stats (metric, hour, value)
+            SELECT 'sent_messages', COALESCE(strftime('%Y-%m-%d %H:00', sent_date), strftime('%Y-%m-%d %H:00', 'now')), COUNT(*)
+            FROM sent_messages GROUP BY 2
+        """,
+        f"""
+            CREATE TRIGGER IF NOT EXISTS activity_on_user_insert
+            AFTER INSERT ON users
+            WHEN NEW.last_activity IS NOT NULL
+            BEGIN
+                {_hourly_upsert('active_users', new_hour)}
+                {_daily_upsert('active_users', '1', 'last_activity', 'NEW')}
+            END
+        """,
+        f"""
+            CREATE TRIGGER IF NOT EXISTS activity_on_user_update
+            AFTER UPDATE OF last_activity ON users
+            WHEN NEW.last_activity > COALESCE(OLD.last_activity, '')
+                AND {new_hour} IS NOT strftime('%Y-%m-%d %H:00', OLD.last_activity)
+            BEGIN
+                {_hourly_upsert('active_users', new_hour)}
+                INSERT INTO daily_stats (metric, day, value)
+                SELECT 'active_users', date(NEW.last_activity), 1
+                WHERE date(NEW.last_activity) IS NOT date(OLD.last_activity)
+                ON CONFLICT(metric, day) DO UPDATE SET value = value + 1;
+            END
+        """,
+        f"""
+            CREATE TRIGGER IF NOT EXISTS stats_sent_messages_hourly
+            AFTER INSERT ON sent_messages
+            BEGIN
+                {_hourly_upsert('sent_messages', "COALESCE(strftime('%Y-%m-%d %H:00', NEW.sent_date), strftime('%Y-%m-%d %H:00', 'now'))")}
+            END
+        """,
+    ]
+
+
+def message_body_hash(body: str) -> str:
+    """مفتاح نص الرسالة في message_bodies (متاح في الترحيلات كدالة SQL باسم sha256)"""
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+# نصوص الرسائل المرسلة تُخزن مرة واحدة ويشير إليها كل سجل إرسال
+_MESSAGE_BODIES_MIGRATION = [
+    """
+        CREATE TABLE IF NOT EXISTS message_bodies (
+            id INTEGER PRIMARY KEY,
+            body_hash TEXT NOT NULL UNIQUE,
+            body TEXT NOT NULL
+        )
+    """,
+    "ALTER TABLE sent_messages ADD COLUMN body_id INTEGER REFERENCES message_bodies (id)",
+    # نقل السجل الحالي: كل نص مختلف يُخزن مرة ثم يُفرّغ عمود النص في سجلات الإرسال
+    """
+        INSERT OR IGNORE INTO message_bodies (body_hash, body)
+        SELECT sha256(message_text), message_text FROM sent_messages WHERE message_text IS NOT NULL
+    """,
+    """
+        UPDATE sent_messages
+        SET body_id = (SELECT id FROM message_bodies WHERE body_hash = sha256(sent_messages.message_text)),
+            message_text = NULL
+        WHERE message_text IS NOT NULL
+    """,
+    # سجلات الإرسال مع نصوصها كما كان الجدول سابقاً
+    """
+        CREATE VIEW IF NOT EXISTS sent_messages_full AS
+        SELECT sm.id, sm.user_id, sm.message_type, COALESCE(mb.body, sm.message_text) AS message_text,
+               sm.sent_date, sm.is_successful
+        FROM sent_messages sm LEFT JOIN message_bodies mb ON mb.id = sm.body_id
+    """,
+]
+
+
+def _performance_triggers() -> List[str]:
+    """
+    محفزات تضيف الإشارة إلى signal_performance لحظة إغلاقها
+
+    الإشارة تُحتسب مرة واحدة عند انتقال final_result من pending (أو لا شيء)
+    إلى profit/loss، سواء أُدرج صفها مغلقاً أو حُدّث لاحقاً.
+    """
+    statements = []
+    for dimension, bucket in _PERFORMANCE_DIMENSIONS.items():
+        statements.append(f"""
+            INSERT INTO signal_performance ({_PERFORMANCE_COLUMNS})
+            SELECT '{dimension}', {bucket}, {_PERFORMANCE_VALUES.format(st='NEW')}
+            FROM signals s WHERE s.id = NEW.signal_id
+            {_PERFORMANCE_UPSERT};
+        """)
+    body = "".join(statements)
+
+    return [
+        f"""
+            CREATE TRIGGER IF NOT EXISTS signal_performance_on_insert
+            AFTER INSERT ON signal_stats
+            WHEN NEW.final_result IN ('profit', 'loss')
+            BEGIN {body} END
+        """,
+        f"""
+            CREATE TRIGGER IF NOT EXISTS signal_performance_on_update
+            AFTER UPDATE OF final_result ON signal_stats
+            WHEN NEW.final_result IN ('profit', 'loss')
+                AND COALESCE(OLD.final_result, 'pending') NOT IN ('profit', 'loss')
+            BEGIN {body} END
+        """,
+    ]
+
+
+def _performance_migration() -> List[str]:
+    """
+    جدول أداء الإشارات المجمع ومحفزاته وبناؤه من الإشارات المغلقة
+
+    بصمة المحتوى وتوقيت أول هدف يُضافان هنا أيضاً لأن الأداء وكشف
+    التكرار يعتمدان عليهما.
+    """
+    statements = [
+        "ALTER TABLE signals ADD COLUMN content_hash TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_signals_content_hash ON signals (content_hash)",
+        "ALTER TABLE signal_stats ADD COLUMN first_target_date TIMESTAMP",
+        """
+            CREATE TABLE IF NOT EXISTS signal_performance (
+                dimension TEXT NOT NULL,  -- symbol, direction, month
+                bucket TEXT NOT NULL,
+                total INTEGER DEFAULT 0,
+                wins INTEGER DEFAULT 0,
+                result_sum REAL DEFAULT 0,  -- مجموع نسب الربح/الخسارة عند الإغلاق
+                max_profit_sum REAL DEFAULT 0,
+                target_hours_sum REAL DEFAULT 0,
+                target_count INTEGER DEFAULT 0,
+                PRIMARY KEY (dimension, bucket)
+            )
+        """,
+        *_performance_triggers(),
+        "DELETE FROM signal_performance",
+    ]
+    for dimension, bucket in _PERFORMANCE_DIMENSIONS.items():
+        statements.append(f"""
+            INSERT INTO signal_performance ({_PERFORMANCE_COLUMNS})
+            SELECT '{dimension}', {bucket}, {_PERFORMANCE_VALUES.format(st='st')}
+            FROM signals s
+            JOIN signal_stats st ON st.signal_id = s.id
+            WHERE st.final_result IN ('profit', 'loss')
+            {_PERFORMANCE_UPSERT}
+        """)
+    return statements
+
+
+# ترحيلات المخطط بالترتيب: العنصر رقم N يرفع PRAGMA user_version إلى N
+_MIGRATIONS: List[List[str]] = [
+    # 1: فهارس الاستعلامات المتكررة (الإحصائيات، آخر إشارة، تتبع الإشارات، المراقبة)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_signals_created_date ON signals (created_date)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_active_created ON signals (is_active, created_date)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_status ON signals (status)",
+        "CREATE INDEX IF NOT EXISTS idx_users_last_activity ON users (last_activity)",
+        "CREATE INDEX IF NOT EXISTS idx_sent_messages_sent_date ON sent_messages (sent_date, is_successful)",
+    ],
+    # 2: عدادات الإحصائيات والمجاميع اليومية
+    _stats_migration(),
+    # 3: مجاميع الساعات والمستخدمون النشطون يومياً
+    _activity_migration(),
+    # 4: نصوص الرسائل المرسلة بلا تكرار
+    _MESSAGE_BODIES_MIGRATION,
+    # 5: مجاميع سجلات الإرسال المؤرشفة وفهرس لحذف النصوص غير المستخدمة
+    [
+        """
+            CREATE TABLE IF NOT EXISTS sent_messages_daily (
+                day TEXT NOT NULL,
+                message_type TEXT NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                successful INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, message_type)
+            ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sent_messages_body_id ON sent_messages (body_id)",
+    ],
+    # 6: الإشارات المستوردة لا تُحتسب في مجموع الإشارات اليومي
+    [
+        "DROP TRIGGER IF EXISTS stats_signals_on_insert",
+        "DROP TRIGGER IF EXISTS stats_signals_on_delete",
+        *_stats_table_triggers('signals'),
+        f"""
+            INSERT OR REPLACE INTO daily_stats (metric, day, value)
+            SELECT 'signals', COALESCE(date(created_date), date('now')), SUM({_DAILY_METRICS['signals'][1].format(row='signals')})
+            FROM signals GROUP BY 2
+        """,
+    ],
+    # 7: بصمة المحتوى وتوقيت أول هدف وجدول أداء الإشارات المجمع
+    _performance_migration(),
+]
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """تحويل قيمة TIMESTAMP من SQLite إلى datetime (None إذا تعذر ذلك)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/trading_bot.db"):
+    def __init__(
+        self,
+        db_path: str = "data/trading_bot.db",
+        reader_pool_size: int = DB_READER_POOL_SIZE,
+        pragmas: Dict = None
+    ):
         self.db_path = db_path
+        self.reader_pool_size = reader_pool_size
+        self.pragmas = DB_PRAGMAS if pragmas is None else pragmas
+        self.checkpoint_active = False
+        
+        # اتصالات دائمة تُفتح في init_database وتُغلق في close
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._readers: Optional[asyncio.Queue] = None
+        
+        # المستخدمون المصرح لهم في الذاكرة: user_id -> {'is_premium', 'premium_expires'}
+        # يُحمّل في init_database ويُحدَّث بعد كل إضافة أو إزالة ناجحة
+        self._allowed_users: Optional[Dict[int, Dict]] = None
+        
+        # وضع auto_vacuum يُقرأ مرة واحدة في init_database ويُحدَّث بعد التحويل
+        self.incremental_vacuum_enabled = False
+    
+    async def _open_connection(self) -> aiosqlite.Connection:
+        """
+        اتصال دائم بخيط خلفي لا يمنع خروج البرنامج إذا لم يُستدعَ close
+        
+        يُطبق عليه ملف الأداء (DB_PRAGMAS) مرة واحدة عند فتحه.
+        """
+        connection = aiosqlite.connect(self.db_path)
+        connection.daemon = True
+        db = await connection
+        for name, value in self.pragmas.items():
+            await db.execute(f"PRAGMA {name} = {value}")
+        return db
+    
+    async def connect(self):
+        """فتح اتصال الكتابة الدائم ومجموعة اتصالات القراءة"""
+        if self._writer is not None:
+            return
+        
+        writer = await self._open_connection()
+        
+        readers = asyncio.Queue()
+        for _ in range(self.reader_pool_size):
+            reader = await self._open_connection()
+            await reader.execute("PRAGMA query_only = ON")
+            readers.put_nowait(reader)
+        
+        self._writer = writer
+        self._write_lock = asyncio.Lock()
+        self._readers = readers
+        logger.info(f"تم فتح اتصالات قاعدة البيانات (كتابة واحد، قراءة {self.reader_pool_size})")
+    
+    async def close(self):
+        """إغلاق الاتصالات الدائمة (الاتصالات المستخدمة حالياً تُغلق عند إرجاعها)"""
+        writer, readers = self._writer, self._readers
+        self._writer = None
+        self._readers = None
+        
+        if writer is not None:
+            # انتظار انتهاء الكتابة الجارية ثم تفريغ سجل WAL في ملف القاعدة
+            async with self._write_lock:
+                try:
+                    await writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except Exception as e:
+                    logger.warning(f"تعذر تفريغ سجل WAL عند الإغلاق: {e}")
+                await writer.close()
+        
+        if readers is not None:
+            while not readers.empty():
+                await readers.get_nowait().close()
+    
+    async def checkpoint(self, mode: str = "PASSIVE") -> Optional[Tuple[int, int, int]]:
+        """
+        نقل صفحات سجل WAL إلى ملف القاعدة
+        
+        Returns:
+            (مشغول، صفحات السجل، الصفحات المنقولة) أو None عند الخطأ
+        """
+        try:
+            async with self._write() as db:
+                cursor = await db.execute(f"PRAGMA wal_checkpoint({mode})")
+                return tuple(await cursor.fetchone())
+        except Exception as e:
+            logger.error(f"خطأ في نقطة تفتيش WAL: {e}")
+            return None
+    
+    async def start_checkpointing(self, interval: int = DB_CHECKPOINT_INTERVAL):
+        """نقاط تفتيش دورية حتى لا يكبر سجل WAL بين فترات الهدوء"""
+        logger.info("بدء نقاط تفتيش قاعدة البيانات الدورية...")
+        self.checkpoint_active = True
+        
+        while self.checkpoint_active:
+            await asyncio.sleep(interval)
+            if not self.checkpoint_active:
+                break
+            
+            result = await self.checkpoint()
+            if result:
+                logger.debug(f"نقطة تفتيش WAL: {result[2]}/{result[1]} صفحة")
+    
+    def stop_checkpointing(self):
+        """إيقاف نقاط التفتيش الدورية"""
+        self.checkpoint_active = False
+        logger.info("تم إيقاف نقاط تفتيش قاعدة البيانات")
+    
+    @asynccontextmanager
+    async def _write(self):
+        """
+        اتصال الكتابة الدائم لكتلة واحدة
+        
+        الكتل تُنفذ واحدة تلو الأخرى حتى لا تختلط معاملاتها، وأي معاملة لم
+        تُعتمد عند الخروج تُلغى. بدون اتصالات مفتوحة يُستخدم اتصال مؤقت.
+        """
+        if self._writer is None:
+            async with aiosqlite.connect(self.db_path) as db:
+                yield db
+            return
+        
+        async with self._write_lock:
+            db = self._writer
+            try:
+                yield db
+            finally:
+                if db.in_transaction:
+                    await db.rollback()
+    
+    @asynccontextmanager
+    async def _read(self):
+        """اتصال قراءة من المجموعة (أو اتصال مؤقت قبل فتح الاتصالات)"""
+        readers = self._readers
+        if readers is None:
+            async with aiosqlite.connect(self.db_path) as db:
+                yield db
+            return
+        
+        db = await readers.get()
+        try:
+            yield db
+        finally:
+            if self._readers is readers:
+                readers.put_nowait(db)
+            else:
+                await db.close()
         
     async def init_database(self):
-        """إنشاء الجداول الأساسية"""
-        async with aiosqlite.connect(self.db_path) as db:
+        """إنشاء الجداول الأساسية وفتح الاتصالات الدائمة"""
+        await self.connect()
+        async with self._write() as db:
             # جدول المستخدمين
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -58,7 +602,7 @@ class DatabaseManager:
                     created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     created_by INTEGER,
                     is_active INTEGER DEFAULT 1,
-                    status TEXT DEFAULT 'active'  -- active, completed, cancelled
+                    status TEXT DEFAULT 'active'  -- active, completed, cancelled, imported
                 )
             """)
             
@@ -88,6 +632,17 @@ class DatabaseManager:
                 )
             """)
             
+            # جدول متابعة المتداولين
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS followed_traders (
+                    user_id INTEGER NOT NULL,
+                    encrypted_uid TEXT NOT NULL,
+                    nickname TEXT,
+                    followed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_id, encrypted_uid)
+                )
+            """)
+            
             # جدول إعدادات النظام
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS system_settings (
@@ -97,13 +652,49 @@ class DatabaseManager:
                 )
             """)
             
+            await self._migrate(db)
+            
             await db.commit()
             logger.info("تم إنشاء قاعدة البيانات بنجاح")
+            
+            cursor = await db.execute("PRAGMA auto_vacuum")
+            self.incremental_vacuum_enabled = (await cursor.fetchone())[0] == 2
+            if not self.incremental_vacuum_enabled:
+                logger.warning("التفريغ التدريجي غير مفعل لقاعدة البيانات، استخدم /vacuum لتفعيله مرة واحدة")
+        
+        await self._load_allowed_users()
+
+    async def _migrate(self, db):
+        """تطبيق الترحيلات التي لم تُطبق بعد حسب PRAGMA user_version"""
+        cursor = await db.execute("PRAGMA user_version")
+        version = (await cursor.fetchone())[0]
+        if version < len(_MIGRATIONS):
+            await db.create_function("sha256", 1, message_body_hash, deterministic=True)
+        
+        for number, statements in enumerate(_MIGRATIONS[version:], version + 1):
+            for statement in statements:
+                try:
+                    await db.execute(statement)
+                except sqlite3.OperationalError as e:
+                    # عمود أضافته نسخة سابقة قبل نقل إضافته إلى الترحيلات
+                    if not str(e).startswith('duplicate column name'):
+                        raise
+            await db.execute(f"PRAGMA user_version = {number}")
+            logger.info(f"تم تطبيق ترحيل قاعدة البيانات رقم {number}")
+
+    async def explain_query_plan(self, query: str, params: Tuple = ()) -> List[str]:
+        """خطة تنفيذ استعلام (عمود التفاصيل من EXPLAIN QUERY PLAN)"""
+        async with self._read() as db:
+            # EXPLAIN لا يتحقق من إصدار المخطط، فقراءة sqlite_master أولاً تحمّل
+            # الفهارس التي أضافها اتصال الكتابة بعد فتح اتصال القراءة
+            await db.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+            cursor = await db.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            return [row[3] for row in await cursor.fetchall()]
 
     async def add_user(self, user_id: int, first_name: str = None, username: str = None) -> bool:
         """إضافة مستخدم جديد"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     INSERT OR IGNORE INTO users (user_id, first_name, username)
                     VALUES (?, ?, ?)
@@ -115,15 +706,36 @@ class DatabaseManager:
             logger.error(f"خطأ في إضافة المستخدم: {e}")
             return False
 
+    async def _load_allowed_users(self):
+        """تحميل المستخدمين المصرح لهم إلى الذاكرة"""
+        try:
+            async with self._read() as db:
+                cursor = await db.execute("SELECT user_id, is_premium, premium_expires FROM allowed_users")
+                rows = await cursor.fetchall()
+            
+            self._allowed_users = {
+                user_id: {'is_premium': bool(is_premium), 'premium_expires': _parse_timestamp(premium_expires)}
+                for user_id, is_premium, premium_expires in rows
+            }
+            logger.info(f"تم تحميل {len(self._allowed_users)} مستخدم مصرح له")
+        except Exception as e:
+            logger.error(f"خطأ في تحميل المستخدمين المصرح لهم: {e}")
+            self._allowed_users = None
+
     async def add_allowed_user(self, user_id: int, added_by: int = None) -> bool:
         """إضافة مستخدم إلى القائمة المصرح لها"""
+        if self._allowed_users is not None and user_id in self._allowed_users:
+            return True
+        
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     INSERT OR IGNORE INTO allowed_users (user_id, added_by)
                     VALUES (?, ?)
                 """, (user_id, added_by))
                 await db.commit()
+                if self._allowed_users is not None:
+                    self._allowed_users.setdefault(user_id, {'is_premium': False, 'premium_expires': None})
                 logger.info(f"تم إضافة المستخدم {user_id} إلى القائمة المصرح لها")
                 return True
         except Exception as e:
@@ -133,9 +745,11 @@ class DatabaseManager:
     async def remove_allowed_user(self, user_id: int) -> bool:
         """إزالة مستخدم من القائمة المصرح لها"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("DELETE FROM allowed_users WHERE user_id = ?", (user_id,))
                 await db.commit()
+                if self._allowed_users is not None:
+                    self._allowed_users.pop(user_id, None)
                 logger.info(f"تم إزالة المستخدم {user_id} من القائمة المصرح لها")
                 return True
         except Exception as e:
@@ -144,8 +758,11 @@ class DatabaseManager:
 
     async def is_user_allowed(self, user_id: int) -> bool:
         """التحقق من صلاحية المستخدم"""
+        if self._allowed_users is not None:
+            return user_id in self._allowed_users
+        
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._read() as db:
                 cursor = await db.execute("""
                     SELECT COUNT(*) FROM allowed_users 
                     WHERE user_id = ?
@@ -157,9 +774,16 @@ class DatabaseManager:
             return False
 
     async def get_allowed_users(self) -> List[int]:
-        """الحصول على قائمة المستخدمين المصرح لهم"""
+        """
+        الحصول على قائمة المستخدمين المصرح لهم
+        
+        القائمة نسخة، فالبث عليها لا يتأثر بإضافة أو إزالة مستخدمين أثناءه.
+        """
+        if self._allowed_users is not None:
+            return list(self._allowed_users)
+        
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._read() as db:
                 cursor = await db.execute("SELECT user_id FROM allowed_users")
                 results = await cursor.fetchall()
                 return [row[0] for row in results]
@@ -167,15 +791,24 @@ class DatabaseManager:
             logger.error(f"خطأ في الحصول على قائمة المستخدمين المصرح لهم: {e}")
             return []
 
+    def is_premium_user(self, user_id: int) -> bool:
+        """التحقق من اشتراك مميز ساري للمستخدم من الذاكرة"""
+        entry = (self._allowed_users or {}).get(user_id)
+        if not entry or not entry['is_premium']:
+            return False
+        expires = entry['premium_expires']
+        return expires is None or expires > datetime.now()
+
     async def save_signal(self, signal_data: Dict) -> int:
         """حفظ إشارة جديدة"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 cursor = await db.execute("""
                     INSERT INTO signals (
                         signal_text, symbol, direction, entry_price_min, entry_price_max,
-                        stop_loss, targets, support_levels, resistance_levels, created_by
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        stop_loss, targets, support_levels, resistance_levels, created_by,
+                        content_hash
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     signal_data.get('signal_text'),
                     signal_data.get('symbol'),
@@ -186,7 +819,8 @@ class DatabaseManager:
                     json.dumps(signal_data.get('targets', [])),
                     json.dumps(signal_data.get('support_levels', [])),
                     json.dumps(signal_data.get('resistance_levels', [])),
-                    signal_data.get('created_by')
+                    signal_data.get('created_by'),
+                    signal_data.get('content_hash')
                 ))
                 signal_id = cursor.lastrowid
                 await db.commit()
@@ -196,10 +830,81 @@ class DatabaseManager:
             logger.error(f"خطأ في حفظ الإشارة: {e}")
             return 0
 
+    async def save_signals_batch(self, signals: List[Dict]) -> Optional[int]:
+        """
+        حفظ إشارات مستوردة (تاريخية) في معاملة واحدة
+        
+        تُحفظ بحالة imported وغير نشطة فلا يتتبعها SignalTracker ولا تُحتسب
+        في إشارات اليوم، وبتاريخ نشرها created_date إن وُجد (وإلا NULL فلا
+        يشملها الاختبار الرجعي). الإشارة التي توجد بصمة محتواها مسبقاً تُتجاهل.
+        
+        Returns:
+            عدد الإشارات المحفوظة، أو None عند الفشل (ولا يُحفظ أي شيء جزئياً)
+        """
+        if not signals:
+            return 0
+        
+        try:
+            rows = [
+                (
+                    signal_data.get('signal_text'),
+                    signal_data.get('symbol'),
+                    signal_data.get('direction'),
+                    signal_data.get('entry_price_min'),
+                    signal_data.get('entry_price_max'),
+                    signal_data.get('stop_loss'),
+                    json.dumps(signal_data.get('targets', [])),
+                    json.dumps(signal_data.get('support_levels', [])),
+                    json.dumps(signal_data.get('resistance_levels', [])),
+                    signal_data.get('created_by'),
+                    signal_data.get('content_hash'),
+                    signal_data.get('created_date')
+                )
+                for signal_data in signals
+            ]
+            async with self._write() as db:
+                # التكرار داخل الدفعة نفسها يُكتشف أيضاً لأن كل صف يرى ما قبله
+                cursor = await db.executemany("""
+                    INSERT INTO signals (
+                        signal_text, symbol, direction, entry_price_min, entry_price_max,
+                        stop_loss, targets, support_levels, resistance_levels, created_by,
+                        content_hash, created_date, is_active, status
+                    )
+                    SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, ?11, ?12, 0, 'imported'
+                    WHERE ?11 IS NULL OR NOT EXISTS (SELECT 1 FROM signals WHERE content_hash = ?11)
+                """, rows)
+                saved = cursor.rowcount
+                await db.commit()
+                logger.info(f"تم حفظ {saved} إشارة مستوردة من {len(rows)}")
+                return saved
+        except Exception as e:
+            logger.error(f"خطأ في حفظ الإشارات دفعة واحدة: {e}")
+            return None
+
+    async def find_duplicate_signal(self, content_hash: str, hours: int = 24) -> Optional[Dict]:
+        """آخر إشارة محفوظة بنفس بصمة المحتوى خلال الساعات الأخيرة"""
+        if not content_hash:
+            return None
+        
+        try:
+            async with self._read() as db:
+                cursor = await db.execute("""
+                    SELECT id, created_date FROM signals
+                    WHERE content_hash = ? AND created_date >= datetime('now', ?)
+                    ORDER BY id DESC LIMIT 1
+                """, (content_hash, f'-{int(hours)} hours'))
+                row = await cursor.fetchone()
+                if row:
+                    return {'id': row[0], 'created_date': row[1]}
+                return None
+        except Exception as e:
+            logger.error(f"خطأ في البحث عن إشارة مكررة: {e}")
+            return None
+
     async def get_latest_signal(self) -> Optional[Dict]:
         """الحصول على آخر إشارة"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._read() as db:
                 cursor = await db.execute("""
                     SELECT * FROM signals 
                     WHERE is_active = 1 
@@ -220,10 +925,158 @@ class DatabaseManager:
             logger.error(f"خطأ في الحصول على آخر إشارة: {e}")
             return None
 
+    async def get_active_signals_with_stats(self) -> List[Dict]:
+        """الإشارات النشطة مع آخر حالة تتبع (وجود صف إحصائيات يعني أن الإشارة دخلت)"""
+        try:
+            async with self._read() as db:
+                cursor = await db.execute("""
+                    SELECT s.id, s.symbol, s.direction, s.entry_price_min, s.entry_price_max,
+                           s.stop_loss, s.targets,
+                           st.signal_id IS NOT NULL,
+                           COALESCE(st.targets_hit, 0),
+                           COALESCE(st.max_profit_percent, 0)
+                    FROM signals s
+                    LEFT JOIN signal_stats st ON st.signal_id = s.id
+                    WHERE s.status = 'active'
+                """)
+                rows = await cursor.fetchall()
+                return [
+                    {
+                        'id': row[0],
+                        'symbol': row[1],
+                        'direction': row[2],
+                        'entry_price_min': row[3],
+                        'entry_price_max': row[4],
+                        'stop_loss': row[5],
+                        'targets': json.loads(row[6] or '[]'),
+                        'entered': bool(row[7]),
+                        'targets_hit': row[8],
+                        'max_profit_percent': row[9]
+                    }
+                    for row in rows
+                ]
+        except Exception as e:
+            logger.error(f"خطأ في الحصول على الإشارات النشطة: {e}")
+            return []
+
+    async def save_signal_stats_batch(self, stats_rows: List[Tuple], completed_ids: List[int] = None) -> bool:
+        """
+        تحديث إحصائيات الإشارات وإنهاء المكتملة منها في معاملة واحدة
+        
+        Args:
+            stats_rows: صفوف (signal_id, current_price, targets_hit,
+                max_profit_percent, is_stop_loss_hit, final_result)
+            completed_ids: معرفات الإشارات التي اكتملت
+        """
+        try:
+            async with self._write() as db:
+                if stats_rows:
+                    await db.executemany("""
+                        INSERT INTO signal_stats (
+                            signal_id, current_price, targets_hit, max_profit_percent,
+                            is_stop_loss_hit, final_result, updated_date, first_target_date
+                        ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CASE WHEN ?3 > 0 THEN CURRENT_TIMESTAMP END)
+                        ON CONFLICT(signal_id) DO UPDATE SET
+                            current_price = excluded.current_price,
+                            targets_hit = excluded.targets_hit,
+                            max_profit_percent = excluded.max_profit_percent,
+                            is_stop_loss_hit = excluded.is_stop_loss_hit,
+                            final_result = excluded.final_result,
+                            updated_date = CURRENT_TIMESTAMP,
+                            first_target_date = COALESCE(signal_stats.first_target_date, excluded.first_target_date)
+                    """, stats_rows)
+                if completed_ids:
+                    await db.executemany(
+                        "UPDATE signals SET status = 'completed', is_active = 0 WHERE id = ?",
+                        [(signal_id,) for signal_id in completed_ids]
+                    )
+                await db.commit()
+                return True
+        except Exception as e:
+            logger.error(f"خطأ في حفظ إحصائيات الإشارات: {e}")
+            return False
+
+    async def get_signal_performance(self, dimension: str, limit: int = 10, min_signals: int = 1) -> List[Dict]:
+        """
+        أداء الإشارات المجمع لبعد واحد (symbol أو direction أو month)
+        
+        الرموز والاتجاهات مرتبة حسب نسبة الفوز، والأشهر من الأحدث.
+        """
+        try:
+            if dimension == 'month':
+                order = "bucket DESC"
+            else:
+                order = "CAST(wins AS REAL) / total DESC, total DESC"
+            
+            async with self._read() as db:
+                cursor = await db.execute(f"""
+                    SELECT bucket, total, wins, result_sum, max_profit_sum,
+                           target_hours_sum, target_count
+                    FROM signal_performance
+                    WHERE dimension = ? AND total >= ?
+                    ORDER BY {order}
+                    LIMIT ?
+                """, (dimension, min_signals, limit))
+                rows = await cursor.fetchall()
+                return [
+                    {
+                        'bucket': row[0],
+                        'total': row[1],
+                        'wins': row[2],
+                        'win_rate': row[2] / row[1] * 100,
+                        'avg_result_percent': row[3] / row[1],
+                        'avg_max_profit_percent': row[4] / row[1],
+                        'avg_hours_to_target': row[5] / row[6] if row[6] else None
+                    }
+                    for row in rows
+                ]
+        except Exception as e:
+            logger.error(f"خطأ في الحصول على أداء الإشارات: {e}")
+            return []
+
+    async def get_signals_for_backtest(self, days: int = None, symbol: str = None) -> List[Dict]:
+        """الإشارات المخزنة مع تاريخ نشرها للاختبار الرجعي"""
+        try:
+            query = """
+                SELECT id, symbol, direction, entry_price_min, entry_price_max,
+                       stop_loss, targets, created_date
+                FROM signals
+                WHERE entry_price_min IS NOT NULL AND stop_loss IS NOT NULL
+                  AND created_date IS NOT NULL
+            """
+            params = []
+            if days:
+                query += " AND created_date >= datetime('now', ?)"
+                params.append(f'-{int(days)} days')
+            if symbol:
+                query += " AND symbol = ?"
+                params.append(symbol)
+            query += " ORDER BY created_date"
+            
+            async with self._read() as db:
+                cursor = await db.execute(query, params)
+                rows = await cursor.fetchall()
+                return [
+                    {
+                        'id': row[0],
+                        'symbol': row[1],
+                        'direction': row[2],
+                        'entry_price_min': row[3],
+                        'entry_price_max': row[4],
+                        'stop_loss': row[5],
+                        'targets': json.loads(row[6] or '[]'),
+                        'created_date': row[7]
+                    }
+                    for row in rows
+                ]
+        except Exception as e:
+            logger.error(f"خطأ في الحصول على إشارات الاختبار الرجعي: {e}")
+            return []
+
     async def update_user_activity(self, user_id: int):
         """تحديث آخر نشاط للمستخدم"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     UPDATE users SET last_activity = CURRENT_TIMESTAMP 
                     WHERE user_id = ?
@@ -232,10 +1085,33 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"خطأ في تحديث نشاط المستخدم: {e}")
 
+    async def update_users_activity_batch(self, rows: List[Tuple[str, int]]) -> Optional[bool]:
+        """
+        تحديث آخر نشاط لمجموعة مستخدمين في معاملة واحدة
+        
+        Args:
+            rows: صفوف (last_activity, user_id)
+        
+        Returns:
+            True عند النجاح، False إذا رُفضت الصفوف نفسها، و None إذا تعذرت
+            الكتابة (قاعدة البيانات مقفلة أو غير متاحة)
+        """
+        try:
+            async with self._write() as db:
+                await db.executemany("UPDATE users SET last_activity = ? WHERE user_id = ?", rows)
+                await db.commit()
+                return True
+        except Exception as e:
+            if _is_row_error(e):
+                logger.error(f"خطأ في بيانات تحديث نشاط المستخدمين: {e}")
+                return False
+            logger.error(f"خطأ في تحديث نشاط المستخدمين: {e}")
+            return None
+
     async def get_user_info(self, user_id: int) -> Optional[Dict]:
         """الحصول على معلومات المستخدم"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._read() as db:
                 cursor = await db.execute("""
                     SELECT u.*, au.is_premium, au.premium_expires, au.added_date
                     FROM users u
@@ -253,20 +1129,212 @@ class DatabaseManager:
 
     async def log_sent_message(self, user_id: int, message_type: str, message_text: str, is_successful: bool = True):
         """تسجيل الرسائل المرسلة"""
+        await self.log_sent_messages_batch([(user_id, message_type, message_text[:500], 1 if is_successful else 0, None)])
+
+    async def log_sent_messages_batch(self, rows: List[Tuple]) -> Optional[bool]:
+        """
+        تسجيل مجموعة رسائل مرسلة في معاملة واحدة
+        
+        كل نص مختلف يُخزن مرة في message_bodies، فبث رسالة إلى N مستخدم
+        يضيف نصاً واحداً وN سجل إرسال صغير.
+        
+        Args:
+            rows: صفوف (user_id, message_type, message_text, is_successful, sent_date)
+                و sent_date = None يعني الوقت الحالي
+        
+        Returns:
+            True عند النجاح، False إذا رُفضت الصفوف نفسها، و None إذا تعذرت
+            الكتابة (قاعدة البيانات مقفلة أو غير متاحة)
+        """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            hashes = {text: message_body_hash(text) for text in {row[2] for row in rows}}
+            async with self._write() as db:
+                await db.executemany(
+                    "INSERT OR IGNORE INTO message_bodies (body_hash, body) VALUES (?, ?)",
+                    [(body_hash, text) for text, body_hash in hashes.items()]
+                )
+                await db.executemany("""
+                    INSERT INTO sent_messages (user_id, message_type, body_id, is_successful, sent_date)
+                    VALUES (?, ?, (SELECT id FROM message_bodies WHERE body_hash = ?), ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """, [
+                    (user_id, message_type, hashes[text], is_successful, sent_date)
+                    for user_id, message_type, text, is_successful, sent_date in rows
+                ])
+                await db.commit()
+                return True
+        except Exception as e:
+            if _is_row_error(e):
+                logger.error(f"خطأ في بيانات دفعة الرسائل المرسلة: {e}")
+                return False
+            logger.error(f"خطأ في تسجيل دفعة الرسائل المرسلة: {e}")
+            return None
+
+    async def get_expired_sent_messages(self, before: str, limit: int) -> List[Dict]:
+        """أقدم سجلات الإرسال (مع نصوصها) التي أُرسلت قبل تاريخ معين"""
+        try:
+            async with self._read() as db:
+                cursor = await db.execute("""
+                    SELECT * FROM sent_messages_full
+                    WHERE sent_date < ?
+                    ORDER BY sent_date
+                    LIMIT ?
+                """, (before, limit))
+                columns = [description[0] for description in cursor.description]
+                return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"خطأ في جلب سجلات الإرسال القديمة: {e}")
+            return []
+
+    async def delete_sent_messages(self, message_ids: List[int]) -> bool:
+        """
+        تجميع سجلات إرسال في sent_messages_daily ثم حذفها مع النصوص التي لم تعد مستخدمة
+        
+        كل ذلك في معاملة واحدة قصيرة، فالدفعة إما تُجمع وتُحذف معاً أو لا شيء.
+        """
+        placeholders = ",".join("?" * len(message_ids))
+        try:
+            async with self._write() as db:
+                await db.execute(f"""
+                    INSERT INTO sent_messages_daily (day, message_type, total, successful)
+                    SELECT date(sent_date), COALESCE(message_type, ''), COUNT(*), SUM(is_successful IS 1)
+                    FROM sent_messages WHERE id IN ({placeholders})
+                    GROUP BY 1, 2
+                    ON CONFLICT(day, message_type) DO UPDATE SET
+                        total = total + excluded.total,
+                        successful = successful + excluded.successful
+                """, message_ids)
+                
+                cursor = await db.execute(
+                    f"SELECT DISTINCT body_id FROM sent_messages WHERE id IN ({placeholders}) AND body_id IS NOT NULL",
+                    message_ids
+                )
+                body_ids = [row[0] for row in await cursor.fetchall()]
+                
+                await db.execute(f"DELETE FROM sent_messages WHERE id IN ({placeholders})", message_ids)
+                if body_ids:
+                    await db.execute(f"""
+                        DELETE FROM message_bodies
+                        WHERE id IN ({",".join("?" * len(body_ids))})
+                            AND NOT EXISTS (SELECT 1 FROM sent_messages WHERE body_id = message_bodies.id)
+                    """, body_ids)
+                
+                await db.commit()
+                return True
+        except Exception as e:
+            logger.error(f"خطأ في حذف سجلات الإرسال القديمة: {e}")
+            return False
+
+    async def incremental_vacuum(self, pages: int) -> Optional[Tuple[int, int]]:
+        """
+        إرجاع عدد محدود من الصفحات الفارغة لنظام الملفات
+        
+        القواعد المنشأة قبل auto_vacuum = INCREMENTAL لا يُرجع منها شيء حتى
+        تُحوّل مرة واحدة عبر enable_incremental_vacuum، فلا يُنفذ هنا VACUUM
+        كامل يحجز قفل الكتابة.
+        
+        Returns:
+            (الصفحات المُرجعة، الصفحات الفارغة المتبقية) أو None عند الخطأ
+        """
+        if not self.incremental_vacuum_enabled:
+            return 0, 0
+        
+        try:
+            async with self._write() as db:
+                cursor = await db.execute("PRAGMA freelist_count")
+                before = (await cursor.fetchone())[0]
+                if before:
+                    # incremental_vacuum(0) يفرغ القائمة كلها، فالحد الأدنى صفحة واحدة
+                    await db.execute(f"PRAGMA incremental_vacuum({max(int(pages), 1)})")
+                cursor = await db.execute("PRAGMA freelist_count")
+                remaining = (await cursor.fetchone())[0]
+                return before - remaining, remaining
+        except Exception as e:
+            logger.error(f"خطأ في تفريغ صفحات قاعدة البيانات: {e}")
+            return None
+
+    async def enable_incremental_vacuum(self) -> bool:
+        """
+        تحويل قاعدة بيانات قديمة إلى auto_vacuum = INCREMENTAL (صيانة لمرة واحدة)
+        
+        يتطلب VACUUM كاملاً يعيد كتابة الملف ويحجز قفل الكتابة طوال مدته،
+        لذا يُشغّل بطلب صريح من المسؤول لا من حلقة الأرشفة.
+        """
+        try:
+            async with self._write() as db:
+                cursor = await db.execute("PRAGMA auto_vacuum")
+                if (await cursor.fetchone())[0] != 2:
+                    logger.info("تحويل قاعدة البيانات إلى auto_vacuum = INCREMENTAL (VACUUM كامل)")
+                    await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    await db.execute("VACUUM")
+                self.incremental_vacuum_enabled = True
+                return True
+        except Exception as e:
+            logger.error(f"خطأ في تفعيل التفريغ التدريجي: {e}")
+            return False
+
+    async def follow_trader(self, user_id: int, encrypted_uid: str, nickname: str = None) -> bool:
+        """متابعة متداول لتلقي تنبيهات تغير مراكزه"""
+        try:
+            async with self._write() as db:
                 await db.execute("""
-                    INSERT INTO sent_messages (user_id, message_type, message_text, is_successful)
-                    VALUES (?, ?, ?, ?)
-                """, (user_id, message_type, message_text[:500], 1 if is_successful else 0))
+                    INSERT OR IGNORE INTO followed_traders (user_id, encrypted_uid, nickname)
+                    VALUES (?, ?, ?)
+                """, (user_id, encrypted_uid, nickname))
                 await db.commit()
+                logger.info(f"المستخدم {user_id} يتابع المتداول {encrypted_uid}")
+                return True
+        except Exception as e:
+            logger.error(f"خطأ في متابعة المتداول: {e}")
+            return False
+
+    async def unfollow_trader(self, user_id: int, encrypted_uid: str) -> bool:
+        """إلغاء متابعة متداول"""
+        try:
+            async with self._write() as db:
+                cursor = await db.execute("""
+                    DELETE FROM followed_traders WHERE user_id = ? AND encrypted_uid = ?
+                """, (user_id, encrypted_uid))
+                await db.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"خطأ في إلغاء متابعة المتداول: {e}")
+            return False
+
+    async def get_user_followed_traders(self, user_id: int) -> List[Dict]:
+        """الحصول على المتداولين الذين يتابعهم المستخدم"""
+        try:
+            async with self._read() as db:
+                cursor = await db.execute("""
+                    SELECT encrypted_uid, nickname, followed_date FROM followed_traders
+                    WHERE user_id = ?
+                    ORDER BY followed_date
+                """, (user_id,))
+                results = await cursor.fetchall()
+                return [
+                    {'encrypted_uid': row[0], 'nickname': row[1], 'followed_date': row[2]}
+                    for row in results
+                ]
+        except Exception as e:
+            logger.error(f"خطأ في الحصول على المتداولين المتابعين: {e}")
+            return []
+
+    async def get_trader_followers(self) -> Dict[str, List[int]]:
+        """الحصول على متابعي كل متداول (معرف المتداول -> قائمة المستخدمين)"""
+        try:
+            async with self._read() as db:
+                cursor = await db.execute("SELECT encrypted_uid, user_id FROM followed_traders")
+                followers: Dict[str, List[int]] = {}
+                for encrypted_uid, user_id in await cursor.fetchall():
+                    followers.setdefault(encrypted_uid, []).append(user_id)
+                return followers
         except Exception as e:
-            logger.error(f"خطأ في تسجيل الرسالة المرسلة: {e}")
+            logger.error(f"خطأ في الحصول على متابعي المتداولين: {e}")
+            return {}
 
     async def get_system_setting(self, key: str) -> Optional[str]:
         """الحصول على إعداد النظام"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._read() as db:
                 cursor = await db.execute("SELECT value FROM system_settings WHERE key = ?", (key,))
                 result = await cursor.fetchone()
                 return result[0] if result else None
@@ -277,7 +1345,7 @@ class DatabaseManager:
     async def set_system_setting(self, key: str, value: str):
         """تعيين إعداد النظام"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     INSERT OR REPLACE INTO system_settings (key, value, updated_date)
                     VALUES (?, ?, CURRENT_TIMESTAMP)
@@ -286,71 +1354,152 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"خطأ في تعيين إعداد النظام: {e}")
 
+    async def _get_counters(self, db) -> Dict[str, int]:
+        """جميع عدادات stats_counters"""
+        cursor = await db.execute("SELECT name, value FROM stats_counters")
+        return dict(await cursor.fetchall())
+
     async def get_stats(self) -> Dict:
-        """الحصول على إحصائيات عامة"""
+        """الحصول على إحصائيات عامة (من العدادات المحدثة بالمحفزات)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                stats = {}
-                
-                # عدد المستخدمين الإجمالي
-                cursor = await db.execute("SELECT COUNT(*) FROM users")
-                stats['total_users'] = (await cursor.fetchone())[0]
-                
-                # عدد المستخدمين المصرح لهم
-                cursor = await db.execute("SELECT COUNT(*) FROM allowed_users")
-                stats['allowed_users'] = (await cursor.fetchone())[0]
-                
-                # عدد الإشارات الإجمالي
-                cursor = await db.execute("SELECT COUNT(*) FROM signals")
-                stats['total_signals'] = (await cursor.fetchone())[0]
-                
-                # عدد الإشارات النشطة
-                cursor = await db.execute("SELECT COUNT(*) FROM signals WHERE is_active = 1")
-                stats['active_signals'] = (await cursor.fetchone())[0]
-                
-                return stats
+            async with self._read() as db:
+                return await self._get_counters(db)
         except Exception as e:
             logger.error(f"خطأ في الحصول على الإحصائيات: {e}")
             return {}
 
+    async def _get_counter(self, name: str) -> int:
+        """قيمة عداد واحد من stats_counters"""
+        async with self._read() as db:
+            cursor = await db.execute("SELECT value FROM stats_counters WHERE name = ?", (name,))
+            row = await cursor.fetchone()
+            return row[0] if row else 0
+
+    async def _get_daily_total(self, metric: str, start, end=None) -> int:
+        """
+        مجموع مقياس من daily_stats بين يومين (شاملين)
+        
+        التواريخ date أو datetime أو نص يبدأ بـ YYYY-MM-DD، والأيام بتوقيت UTC.
+        """
+        async with self._read() as db:
+            cursor = await db.execute("""
+                SELECT COALESCE(SUM(value), 0) FROM daily_stats
+                WHERE metric = ? AND day BETWEEN ? AND ?
+            """, (metric, str(start)[:10], str(end if end is not None else start)[:10]))
+            return (await cursor.fetchone())[0]
+
+    async def get_total_sent_messages(self) -> int:
+        """إجمالي الرسائل المرسلة (بما فيها المؤرشفة)"""
+        try:
+            return await self._get_counter('total_sent_messages')
+        except Exception as e:
+            logger.error(f"خطأ في عد الرسائل المرسلة: {e}")
+            return 0
+
+    async def get_successful_sent_messages(self) -> int:
+        """إجمالي الرسائل المرسلة بنجاح"""
+        try:
+            return await self._get_counter('successful_sent_messages')
+        except Exception as e:
+            logger.error(f"خطأ في عد الرسائل الناجحة: {e}")
+            return 0
+
+    async def get_messages_count_by_date(self, date) -> int:
+        """عدد الرسائل المرسلة في يوم"""
+        return await self.get_messages_count_by_date_range(date, date)
+
+    async def get_messages_count_by_date_range(self, start_date, end_date) -> int:
+        """عدد الرسائل المرسلة بين تاريخين (شاملين)"""
+        try:
+            return await self._get_daily_total('sent_messages', start_date, end_date)
+        except Exception as e:
+            logger.error(f"خطأ في عد الرسائل حسب التاريخ: {e}")
+            return 0
+
+    async def get_active_users_count(self, date=None) -> int:
+        """عدد المستخدمين الذين تفاعلوا مع البوت في يوم (اليوم افتراضياً)"""
+        try:
+            return await self._get_daily_total('active_users', date or datetime.now(timezone.utc).date())
+        except Exception as e:
+            logger.error(f"خطأ في عد المستخدمين النشطين: {e}")
+            return 0
+
+    async def get_new_users_count(self, date) -> int:
+        """عدد المستخدمين الجدد في يوم"""
+        return await self.get_new_users_count_range(date, date)
+
+    async def get_new_users_count_range(self, start_date, end_date) -> int:
+        """عدد المستخدمين الجدد بين تاريخين (شاملين)"""
+        try:
+            return await self._get_daily_total('new_users', start_date, end_date)
+        except Exception as e:
+            logger.error(f"خطأ في عد المستخدمين الجدد: {e}")
+            return 0
+
+    async def get_signals_count_by_date(self, date) -> int:
+        """عدد الإشارات في يوم"""
+        return await self.get_signals_count_by_date_range(date, date)
+
+    async def get_signals_count_by_date_range(self, start_date, end_date) -> int:
+        """عدد الإشارات بين تاريخين (شاملين)"""
+        try:
+            return await self._get_daily_total('signals', start_date, end_date)
+        except Exception as e:
+            logger.error(f"خطأ في عد الإشارات حسب التاريخ: {e}")
+            return 0
+
+    async def get_peak_activity_hours(self, days: int = 30, limit: int = 8) -> List[int]:
+        """
+        ساعات اليوم (0-23 بتوقيت UTC) الأكثر نشاطاً للمستخدمين خلال آخر أيام
+        
+        Returns:
+            الساعات مرتبة من الأكثر نشاطاً، أو قائمة فارغة بدون بيانات
+        """
+        try:
+            async with self._read() as db:
+                cursor = await db.execute("""
+                    SELECT CAST(substr(hour, 12, 2) AS INTEGER) AS hour_of_day, SUM(value) AS total
+                    FROM hourly_stats
+                    WHERE metric = 'active_users' AND hour >= strftime('%Y-%m-%d %H:00', 'now', ?)
+                    GROUP BY hour_of_day
+                    ORDER BY total DESC, hour_of_day
+                    LIMIT ?
+                """, (f'-{days} days', limit))
+                return [row[0] for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"خطأ في تحليل ساعات الذروة: {e}")
+            return []
+
     async def get_detailed_stats(self) -> Dict:
         """الحصول على إحصائيات مفصلة للنظام"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                stats = {}
-                
-                # إحصائيات المستخدمين
-                cursor = await db.execute("SELECT COUNT(*) FROM users")
-                stats['total_users'] = (await cursor.fetchone())[0]
-                
-                cursor = await db.execute("SELECT COUNT(*) FROM allowed_users")
-                stats['allowed_users'] = (await cursor.fetchone())[0]
-                
-                cursor = await db.execute("SELECT COUNT(*) FROM allowed_users WHERE is_premium = 1")
-                stats['premium_users'] = (await cursor.fetchone())[0]
-                
-                # إحصائيات الإشارات
-                cursor = await db.execute("SELECT COUNT(*) FROM signals")
-                stats['total_signals'] = (await cursor.fetchone())[0]
-                
-                cursor = await db.execute("SELECT COUNT(*) FROM signals WHERE is_active = 1")
-                stats['active_signals'] = (await cursor.fetchone())[0]
+            async with self._read() as db:
+                stats = await self._get_counters(db)
                 
-                cursor = await db.execute("SELECT COUNT(*) FROM signals WHERE created_date >= date('now', '-7 days')")
-                stats['signals_last_week'] = (await cursor.fetchone())[0]
-                
-                cursor = await db.execute("SELECT COUNT(*) FROM signals WHERE created_date >= date('now', '-30 days')")
-                stats['signals_last_month'] = (await cursor.fetchone())[0]
-                
-                # إحصائيات النشاط
-                cursor = await db.execute("SELECT COUNT(*) FROM users WHERE last_activity >= datetime('now', '-24 hours')")
-                stats['active_users_24h'] = (await cursor.fetchone())[0]
+                # إشارات آخر أسبوع وآخر شهر من المجاميع اليومية
+                cursor = await db.execute("""
+                    SELECT
+                        COALESCE(SUM(CASE WHEN day >= date('now', '-7 days') THEN value END), 0),
+                        COALESCE(SUM(value), 0)
+                    FROM daily_stats
+                    WHERE metric = 'signals' AND day >= date('now', '-30 days')
+                """)
+                stats['signals_last_week'], stats['signals_last_month'] = await cursor.fetchone()
                 
-                cursor = await db.execute("SELECT COUNT(*) FROM users WHERE last_activity >= datetime('now', '-7 days')")
-                stats['active_users_week'] = (await cursor.fetchone())[0]
+                # إحصائيات النشاط (فهرس last_activity يحصر القراءة في المستخدمين النشطين)
+                cursor = await db.execute("""
+                    SELECT
+                        COUNT(CASE WHEN last_activity >= datetime('now', '-24 hours') THEN 1 END),
+                        COUNT(*)
+                    FROM users WHERE last_activity >= datetime('now', '-7 days')
+                """)
+                stats['active_users_24h'], stats['active_users_week'] = await cursor.fetchone()
                 
                 # أحدث إشارة
-                cursor = await db.execute("SELECT symbol, direction, created_date FROM signals ORDER BY created_date DESC LIMIT 1")
+                cursor = await db.execute("""
+                    SELECT symbol, direction, created_date FROM signals
+                    WHERE status IS NOT 'imported' ORDER BY created_date DESC LIMIT 1
+                """)
                 latest_signal = await cursor.fetchone()
                 if latest_signal:
                     stats['latest_signal'] = {
@@ -0,0 +1,220 @@
+"""
+كتابة مؤجلة على دفعات لعمليات قاعدة البيانات المتكررة
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .database import DatabaseManager, db_manager
+from config.config import (
+    SENT_LOG_BATCH_SIZE, SENT_LOG_FLUSH_INTERVAL, SENT_LOG_MAX_PENDING, ACTIVITY_FLUSH_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _utc_timestamp() -> str:
+    """الوقت الحالي بصيغة CURRENT_TIMESTAMP في SQLite"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class BatchWriter(ABC):
+    """حلقة الكتابة الدورية المشتركة: flush كل flush_interval أو عند wake"""
+
+    # وصف الكاتب في رسائل السجل
+    description = "الكتابة المؤجلة"
+
+    def __init__(self, db: DatabaseManager, flush_interval: float):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.flushing_active = False
+
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def wake(self):
+        """طلب كتابة فورية من الحلقة الدورية"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @abstractmethod
+    async def _write_pending(self) -> int:
+        """كتابة البيانات المعلقة وإرجاع عدد الصفوف المكتوبة"""
+
+    async def _write_rows(
+        self, rows: List, write: Callable[[List], Awaitable[Optional[bool]]]
+    ) -> Tuple[int, List]:
+        """
+        كتابة دفعة مع عزل الصفوف المرفوضة
+
+        إذا رُفضت الدفعة بسبب صفوفها (write تعيد False) تُقسم نصفين ويُعاد
+        كل نصف حتى الصف الواحد، والصف المرفوض وحده يُسجل ويُتجاهل. إذا
+        تعذرت الكتابة نفسها (write تعيد None، مثل قفل قاعدة البيانات) يتوقف
+        التقسيم وتُعاد الصفوف غير المكتوبة لتبقى معلقة.
+
+        Returns:
+            (عدد الصفوف المكتوبة، الصفوف التي لم تُكتب بعد)
+        """
+        result = await write(rows)
+        if result:
+            return len(rows), []
+        if result is None:
+            return 0, rows
+
+        if len(rows) == 1:
+            logger.error(f"تم تجاهل صف مرفوض في {self.description}: {rows[0]}")
+            return 0, []
+
+        middle = len(rows) // 2
+        written, unwritten = await self._write_rows(rows[:middle], write)
+        if unwritten:
+            return written, unwritten + rows[middle:]
+
+        more, unwritten = await self._write_rows(rows[middle:], write)
+        return written + more, unwritten
+
+    async def flush(self) -> int:
+        """كتابة جميع البيانات المعلقة (لا تتداخل كتابتان)"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            return await self._write_pending()
+
+    async def start_flushing(self):
+        """كتابة دورية للبيانات المعلقة"""
+        logger.info(f"بدء {self.description}...")
+        self.flushing_active = True
+        self._wakeup = asyncio.Event()
+
+        while self.flushing_active:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"خطأ في {self.description}: {e}")
+
+    def stop_flushing(self):
+        """إيقاف الكتابة الدورية (يجب استدعاء flush بعدها لكتابة المتبقي)"""
+        self.flushing_active = False
+        self.wake()
+        logger.info(f"تم إيقاف {self.description}")
+
+
+class SentMessageWriter(BatchWriter):
+    """
+    تجميع سجلات الرسائل المرسلة في الذاكرة وكتابتها على دفعات
+
+    log لا ينتظر قاعدة البيانات، فيبقى الإرسال للمستخدمين محكوماً بسرعة
+    Telegram وحدها. الدفعة تُكتب في معاملة واحدة عند امتلائها أو بعد
+    flush_interval ثانية، وتُكتب المتبقية عند الإيقاف عبر flush.
+    """
+
+    description = "الكتابة المؤجلة لسجلات الرسائل المرسلة"
+
+    def __init__(
+        self,
+        db: DatabaseManager = db_manager,
+        batch_size: int = SENT_LOG_BATCH_SIZE,
+        flush_interval: float = SENT_LOG_FLUSH_INTERVAL,
+        max_pending: int = SENT_LOG_MAX_PENDING
+    ):
+        super().__init__(db, flush_interval)
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending: List[Tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def log(self, user_id: int, message_type: str, message_text: str, is_successful: bool = True):
+        """إضافة سجل رسالة مرسلة (وقت الإرسال يُسجل الآن لا عند الكتابة)"""
+        self._pending.append(
+            (user_id, message_type, message_text[:500], 1 if is_successful else 0, _utc_timestamp())
+        )
+
+        self._trim()
+
+        if len(self._pending) >= self.batch_size:
+            self.wake()
+
+    def _trim(self):
+        """تجاهل أقدم السجلات إذا تجاوزت المعلقة max_pending"""
+        if len(self._pending) > self.max_pending:
+            dropped = len(self._pending) - self.max_pending
+            del self._pending[:dropped]
+            logger.warning(f"تم تجاهل {dropped} سجل رسالة مرسلة لتعذر الكتابة")
+
+    async def _write_pending(self) -> int:
+        """
+        كتابة السجلات المعلقة على دفعات
+
+        Returns:
+            عدد السجلات المكتوبة (المرفوض وحده يُتجاهل، وما تعذرت كتابته يبقى معلقاً)
+        """
+        written = 0
+        while self._pending:
+            batch = self._pending[:self.batch_size]
+            del self._pending[:len(batch)]
+
+            count, unwritten = await self._write_rows(batch, self.db.log_sent_messages_batch)
+            written += count
+            if unwritten:
+                self._pending[:0] = unwritten
+                self._trim()
+                break
+
+        return written
+
+
+class ActivityWriter(BatchWriter):
+    """
+    دمج تحديثات آخر نشاط للمستخدمين في الذاكرة
+
+    كل مستخدم له قيمة معلقة واحدة هي آخر وقت نشاط، فعدة نقرات متتالية
+    تصبح تحديثاً واحداً. last_activity في قاعدة البيانات يتأخر عن النشاط
+    الفعلي بما لا يزيد عن flush_interval ثانية.
+    """
+
+    description = "الكتابة المؤجلة لنشاط المستخدمين"
+
+    def __init__(self, db: DatabaseManager = db_manager, flush_interval: float = ACTIVITY_FLUSH_INTERVAL):
+        super().__init__(db, flush_interval)
+        self._pending: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, user_id: int):
+        """تسجيل نشاط المستخدم الآن"""
+        self._pending[user_id] = _utc_timestamp()
+
+    async def _write_pending(self) -> int:
+        """
+        كتابة آخر نشاط لكل مستخدم في تحديث واحد
+
+        ما تعذرت كتابته يعود معلقاً، والنشاط الأحدث المسجل أثناء الكتابة
+        يبقى له الأولوية.
+        """
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        written, unwritten = await self._write_rows(
+            [(timestamp, user_id) for user_id, timestamp in pending.items()],
+            self.db.update_users_activity_batch
+        )
+        if unwritten:
+            self._pending = {**{user_id: timestamp for timestamp, user_id in unwritten}, **self._pending}
+        return written
+
+# إنشاء مثيلات عامة
+sent_message_writer = SentMessageWriter()
+activity_writer = ActivityWriter()
@@ -3,8 +3,9 @@
 """
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
@@ -14,10 +15,14 @@ from aiogram.fsm.state import State, StatesGroup
 
 from .keyboards import *
 from .database import db_manager
+from .db_writers import sent_message_writer
 from .api_clients import APIManager
 from .signal_parser import signal_parser
+from .signal_cache import signal_cache, signal_content_hash
 from .admin_handlers import admin_router
-from .top_traders_api import top_traders_api
+from .top_traders_api import top_traders_api, normalize_trader_uid
+from .trader_consensus import trader_consensus
+from .backtest_runner import backtest_runner
 from config.config import *
 
 logger = logging.getLogger(__name__)
@@ -25,6 +30,7 @@ logger = logging.getLogger(__name__)
 # حالات البوت
 class BotStates(StatesGroup):
     waiting_for_signal = State()
+    waiting_for_bulk_signals = State()
     waiting_for_broadcast = State()
     waiting_for_user_id = State()
     waiting_for_admin_command = State()
@@ -49,8 +55,7 @@ async def cmd_start(message: Message):
         # في الإصدار المجاني، جميع المستخدمين مصرح لهم
         await db_manager.add_allowed_user(user_id)
         
-        # تحديث آخر نشاط
-        await db_manager.update_user_activity(user_id)
+        # آخر نشاط يُسجل لكل تحديث في track_user_activity (main.py)
         
         # إرسال رسالة الترحيب
         await message.answer(
@@ -211,28 +216,71 @@ async def show_help(callback: CallbackQuery):
         logger.error(f"خطأ في عرض المساعدة: {e}")
         await callback.answer("حدث خطأ", show_alert=True)
 
+# فلاتر أفضل المتداولين: المفتاح -> (الفترة، الترتيب، أدنى نسبة فوز، أدنى أصول)
+TRADERS_FILTERS = {
+    "weekly_roi": ("WEEKLY", "ROI", None, None),
+    "weekly_pnl": ("WEEKLY", "PNL", None, None),
+    "monthly_roi": ("MONTHLY", "ROI", None, None),
+    "monthly_pnl": ("MONTHLY", "PNL", None, None),
+    "most_followed": ("WEEKLY", "FOLLOWERS", None, None),
+    "win_rate": ("WEEKLY", "WIN_RATE", 60.0, None),
+    "high_aum": ("WEEKLY", "AUM", None, 100000.0),
+}
+
+TRADERS_PER_PAGE = 10
+
+async def render_traders_page(callback: CallbackQuery, filter_key: str = "weekly_roi", page: int = 1, force_refresh: bool = False) -> bool:
+    """عرض صفحة من قائمة المتداولين المخزنة مع الترتيب والفلترة محلياً"""
+    period_type, statistics_type, min_win_rate, min_aum = TRADERS_FILTERS.get(
+        filter_key, TRADERS_FILTERS["weekly_roi"]
+    )
+    
+    # طلب خارجي فقط لتركيبة فترة/نوع تداول غير مخزنة
+    leaderboard = await top_traders_api.get_leaderboard(
+        period_type=period_type,
+        trade_type="PERPETUAL",
+        force_refresh=force_refresh
+    )
+    is_sample = not leaderboard
+    if is_sample:
+        # بيانات تجريبية للعرض فقط، لا تُخزن فيُعاد الجلب في الطلب التالي
+        leaderboard = await top_traders_api.get_sample_leaderboard()
+    
+    page_table, total = leaderboard.query(
+        sort_by=statistics_type,
+        min_win_rate=min_win_rate,
+        min_aum=min_aum,
+        offset=(page - 1) * TRADERS_PER_PAGE,
+        limit=TRADERS_PER_PAGE
+    )
+    if not page_table:
+        return False
+    
+    total_pages = (total + TRADERS_PER_PAGE - 1) // TRADERS_PER_PAGE
+    message = await top_traders_api.format_top_traders_message(
+        page_table,
+        period_type,
+        statistics_type=statistics_type,
+        start_rank=(page - 1) * TRADERS_PER_PAGE + 1,
+        total=total
+    )
+    if is_sample:
+        message = "⚠️ تعذر جلب البيانات الحية، يتم عرض بيانات تجريبية\n\n" + message
+    await callback.message.edit_text(
+        message,
+        reply_markup=get_top_traders_keyboard(filter_key, page, total_pages),
+        parse_mode="Markdown"
+    )
+    return True
+
 @router.callback_query(F.data == "top_traders")
 async def show_top_traders(callback: CallbackQuery):
     """عرض أفضل المتداولين"""
     try:
         await callback.answer("جاري جلب بيانات أفضل المتداولين...")
         
-        # الحصول على بيانات أفضل المتداولين (أسبوعي ROI افتراضياً)
-        traders_data = await top_traders_api.get_top_traders(
-            period_type="WEEKLY",
-            statistics_type="ROI",
-            trade_type="PERPETUAL",
-            limit=10
-        )
-        
-        if traders_data:
-            message = await top_traders_api.format_top_traders_message(traders_data, "WEEKLY")
-            await callback.message.edit_text(
-                message,
-                reply_markup=get_top_traders_keyboard(),
-                parse_mode="Markdown"
-            )
-        else:
+        # أسبوعي ROI افتراضياً
+        if not await render_traders_page(callback):
             await callback.message.edit_text(
                 MESSAGES.get("top_traders_error", "❌ خطأ في جلب بيانات المتداولين"),
                 reply_markup=get_back_keyboard()
@@ -242,44 +290,30 @@ async def show_top_traders(callback: CallbackQuery):
         logger.error(f"خطأ في عرض أفضل المتداولين: {e}")
         await callback.answer("حدث خطأ في جلب البيانات", show_alert=True)
 
+def parse_traders_page(value: str) -> Tuple[str, int]:
+    """قراءة "<الفلتر>_<الصفحة>" من بيانات النقر (الفلتر الافتراضي والصفحة الأولى عند الخطأ)"""
+    filter_key, _, page_str = value.rpartition("_")
+    if filter_key not in TRADERS_FILTERS or not page_str.isdigit():
+        return "weekly_roi", 1
+    return filter_key, max(int(page_str), 1)
+
 @router.callback_query(F.data.startswith("traders_"))
 async def handle_traders_filter(callback: CallbackQuery):
-    """معالجة فلاتر أفضل المتداولين"""
+    """معالجة فلاتر وصفحات أفضل المتداولين"""
     try:
-        await callback.answer("جاري تحديث البيانات...")
+        await callback.answer()
         
-        filter_type = callback.data.replace("traders_", "")
-        
-        # تحديد المعاملات حسب النوع
-        if filter_type == "weekly_roi":
-            period_type, statistics_type = "WEEKLY", "ROI"
-        elif filter_type == "weekly_pnl":
-            period_type, statistics_type = "WEEKLY", "PNL"
-        elif filter_type == "monthly_roi":
-            period_type, statistics_type = "MONTHLY", "ROI"
-        elif filter_type == "monthly_pnl":
-            period_type, statistics_type = "MONTHLY", "PNL"
-        elif filter_type == "most_followed":
-            period_type, statistics_type = "WEEKLY", "FOLLOWERS"
-        else:
-            period_type, statistics_type = "WEEKLY", "ROI"
-        
-        # جلب البيانات
-        traders_data = await top_traders_api.get_top_traders(
-            period_type=period_type,
-            statistics_type=statistics_type,
-            trade_type="PERPETUAL",
-            limit=10
-        )
+        filter_type = callback.data.replace("traders_", "", 1)
+        page = 1
         
-        if traders_data:
-            message = await top_traders_api.format_top_traders_message(traders_data, period_type)
-            await callback.message.edit_text(
-                message,
-                reply_markup=get_top_traders_keyboard(),
-                parse_mode="Markdown"
-            )
-        else:
+        # صفحات القائمة: traders_page_<الفلتر>_<الصفحة>
+        if filter_type.startswith("page_"):
+            filter_type, page = parse_traders_page(filter_type.replace("page_", "", 1))
+        
+        if filter_type not in TRADERS_FILTERS:
+            filter_type = "weekly_roi"
+        
+        if not await render_traders_page(callback, filter_type, page):
             await callback.message.edit_text(
                 "❌ لا توجد بيانات متاحة لهذا الفلتر",
                 reply_markup=get_top_traders_keyboard()
@@ -289,28 +323,20 @@ async def handle_traders_filter(callback: CallbackQuery):
         logger.error(f"خطأ في معالجة فلتر المتداولين: {e}")
         await callback.answer("حدث خطأ في تحديث البيانات", show_alert=True)
 
-@router.callback_query(F.data == "refresh_traders")
+@router.callback_query(F.data.startswith("refresh_traders"))
 async def refresh_traders_data(callback: CallbackQuery):
-    """تحديث بيانات المتداولين"""
+    """تحديث بيانات المتداولين مع البقاء على الفلتر والصفحة الحاليين"""
     try:
         await callback.answer("جاري تحديث البيانات...")
         
-        # جلب بيانات محدثة
-        traders_data = await top_traders_api.get_top_traders(
-            period_type="WEEKLY",
-            statistics_type="ROI",
-            trade_type="PERPETUAL",
-            limit=10
-        )
+        # refresh_traders_<الفلتر>_<الصفحة>
+        filter_key, page = parse_traders_page(callback.data.replace("refresh_traders_", "", 1))
         
-        if traders_data:
-            message = await top_traders_api.format_top_traders_message(traders_data, "WEEKLY")
-            await callback.message.edit_text(
-                message,
-                reply_markup=get_top_traders_keyboard(),
-                parse_mode="Markdown"
-            )
-        else:
+        # تجاوز التخزين المؤقت وجلب بيانات محدثة (الصفحة الأولى إذا قل عدد الصفحات)
+        if not (
+            await render_traders_page(callback, filter_key, page, force_refresh=True)
+            or (page > 1 and await render_traders_page(callback, filter_key))
+        ):
             await callback.message.edit_text(
                 "❌ خطأ في تحديث البيانات",
                 reply_markup=get_top_traders_keyboard()
@@ -320,6 +346,143 @@ async def refresh_traders_data(callback: CallbackQuery):
         logger.error(f"خطأ في تحديث بيانات المتداولين: {e}")
         await callback.answer("حدث خطأ في التحديث", show_alert=True)
 
+@router.callback_query(F.data == "current_page")
+async def current_page_counter(callback: CallbackQuery):
+    """زر رقم الصفحة للعرض فقط (إيقاف مؤشر الانتظار في تيليجرام)"""
+    await callback.answer()
+
+@router.callback_query(F.data.in_({"consensus", "refresh_consensus"}))
+async def show_traders_consensus(callback: CallbackQuery):
+    """عرض إجماع مراكز أفضل المتداولين"""
+    try:
+        await callback.answer("جاري حساب إجماع المتداولين...")
+        
+        # التحديث الإجباري عند الضغط على زر التحديث فقط
+        message = await trader_consensus.get_consensus_message(
+            force_refresh=callback.data == "refresh_consensus"
+        )
+        
+        await callback.message.edit_text(
+            message,
+            reply_markup=get_consensus_keyboard(),
+            parse_mode="Markdown"
+        )
+        
+    except Exception as e:
+        logger.error(f"خطأ في عرض إجماع المتداولين: {e}")
+        await callback.answer("حدث خطأ في جلب البيانات", show_alert=True)
+
+async def follow_trader_checked(user_id: int, value: str) -> Optional[str]:
+    """
+    التحقق من معرف المتداول وحد المتابعة ثم المتابعة
+
+    Returns:
+        رسالة الخطأ، أو None عند نجاح المتابعة
+    """
+    encrypted_uid = normalize_trader_uid(value)
+    if not encrypted_uid:
+        return "❌ معرف المتداول غير صالح (32 خانة من 0-9 و A-F)"
+    
+    followed = await db_manager.get_user_followed_traders(user_id)
+    followed_uids = {trader['encrypted_uid'] for trader in followed}
+    if encrypted_uid not in followed_uids and len(followed_uids) >= MAX_FOLLOWED_TRADERS:
+        return f"⚠️ وصلت للحد الأقصى ({MAX_FOLLOWED_TRADERS} متداول). ألغِ متابعة متداول آخر أولاً"
+    
+    if not await db_manager.follow_trader(user_id, encrypted_uid):
+        return "❌ فشل في متابعة المتداول"
+    return None
+
+@router.callback_query(F.data.startswith("follow_trader_"))
+async def follow_trader_callback(callback: CallbackQuery):
+    """متابعة متداول من لوحة تفاصيله"""
+    try:
+        error = await follow_trader_checked(
+            callback.from_user.id, callback.data.replace("follow_trader_", "", 1)
+        )
+        await callback.answer(error or "🔔 ستصلك تنبيهات عند تغير مراكز هذا المتداول", show_alert=True)
+            
+    except Exception as e:
+        logger.error(f"خطأ في متابعة المتداول: {e}")
+        await callback.answer("حدث خطأ", show_alert=True)
+
+@router.callback_query(F.data.startswith("unfollow_trader_"))
+async def unfollow_trader_callback(callback: CallbackQuery):
+    """إلغاء متابعة متداول"""
+    try:
+        encrypted_uid = callback.data.replace("unfollow_trader_", "", 1)
+        await db_manager.unfollow_trader(callback.from_user.id, encrypted_uid)
+        await callback.answer("🔕 تم إلغاء متابعة المتداول", show_alert=True)
+        
+    except Exception as e:
+        logger.error(f"خطأ في إلغاء متابعة المتداول: {e}")
+        await callback.answer("حدث خطأ", show_alert=True)
+
+@router.message(Command("follow"))
+async def cmd_follow_trader(message: Message):
+    """متابعة متداول بمعرفه: /follow <المعرف>"""
+    try:
+        parts = message.text.split(maxsplit=1)
+        if len(parts) < 2:
+            await message.answer(
+                "❌ يرجى كتابة معرف المتداول بعد الأمر.\n\n**مثال:** `/follow D64DDD2177FA081E3F361F70C703A562`",
+                parse_mode="Markdown"
+            )
+            return
+        
+        error = await follow_trader_checked(message.from_user.id, parts[1])
+        if error:
+            await message.answer(error)
+            return
+        
+        encrypted_uid = normalize_trader_uid(parts[1])
+        await message.answer(
+            f"🔔 **تمت المتابعة**\n\nستصلك تنبيهات عند فتح أو إغلاق أو تغيير مراكز المتداول `{encrypted_uid}`.",
+            reply_markup=get_following_keyboard(encrypted_uid),
+            parse_mode="Markdown"
+        )
+            
+    except Exception as e:
+        logger.error(f"خطأ في أمر المتابعة: {e}")
+        await message.answer("حدث خطأ في متابعة المتداول")
+
+@router.message(Command("unfollow"))
+async def cmd_unfollow_trader(message: Message):
+    """إلغاء متابعة متداول: /unfollow <المعرف>"""
+    try:
+        parts = message.text.split(maxsplit=1)
+        if len(parts) < 2:
+            await message.answer("❌ يرجى كتابة معرف المتداول بعد الأمر.")
+            return
+        
+        encrypted_uid = normalize_trader_uid(parts[1]) or parts[1].strip()
+        removed = await db_manager.unfollow_trader(message.from_user.id, encrypted_uid)
+        await message.answer("🔕 تم إلغاء المتابعة" if removed else "⚠️ أنت لا تتابع هذا المتداول")
+        
+    except Exception as e:
+        logger.error(f"خطأ في أمر إلغاء المتابعة: {e}")
+        await message.answer("حدث خطأ في إلغاء المتابعة")
+
+@router.message(Command("following"))
+async def cmd_following(message: Message):
+    """عرض المتداولين الذين يتابعهم المستخدم"""
+    try:
+        followed = await db_manager.get_user_followed_traders(message.from_user.id)
+        
+        if not followed:
+            await message.answer("📭 لا تتابع أي متداول حالياً.\n\nاستخدم `/follow <المعرف>` للمتابعة.", parse_mode="Markdown")
+            return
+        
+        text = f"🔔 **المتداولون المتابَعون ({len(followed)}):**\n\n"
+        for i, trader in enumerate(followed, 1):
+            name = trader.get('nickname') or 'غير محدد'
+            text += f"{i}. {name} - `{trader['encrypted_uid']}`\n"
+        
+        await message.answer(text, parse_mode="Markdown")
+        
+    except Exception as e:
+        logger.error(f"خطأ في عرض المتداولين المتابَعين: {e}")
+        await message.answer("حدث خطأ في جلب القائمة")
+
 @router.callback_query(F.data == "back_to_main")
 async def back_to_main_menu(callback: CallbackQuery):
     """العودة للقائمة الرئيسية"""
@@ -434,8 +597,9 @@ async def process_new_signal(message: Message, state: FSMContext):
         
         signal_text = message.text
         
-        # تحليل الإشارة
-        parsed_signal = signal_parser.parse_signal_text(signal_text)
+        # تحليل الإشارة والتحقق منها (النص المكرر يُعاد من الذاكرة المؤقتة)
+        prepared = await signal_cache.prepare(signal_text, api_manager.binance)
+        parsed_signal = prepared['parsed']
         
         if not parsed_signal['parsed_successfully']:
             error_message = "❌ فشل في تحليل الإشارة:\n\n"
@@ -443,15 +607,9 @@ async def process_new_signal(message: Message, state: FSMContext):
             await message.answer(error_message)
             return
         
-        # التحقق من صحة الإشارة
-        current_price = None
-        if parsed_signal['symbol']:
-            current_price = await api_manager.binance.get_current_price(parsed_signal['symbol'])
-        
-        validation_result = signal_parser.validate_signal_data(parsed_signal, current_price)
-        
-        # تنسيق الإشارة للمعاينة
-        formatted_signal = signal_parser.format_signal_message(parsed_signal, validation_result)
+        current_price = prepared['current_price']
+        validation_result = prepared['validation']
+        formatted_signal = prepared['formatted']
         
         # عرض المعاينة للمسؤول
         preview_message = f"📋 **معاينة الإشارة:**\n\n{formatted_signal}"
@@ -463,6 +621,15 @@ async def process_new_signal(message: Message, state: FSMContext):
         if current_price:
             preview_message += f"\n\n💰 **السعر الحالي:** {current_price:,.2f}"
         
+        duplicate = await db_manager.find_duplicate_signal(
+            parsed_signal.get('content_hash'), SIGNAL_DEDUP_WINDOW_HOURS
+        )
+        if duplicate:
+            preview_message += (
+                f"\n\n🔁 **تنبيه:** إشارة مطابقة أُرسلت مسبقاً "
+                f"(رقم {duplicate['id']} بتاريخ {duplicate['created_date']}) ولن يُعاد إرسالها."
+            )
+        
         preview_message += "\n\n**هل تريد إرسال هذه الإشارة؟**"
         
         # حفظ بيانات الإشارة في الحالة
@@ -501,12 +668,25 @@ async def confirm_send_signal(callback: CallbackQuery, state: FSMContext):
             await callback.answer("لا توجد بيانات إشارة", show_alert=True)
             return
         
+        # منع بث الإشارة نفسها مرتين (تأكيد مزدوج أو إعادة إرسال)
+        content_hash = signal_data.get('content_hash')
+        duplicate = await db_manager.find_duplicate_signal(content_hash, SIGNAL_DEDUP_WINDOW_HOURS)
+        if duplicate or (content_hash and not signal_cache.claim_broadcast(content_hash)):
+            await callback.answer("🔁 هذه الإشارة أُرسلت مسبقاً", show_alert=True)
+            await state.clear()
+            return
+        
         await callback.answer("جاري إرسال الإشارة...")
         
         # حفظ الإشارة في قاعدة البيانات
         signal_data['signal_text'] = formatted_signal
         signal_data['created_by'] = user_id
-        signal_id = await db_manager.save_signal(signal_data)
+        try:
+            signal_id = await db_manager.save_signal(signal_data)
+        finally:
+            # بعد الحفظ يكشف البحث في قاعدة البيانات أي تأكيد لاحق
+            if content_hash:
+                signal_cache.release_broadcast(content_hash)
         
         if signal_id:
             # إرسال الإشارة لجميع المستخدمين المصرح لهم
@@ -521,11 +701,11 @@ async def confirm_send_signal(callback: CallbackQuery, state: FSMContext):
                         formatted_signal,
                         parse_mode="Markdown"
                     )
-                    await db_manager.log_sent_message(target_user_id, "signal", formatted_signal, True)
+                    sent_message_writer.log(target_user_id, "signal", formatted_signal, True)
                     sent_count += 1
                 except Exception as e:
                     logger.error(f"فشل في إرسال الإشارة للمستخدم {target_user_id}: {e}")
-                    await db_manager.log_sent_message(target_user_id, "signal", formatted_signal, False)
+                    sent_message_writer.log(target_user_id, "signal", formatted_signal, False)
                     failed_count += 1
             
             # تقرير النتائج للمسؤول
@@ -566,6 +746,188 @@ async def cancel_signal(callback: CallbackQuery, state: FSMContext):
     except Exception as e:
         logger.error(f"خطأ في إلغاء الإشارة: {e}")
 
+@router.callback_query(F.data == "admin_bulk_import")
+async def admin_bulk_import(callback: CallbackQuery, state: FSMContext):
+    """استيراد مجموعة إشارات دفعة واحدة"""
+    try:
+        user_id = callback.from_user.id
+        
+        if user_id != ADMIN_USER_ID:
+            await callback.answer(MESSAGES["admin_only"], show_alert=True)
+            return
+        
+        await callback.answer()
+        await state.set_state(BotStates.waiting_for_bulk_signals)
+        
+        await callback.message.edit_text(
+            f"""📥 **استيراد إشارات دفعة واحدة**
+
+أرسل الإشارات بإحدى الطرق التالية:
+
+• رسالة نصية تحتوي على عدة إشارات يفصل بينها سطر `---`
+• ملف `.txt` بنفس التنسيق
+• ملف `.csv` يحتوي على عمود `signal_text` (أو نص الإشارة في العمود الأول) وعمود `date` اختياري
+
+⚠️ الحد الأقصى: {BULK_IMPORT_MAX_SIGNALS} إشارة في كل عملية.
+تُحفظ الإشارات كإشارات مستوردة مغلقة دون إرسالها للمستخدمين أو تتبعها،
+بتاريخها المذكور في النص أو في عمود التاريخ، وتُتجاهل الإشارات المحفوظة مسبقاً.""",
+            reply_markup=get_back_keyboard(),
+            parse_mode="Markdown"
+        )
+        
+    except Exception as e:
+        logger.error(f"خطأ في بدء استيراد الإشارات: {e}")
+        await callback.answer("حدث خطأ", show_alert=True)
+
+@router.message(StateFilter(BotStates.waiting_for_bulk_signals))
+async def process_bulk_signals(message: Message, state: FSMContext):
+    """تحليل وحفظ مجموعة إشارات من رسالة أو ملف"""
+    try:
+        user_id = message.from_user.id
+        
+        if user_id != ADMIN_USER_ID:
+            await message.answer(MESSAGES["admin_only"])
+            return
+        
+        # قراءة النصوص من الملف أو الرسالة
+        if message.document:
+            if message.document.file_size and message.document.file_size > BULK_IMPORT_MAX_FILE_SIZE:
+                await message.answer(f"❌ حجم الملف أكبر من الحد المسموح ({BULK_IMPORT_MAX_FILE_SIZE // 1024} كيلوبايت)")
+                return
+            
+            buffer = await message.bot.download(message.document)
+            content = buffer.getvalue().decode('utf-8-sig', errors='replace')
+            file_name = (message.document.file_name or '').lower()
+            if file_name.endswith('.csv'):
+                rows = signal_parser.split_batch_csv(content)
+            else:
+                rows = [(text, None) for text in signal_parser.split_batch_text(content)]
+        elif message.text:
+            rows = [(text, None) for text in signal_parser.split_batch_text(message.text)]
+        else:
+            await message.answer("❌ يرجى إرسال نص أو ملف txt/csv")
+            return
+        
+        texts = [text for text, _ in rows]
+        
+        if not texts:
+            await message.answer("❌ لم يتم العثور على أي إشارة")
+            return
+        
+        if len(texts) > BULK_IMPORT_MAX_SIGNALS:
+            await message.answer(f"❌ عدد الإشارات ({len(texts)}) أكبر من الحد المسموح ({BULK_IMPORT_MAX_SIGNALS})")
+            return
+        
+        status_message = await message.answer(f"⏳ جاري تحليل {len(texts)} إشارة...")
+        
+        # تحليل جميع الإشارات ثم جلب أسعار رموزها في طلب واحد
+        parsed_signals = signal_parser.parse_batch(texts)
+        symbols = [parsed['symbol'] for parsed in parsed_signals if parsed['parsed_successfully']]
+        prices = await api_manager.binance.get_current_prices(symbols) if symbols else {}
+        
+        valid_signals = []
+        errors = []
+        warnings_count = 0
+        
+        for row, (parsed, (text, date_cell)) in enumerate(zip(parsed_signals, rows), 1):
+            if not parsed['parsed_successfully']:
+                errors.append(f"#{row}: " + "، ".join(parsed.get('errors', [])))
+                continue
+            
+            validation_result = signal_parser.validate_signal_data(parsed, prices.get(parsed['symbol']))
+            if not validation_result.get('is_valid'):
+                errors.append(f"#{row} ({parsed['symbol']}): " + "، ".join(validation_result.get('errors', [])))
+                continue
+            
+            if validation_result.get('warnings'):
+                warnings_count += 1
+            
+            # النص الأصلي كما نُشر (التنسيق يضيف وقت الاستيراد كوقت للإشارة)
+            parsed['signal_text'] = text
+            parsed['created_by'] = user_id
+            parsed['content_hash'] = signal_content_hash(parsed)
+            # تاريخ النشر الأصلي من عمود CSV أو من النص (بدونه يبقى فارغاً)
+            parsed['created_date'] = (
+                signal_parser.extract_signal_date(date_cell) or signal_parser.extract_signal_date(text)
+            )
+            valid_signals.append(parsed)
+        
+        saved_count = await db_manager.save_signals_batch(valid_signals)
+        duplicates_count = 0
+        if saved_count is None:
+            errors.append("فشل حفظ الإشارات الصالحة في قاعدة البيانات")
+            saved_count = 0
+        else:
+            duplicates_count = len(valid_signals) - saved_count
+        
+        # تقرير الاستيراد
+        report = f"""📥 تقرير الاستيراد
+
+• إجمالي الإشارات: {len(texts)}
+• تم الحفظ: {saved_count}
+• مكررة (محفوظة مسبقاً): {duplicates_count}
+• مع تحذيرات: {warnings_count}
+• مرفوضة: {len(texts) - len(valid_signals)}"""
+        
+        if errors:
+            report += "\n\n❌ الأخطاء:\n" + "\n".join(errors[:BULK_IMPORT_REPORT_ERRORS])
+            if len(errors) > BULK_IMPORT_REPORT_ERRORS:
+                report += f"\n... و {len(errors) - BULK_IMPORT_REPORT_ERRORS} أخطاء أخرى"
+        
+        # حد طول رسائل تيليجرام
+        await status_message.edit_text(report[:4000], reply_markup=get_admin_keyboard())
+        await state.clear()
+        
+    except Exception as e:
+        logger.error(f"خطأ في استيراد الإشارات: {e}")
+        await message.answer("حدث خطأ في استيراد الإشارات")
+
+@router.message(Command("backtest"))
+async def cmd_backtest(message: Message):
+    """اختبار رجعي للإشارات المخزنة: /backtest [الأيام] [الرمز]"""
+    try:
+        if message.from_user.id != ADMIN_USER_ID:
+            await message.answer(MESSAGES["admin_only"])
+            return
+
+        days = None
+        symbol = None
+        for arg in message.text.split()[1:]:
+            if arg.isdigit():
+                days = int(arg)
+            else:
+                symbol = arg.upper()
+
+        status_message = await message.answer("⏳ جاري الاختبار الرجعي للإشارات...")
+        last_update = 0.0
+
+        async def on_progress(done: int, total: int, results: Dict[str, List[Dict]]):
+            # تحديث الرسالة على فترات لتجنب حد تعديل الرسائل
+            nonlocal last_update
+            now = time.monotonic()
+            if now - last_update < BACKTEST_PROGRESS_INTERVAL:
+                return
+            last_update = now
+            try:
+                await status_message.edit_text(
+                    backtest_runner.format_progress(done, total, results), parse_mode="Markdown"
+                )
+            except Exception as e:
+                logger.debug(f"تعذر تحديث رسالة التقدم: {e}")
+
+        reports = await backtest_runner.run(
+            api_manager.binance, days=days, symbol=symbol, on_progress=on_progress
+        )
+        if reports is None:
+            await status_message.edit_text("⚠️ يوجد اختبار رجعي قيد التشغيل، يرجى الانتظار")
+            return
+
+        await status_message.edit_text(backtest_runner.format_report(reports)[:4000], parse_mode="Markdown")
+
+    except Exception as e:
+        logger.error(f"خطأ في الاختبار الرجعي: {e}")
+        await message.answer("حدث خطأ في الاختبار الرجعي")
+
 # دوال مساعدة
 async def format_market_message(market_data: Dict) -> str:
     """تنسيق رسالة حالة السوق"""
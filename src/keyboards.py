@@ -42,6 +42,10 @@ def get_admin_keyboard() -> InlineKeyboardMarkup:
             InlineKeyboardButton(text="📤 إرسال إشارة", callback_data="admin_send_signal"),
             InlineKeyboardButton(text="📢 رسالة عامة", callback_data="admin_broadcast")
         ],
+        [
+            InlineKeyboardButton(text="📥 استيراد إشارات", callback_data="admin_bulk_import"),
+            InlineKeyboardButton(text="🏅 أداء الإشارات", callback_data="admin_performance")
+        ],
         [
             InlineKeyboardButton(text="🖥️ مراقبة النظام", callback_data="admin_monitoring"),
             InlineKeyboardButton(text="📋 السجلات", callback_data="admin_logs")
@@ -230,9 +234,21 @@ def get_emergency_keyboard() -> InlineKeyboardMarkup:
 
 
 
-def get_top_traders_keyboard() -> InlineKeyboardMarkup:
+def get_top_traders_keyboard(filter_key: str = "weekly_roi", current_page: int = 1, total_pages: int = 1) -> InlineKeyboardMarkup:
     """لوحة أفضل المتداولين"""
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+    buttons = []
+    
+    # أزرار التنقل بين صفحات القائمة المخزنة
+    if total_pages > 1:
+        nav_buttons = []
+        if current_page > 1:
+            nav_buttons.append(InlineKeyboardButton(text="⬅️ السابق", callback_data=f"traders_page_{filter_key}_{current_page-1}"))
+        nav_buttons.append(InlineKeyboardButton(text=f"{current_page}/{total_pages}", callback_data="current_page"))
+        if current_page < total_pages:
+            nav_buttons.append(InlineKeyboardButton(text="➡️ التالي", callback_data=f"traders_page_{filter_key}_{current_page+1}"))
+        buttons.append(nav_buttons)
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons + [
         [
             InlineKeyboardButton(text="📊 أسبوعي (ROI)", callback_data="traders_weekly_roi"),
             InlineKeyboardButton(text="💰 أسبوعي (PNL)", callback_data="traders_weekly_pnl")
@@ -243,7 +259,27 @@ def get_top_traders_keyboard() -> InlineKeyboardMarkup:
         ],
         [
             InlineKeyboardButton(text="👥 الأكثر متابعة", callback_data="traders_most_followed"),
-            InlineKeyboardButton(text="🔄 تحديث البيانات", callback_data="refresh_traders")
+            InlineKeyboardButton(text="🔄 تحديث البيانات", callback_data=f"refresh_traders_{filter_key}_{current_page}")
+        ],
+        [
+            InlineKeyboardButton(text="🎯 نسبة فوز +60%", callback_data="traders_win_rate"),
+            InlineKeyboardButton(text="💼 أصول +100K", callback_data="traders_high_aum")
+        ],
+        [
+            InlineKeyboardButton(text="🧭 إجماع المتداولين", callback_data="consensus")
+        ],
+        [
+            InlineKeyboardButton(text="🔙 العودة", callback_data="back_to_main")
+        ]
+    ])
+    return keyboard
+
+def get_consensus_keyboard() -> InlineKeyboardMarkup:
+    """لوحة شاشة إجماع المتداولين"""
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🔄 تحديث الإجماع", callback_data="refresh_consensus"),
+            InlineKeyboardButton(text="🏆 أفضل المتداولين", callback_data="top_traders")
         ],
         [
             InlineKeyboardButton(text="🔙 العودة", callback_data="back_to_main")
@@ -268,6 +304,18 @@ def get_trader_details_keyboard(encrypted_uid: str) -> InlineKeyboardMarkup:
     ])
     return keyboard
 
+def get_following_keyboard(encrypted_uid: str) -> InlineKeyboardMarkup:
+    """لوحة إدارة متابعة متداول"""
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🔕 إلغاء المتابعة", callback_data=f"unfollow_trader_{encrypted_uid}")
+        ],
+        [
+            InlineKeyboardButton(text="🔙 العودة للقائمة", callback_data="top_traders")
+        ]
+    ])
+    return keyboard
+
 def get_traders_filter_keyboard() -> InlineKeyboardMarkup:
     """لوحة فلترة المتداولين"""
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -0,0 +1,78 @@
+"""
+فهرس مرتب لمستويات الأسعار لاكتشاف المستويات المتجاوزة
+"""
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from typing import Hashable, Iterable, List, Set, Tuple
+
+# مستوى واحد: (السعر، (المالك، النوع، ...))
+Level = Tuple[float, Tuple[Hashable, ...]]
+
+
+class PriceLevelIndex:
+    """
+    مستويات أسعار مرتبة لرمز واحد (دخول، أهداف، وقف خسارة)
+
+    حركة السعر من p0 إلى p1 تُرجع المستويات المتجاوزة فقط بترتيب
+    مسار السعر في O(log n + k) حيث k عدد المستويات المتجاوزة.
+    مفتاح كل مستوى يبدأ بمعرف مالكه (الإشارة) لحذف مستوياته معاً.
+    """
+
+    def __init__(self, levels: Iterable[Level] = ()):
+        ordered = sorted(levels, key=itemgetter(0))
+        self._prices: List[float] = [price for price, _ in ordered]
+        self._keys: List[Tuple[Hashable, ...]] = [key for _, key in ordered]
+
+        # حذف كسول: المستويات تبقى في القوائم حتى الضغط التالي
+        self._removed: Set[Hashable] = set()
+        self._removed_levels = 0
+
+    def add(self, price: float, key: Tuple[Hashable, ...]):
+        """إضافة مستوى مع الحفاظ على الترتيب"""
+        position = bisect_right(self._prices, price)
+        self._prices.insert(position, price)
+        self._keys.insert(position, key)
+
+    def discard(self, owner: Hashable, level_count: int = 1):
+        """حذف جميع مستويات مالك واحد"""
+        if owner in self._removed:
+            return
+        self._removed.add(owner)
+        self._removed_levels += level_count
+        if self._removed_levels * 2 > len(self._prices):
+            self._compact()
+
+    def _compact(self):
+        """إزالة المستويات المحذوفة فعلياً من القوائم"""
+        removed = self._removed
+        kept = [(price, key) for price, key in zip(self._prices, self._keys) if key[0] not in removed]
+        self._prices = [price for price, _ in kept]
+        self._keys = [key for _, key in kept]
+        self._removed = set()
+        self._removed_levels = 0
+
+    def crossed(self, old_price: float, new_price: float) -> List[Level]:
+        """
+        المستويات التي عبرها السعر بين قراءتين
+
+        الصعود يشمل المستويات في (p0, p1] والهبوط يشمل [p1, p0)،
+        والنتيجة مرتبة بحسب اتجاه الحركة.
+        """
+        prices = self._prices
+        if new_price > old_price:
+            start = bisect_right(prices, old_price)
+            end = bisect_right(prices, new_price)
+            span = range(start, end)
+        elif new_price < old_price:
+            start = bisect_left(prices, new_price)
+            end = bisect_left(prices, old_price)
+            span = range(end - 1, start - 1, -1)
+        else:
+            return []
+
+        keys = self._keys
+        removed = self._removed
+        return [(prices[i], keys[i]) for i in span if keys[i][0] not in removed]
+
+    def __len__(self) -> int:
+        return len(self._prices) - self._removed_levels
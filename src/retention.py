@@ -0,0 +1,143 @@
+"""
+الاحتفاظ بسجل الرسائل المرسلة: أرشفة السجلات القديمة وحذفها وتفريغ المساحة
+"""
+import asyncio
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from .database import DatabaseManager, db_manager
+from config.config import (
+    SENT_MESSAGES_RETENTION_DAYS, RETENTION_ARCHIVE_DIR, RETENTION_BATCH_SIZE,
+    RETENTION_INTERVAL, RETENTION_VACUUM_PAGES
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionManager:
+    """
+    نقل سجلات الإرسال الأقدم من retention_days يوماً إلى ملفات أرشيف
+
+    كل دفعة تُكتب أولاً في ملف الشهر (sent_messages_YYYY-MM.jsonl.gz) ثم
+    تُجمع في sent_messages_daily وتُحذف في معاملة قصيرة، فلا يُحجز قفل
+    الكتابة إلا لدفعة واحدة في كل مرة. إذا توقف البوت بين الكتابة والحذف
+    تُؤرشف الدفعة مرة ثانية في التشغيل التالي ولا تضيع.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager = db_manager,
+        retention_days: int = SENT_MESSAGES_RETENTION_DAYS,
+        archive_dir: str = RETENTION_ARCHIVE_DIR,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        interval: int = RETENTION_INTERVAL,
+        vacuum_pages: int = RETENTION_VACUUM_PAGES
+    ):
+        self.db = db
+        self.retention_days = retention_days
+        self.archive_dir = Path(archive_dir)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.retention_active = False
+
+    def cutoff(self) -> str:
+        """بداية أقدم يوم محتفظ به (بتوقيت UTC مثل sent_date)"""
+        return (datetime.now(timezone.utc).date() - timedelta(days=self.retention_days)).isoformat()
+
+    def archive_path(self, sent_date: str) -> Path:
+        return self.archive_dir / f"sent_messages_{sent_date[:7]}.jsonl.gz"
+
+    def _write_archive(self, rows: List[Dict]):
+        """إلحاق السجلات بملفات أشهرها (كل إلحاق عضو gzip مستقل يقرؤه gzip.open)"""
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+        by_path: Dict[Path, List[Dict]] = {}
+        for row in rows:
+            by_path.setdefault(self.archive_path(row['sent_date']), []).append(row)
+
+        for path, items in by_path.items():
+            with gzip.open(path, 'at', encoding='utf-8') as archive:
+                for row in items:
+                    archive.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    async def archive_expired(self) -> int:
+        """
+        أرشفة وحذف جميع السجلات المنتهية على دفعات
+
+        Returns:
+            عدد السجلات المؤرشفة
+        """
+        cutoff = self.cutoff()
+        loop = asyncio.get_running_loop()
+        archived = 0
+
+        while True:
+            rows = await self.db.get_expired_sent_messages(cutoff, self.batch_size)
+            if not rows:
+                break
+
+            await loop.run_in_executor(None, self._write_archive, rows)
+            if not await self.db.delete_sent_messages([row['id'] for row in rows]):
+                break
+            archived += len(rows)
+
+            # إفساح المجال لعمليات الكتابة الأخرى بين الدفعات
+            await asyncio.sleep(0)
+
+        return archived
+
+    async def vacuum(self) -> int:
+        """
+        إرجاع الصفحات الفارغة للنظام على خطوات قصيرة
+
+        لا يُستدعى شيء إذا لم تكن القاعدة بوضع INCREMENTAL (تحذير واحد عند البدء).
+
+        Returns:
+            عدد الصفحات المُرجعة
+        """
+        freed = 0
+        if not self.db.incremental_vacuum_enabled:
+            return freed
+        while True:
+            result = await self.db.incremental_vacuum(self.vacuum_pages)
+            if not result or not result[0]:
+                break
+            freed += result[0]
+            if not result[1]:
+                break
+            await asyncio.sleep(0)
+        return freed
+
+    async def run(self) -> Dict[str, int]:
+        """تشغيل واحد: أرشفة ثم تفريغ"""
+        archived = await self.archive_expired()
+        freed = await self.vacuum() if archived else 0
+
+        if archived:
+            logger.info(f"تمت أرشفة {archived} سجل إرسال وإرجاع {freed} صفحة")
+        return {'archived': archived, 'freed_pages': freed}
+
+    async def start_retention(self):
+        """أرشفة دورية لسجل الرسائل المرسلة"""
+        logger.info("بدء الأرشفة الدورية لسجل الرسائل المرسلة...")
+        self.retention_active = True
+
+        while self.retention_active:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"خطأ في أرشفة سجل الرسائل المرسلة: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stop_retention(self):
+        """إيقاف الأرشفة الدورية"""
+        self.retention_active = False
+        logger.info("تم إيقاف الأرشفة الدورية لسجل الرسائل المرسلة")
+
+# إنشاء مثيل عام
+retention_manager = RetentionManager()
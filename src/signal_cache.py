@@ -0,0 +1,134 @@
+"""
+ذاكرة مؤقتة لنتائج تحليل الإشارات وكشف الإشارات المكررة
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from .signal_parser import signal_parser
+from config.config import SIGNAL_CACHE_TTL, SIGNAL_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(signal_text: str) -> str:
+    """بصمة النص بعد توحيد المسافات وحالة الأحرف"""
+    normalized = " ".join(signal_text.lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def signal_content_hash(parsed_data: Dict) -> str:
+    """
+    بصمة محتوى الإشارة من حقولها المستخرجة
+
+    نصان مختلفان في التنسيق لنفس الرمز والاتجاه والأسعار يعطيان البصمة نفسها.
+    """
+    content = [
+        parsed_data.get('symbol'),
+        parsed_data.get('direction'),
+        parsed_data.get('entry_price_min'),
+        parsed_data.get('entry_price_max'),
+        parsed_data.get('stop_loss'),
+        sorted(parsed_data.get('targets') or []),
+    ]
+    return hashlib.sha256(json.dumps(content).encode('utf-8')).hexdigest()
+
+
+class SignalCache:
+    """
+    نتائج التحليل والتحقق والسعر لكل نص إشارة لفترة قصيرة
+
+    إعادة إرسال النص نفسه (بعد تعديل أو فشل التأكيد) تعيد المعاينة
+    دون تحليل أو طلب سعر جديد. الرسالة المنسقة لا تُخزن لأنها تحمل
+    وقت الإشارة، فتُنسق من جديد في كل معاينة.
+    """
+
+    def __init__(self, ttl: float = SIGNAL_CACHE_TTL, max_entries: int = SIGNAL_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+        # بصمات الإشارات التي يجري بثها الآن لمنع التأكيد المزدوج
+        self._broadcasting: Set[str] = set()
+
+    def get(self, signal_text: str) -> Optional[Dict]:
+        """نتيجة مخزنة لم تنتهِ صلاحيتها"""
+        key = text_hash(signal_text)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry['cached_at'] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, signal_text: str, entry: Dict):
+        entry['cached_at'] = time.monotonic()
+        key = text_hash(signal_text)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def prepare(self, signal_text: str, price_client) -> Dict:
+        """
+        تحليل الإشارة والتحقق منها مع استخدام النتيجة المخزنة إن وجدت ثم تنسيقها
+
+        Returns:
+            {'parsed', 'validation', 'formatted', 'current_price', 'cached'}
+            ويحمل parsed بصمة المحتوى في content_hash عند نجاح التحليل
+        """
+        entry = self.get(signal_text)
+        cached = entry is not None
+        if not cached:
+            entry = await self._analyze(signal_text, price_client)
+
+        parsed = entry['parsed']
+        formatted = None
+        if parsed['parsed_successfully']:
+            formatted = signal_parser.format_signal_message(parsed, entry['validation'])
+
+        return {
+            'parsed': dict(parsed),
+            'validation': entry['validation'],
+            'formatted': formatted,
+            'current_price': entry['current_price'],
+            'cached': cached
+        }
+
+    async def _analyze(self, signal_text: str, price_client) -> Dict:
+        """تحليل النص وجلب السعر والتحقق، وتخزين النتيجة عند نجاح جلب السعر"""
+        parsed = signal_parser.parse_signal_text(signal_text)
+        entry = {'parsed': parsed, 'validation': None, 'current_price': None}
+
+        if parsed['parsed_successfully']:
+            parsed['content_hash'] = signal_content_hash(parsed)
+            if parsed['symbol']:
+                entry['current_price'] = await price_client.get_current_price(parsed['symbol'])
+            entry['validation'] = signal_parser.validate_signal_data(parsed, entry['current_price'])
+
+            # لا تُخزن النتائج التي فشل فيها جلب السعر حتى يُعاد المحاولة
+            if entry['current_price'] is not None or not parsed['symbol']:
+                self.put(signal_text, entry)
+
+        return entry
+
+    def claim_broadcast(self, content_hash: str) -> bool:
+        """حجز بث إشارة (False إذا كانت الإشارة نفسها قيد البث)"""
+        if content_hash in self._broadcasting:
+            return False
+        self._broadcasting.add(content_hash)
+        return True
+
+    def release_broadcast(self, content_hash: str):
+        self._broadcasting.discard(content_hash)
+
+    def clear(self):
+        self._entries.clear()
+
+# إنشاء مثيل عام
+signal_cache = SignalCache()
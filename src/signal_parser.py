@@ -2,49 +2,271 @@
 محلل نصوص الإشارات
 """
 import re
+import io
+import csv
+import time
 import logging
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, timezone
+
+import pytz
+
+from config.config import MAX_SIGNAL_LENGTH, SIGNAL_PARSE_TIMEOUT, TIMEZONE
 
 logger = logging.getLogger(__name__)
 
+# كلمات العناوين لكل حقل (الأطول أولاً حتى لا يطغى الجزء على الكل)
+_LABELS = {
+    'SYMBOL': r'الزوج|زوج|pair|symbol',
+    'DIRECTION': r'الاتجاه|اتجاه|direction',
+    'ENTRY': r'نقطة\s+الدخول|سعر\s+الدخول|منطقة\s+الدخول|entry\s+targets?|entry\s+price|entry\s+zone|entry'
+             r'|(?:buy|sell)\s+zone|الدخول|دخول',
+    'STOP_LOSS': r'وقف\s+الخسارة|stop\s+targets?|stop[\s-]*loss|stop|sl|الوقف|وقف',
+    'TARGETS': r'أهداف\s+البيع|أهداف\s+الشراء|الأهداف|أهداف|take\s+profits?|targets?|tp',
+    'SUPPORT': r'الدعم|support|دعم',
+    'RESISTANCE': r'المقاومة|resistance|مقاومة',
+}
+
+# نمط المسح الموحد: يُترجم مرة واحدة ويمر على النص (بأحرف صغيرة) مرة واحدة.
+# كل بديل إما محدود الطول أو مُتبوع بحرف لا يمكن أن يبدأ به تكراره، لذلك
+# لا يوجد تراجع متداخل ويبقى زمن المسح خطياً في طول النص. النظرة الأمامية
+# في البداية تتجاوز المسافات والرموز التعبيرية دون تجربة كل البدائل.
+_TOKEN_PATTERN = re.compile(
+    r'(?=[\w#$\n])(?:'
+    r'(?P<NEWLINE>\n[ \t]*(?:\n[ \t]*)*)'
+    r'|(?P<KEYCAP>\d\ufe0f?\u20e3)'
+    r'|(?P<LIST>\d{1,2}[.)](?=\s))'
+    r'|(?P<TARGET_MARK>tp?\d{1,2}\b|(?:targets?|take[\s-]*profit)\s*\d{1,2}(?=\s*[:)-])'
+    r'|(?:ال)?هدف\s*\d{1,2}\b|(?:ال)?هدف\s+(?:ال)?(?:أول|ثاني|ثالث|رابع|خامس)\b)'
+    + ''.join(f'|(?P<L_{kind}>(?:{alternatives})\\b)' for kind, alternatives in _LABELS.items()) +
+    r'|(?P<PAIR>[a-z]{2,10}/?usdt?\b)'
+    r'|(?P<HASHTAG>[#$][a-z]{2,10}\b)'
+    r'|(?P<DIRECTION>(?:buy|sell|long|short|شراء|بيع)\b)'
+    r'|(?P<NUMBER>\d{1,3}(?:,\d{3}(?!\d)){1,5}(?:\.\d{1,12})?|\d{1,15}(?:\.\d{1,12})?)'
+    r'|(?P<WORD>[^\W\d_]+)'
+    r')'
+)
+
+# عدد الوحدات بين كل فحص للمهلة الزمنية
+_DEADLINE_CHECK_EVERY = 64
+
+# فاصل الإشارات في الاستيراد الجماعي: سطر من --- أو === أو ___
+_BATCH_SEPARATOR = re.compile(r'^[ \t]*[-=_]{3,}[ \t]*$', re.MULTILINE)
+
+# أسماء عمود نص الإشارة المقبولة في ملفات CSV
+_CSV_TEXT_COLUMNS = ('signal_text', 'signal', 'text')
+
+# أسماء عمود تاريخ الإشارة المقبولة في ملفات CSV
+_CSV_DATE_COLUMNS = ('created_date', 'signal_date', 'date', 'timestamp', 'time')
+
+# تاريخ نشر الإشارة: 2025-01-05 [14:30[:00]] أو 05/01/2025 [14:30[:00]] (اليوم أولاً)
+_DATE_PATTERN = re.compile(
+    r'\b(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?'
+    r'|\b(\d{1,2})/(\d{1,2})/(\d{4})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?'
+)
+
+# الحقول التي تُقرأ كقائمة أرقام بعد العنوان وتنتهي بنهاية السطر
+_LINE_LISTS = ('ENTRY', 'SUPPORT', 'RESISTANCE')
+
+# كلمات الربط في نطاق دخول بدون عنوان ("شراء من 100 إلى 105") لا تنهي القائمة
+_RANGE_WORDS = {'من', 'إلى', 'الى', 'from', 'to'}
+
+_DIRECTIONS = {
+    'BUY': 'BUY', 'LONG': 'BUY', 'شراء': 'BUY',
+    'SELL': 'SELL', 'SHORT': 'SELL', 'بيع': 'SELL'
+}
+
+
+def _normalize_symbol(raw: str) -> str:
+    """توحيد رمز العملة إلى صيغة XXXUSDT"""
+    symbol = raw.upper().replace('/', '').lstrip('#$')
+    if symbol.endswith('USD'):
+        return symbol + 'T'
+    if not symbol.endswith('USDT'):
+        symbol += 'USDT'
+    return symbol
+
+
+def _list_numbers(value: str) -> List[float]:
+    """
+    أرقام وحدة NUMBER داخل قائمة (دخول، أهداف، دعم، مقاومة)
+    
+    الفاصلة فاصل آلاف إذا تلتها ثلاثة أرقام بالضبط ("61,500")، لكن وحدة
+    بفاصلتين أو أكثر دون كسر عشري ("100,200,300") قائمة أرقام بلا مسافات،
+    فلا يوجد سعر عملة بالملايين مقابل USDT.
+    """
+    if value.count(',') >= 2 and '.' not in value:
+        return [float(group) for group in value.split(',')]
+    return [float(value.replace(',', ''))]
+
+
+class SignalParseTimeout(Exception):
+    """تجاوز تحليل الإشارة المهلة المحددة"""
+
+
+class SignalToken:
+    """وحدة مصنفة من نص الإشارة"""
+
+    __slots__ = ('kind', 'value', 'rank')
+
+    def __init__(self, kind: str, value, rank: int = 0):
+        self.kind = kind  # SYMBOL, DIRECTION, ENTRY, STOP_LOSS, TARGET, SUPPORT, RESISTANCE
+        self.value = value
+        self.rank = rank  # 0 = بعد عنوان صريح، الأعلى = تخمين أضعف
+
+    def __repr__(self) -> str:
+        return f"SignalToken({self.kind}, {self.value!r}, rank={self.rank})"
+
+
 class SignalParser:
-    """محلل الإشارات التلقائي"""
+    """محلل الإشارات التلقائي (مرور واحد على النص)"""
     
-    def __init__(self):
-        # أنماط التعبيرات النمطية لاستخراج البيانات
-        self.patterns = {
-            'symbol': [
-                r'(?:زوج|الزوج|pair):\s*([A-Z]{3,10}/?USDT?)',
-                r'([A-Z]{3,10}/?USDT?)',
-                r'#([A-Z]{3,10})',
-            ],
-            'direction': [
-                r'(?:اتجاه|direction):\s*(BUY|SELL|شراء|بيع|LONG|SHORT)',
-                r'(BUY|SELL|شراء|بيع|LONG|SHORT)',
-            ],
-            'entry_price': [
-                r'(?:نقطة الدخول|entry|دخول):\s*([\d,.\-\s]+)',
-                r'(?:entry price|دخول):\s*([\d,.\-\s]+)',
-                r'(?:buy|شراء).*?([\d,.\-\s]+)',
-            ],
-            'stop_loss': [
-                r'(?:وقف الخسارة|stop loss|sl):\s*([\d,.]+)',
-                r'(?:stop|وقف).*?([\d,.]+)',
-            ],
-            'targets': [
-                r'(?:أهداف|targets?|take profit|tp):\s*(.*?)(?:\n|$)',
-                r'(?:T\d+|هدف\s*\d*):\s*([\d,.]+)',
-                r'(\d+)\s*[️⃣]\s*T\d+:\s*([\d,.]+)',
-            ],
-            'support': [
-                r'(?:الدعم|support):\s*([\d,.\-\s]+)',
-                r'(?:دعم).*?([\d,.\-\s]+)',
-            ],
-            'resistance': [
-                r'(?:المقاومة|resistance):\s*([\d,.\-\s]+)',
-                r'(?:مقاومة).*?([\d,.\-\s]+)',
-            ]
+    def __init__(self, max_length: int = MAX_SIGNAL_LENGTH, timeout: float = SIGNAL_PARSE_TIMEOUT):
+        self.max_length = max_length
+        self.timeout = timeout
+    
+    def tokenize(self, signal_text: str) -> List[SignalToken]:
+        """
+        تقسيم نص الإشارة إلى وحدات مصنفة في مرور واحد
+        
+        يمر النمط الموحد على النص مرة واحدة، وتُجمع الأرقام التي تلي
+        كل عنوان في قائمة حتى يظهر عنوان أو كلمة أخرى.
+        
+        Raises:
+            SignalParseTimeout: إذا تجاوز المسح المهلة المحددة
+        """
+        deadline = time.perf_counter() + self.timeout
+        tokens: List[SignalToken] = []
+        append = tokens.append
+        flush = self._flush
+        context = None          # الحقل الجاري جمع أرقامه
+        context_rank = 0
+        numbers: List[float] = []
+        pending_label = None    # عنوان SYMBOL أو DIRECTION ينتظر قيمته
+        pending_target = False  # علامة هدف (T1 أو 1️⃣) تنتظر رقمها
+        line_start = True       # لتمييز ترقيم القوائم "1." عن الأرقام
+        
+        for count, match in enumerate(_TOKEN_PATTERN.finditer(signal_text.lower()), 1):
+            if not count % _DEADLINE_CHECK_EVERY and time.perf_counter() > deadline:
+                raise SignalParseTimeout(f"تجاوز التحليل {self.timeout} ثانية بعد {count} وحدة")
+            
+            kind = match.lastgroup
+            value = match.group()
+            
+            if kind == 'NEWLINE':
+                line_start = True
+                pending_target = False
+                # القوائم السطرية تنتهي بنهاية السطر (الأهداف قد تمتد لعدة أسطر)
+                if context in _LINE_LISTS and (numbers or context_rank):
+                    flush(tokens, context, numbers, context_rank)
+                    context = None
+                continue
+            
+            if kind == 'LIST' and not line_start:
+                # "5. " في منتصف السطر رقم وليس ترقيماً
+                kind, value = 'NUMBER', value[:-1]
+            line_start = False
+            
+            if kind == 'NUMBER':
+                if not context and not pending_target:
+                    continue
+                if context == 'STOP_LOSS':
+                    append(SignalToken('STOP_LOSS', float(value.replace(',', '')), context_rank))
+                    context = None
+                elif context:
+                    numbers.extend(_list_numbers(value))
+                elif pending_target:
+                    append(SignalToken('TARGET', float(value.replace(',', ''))))
+                    pending_target = False
+                continue
+            
+            if kind in ('KEYCAP', 'LIST', 'TARGET_MARK'):
+                if context and context != 'TARGETS':
+                    flush(tokens, context, numbers, context_rank)
+                    context = None
+                pending_target = True
+                continue
+            
+            if kind == 'WORD' and context == 'ENTRY' and value in _RANGE_WORDS:
+                continue
+            
+            # أي وحدة أخرى تنهي قائمة الأرقام الحالية
+            if context:
+                flush(tokens, context, numbers, context_rank)
+                context = None
+            pending_target = False
+            
+            if kind.startswith('L_'):
+                label = kind[2:]
+                if label in ('SYMBOL', 'DIRECTION'):
+                    pending_label = label
+                else:
+                    context, context_rank = label, 0
+                    
+            elif kind == 'PAIR':
+                append(SignalToken('SYMBOL', _normalize_symbol(value), 0 if pending_label == 'SYMBOL' else 1))
+                if pending_label == 'SYMBOL':
+                    pending_label = None
+                    
+            elif kind == 'HASHTAG':
+                append(SignalToken('SYMBOL', _normalize_symbol(value), 2))
+                
+            elif kind == 'DIRECTION':
+                direction = value.upper()
+                append(SignalToken('DIRECTION', _DIRECTIONS[direction], 0 if pending_label == 'DIRECTION' else 1))
+                if pending_label == 'DIRECTION':
+                    pending_label = None
+                # "BUY 61500" أو "SHORT 61500" بدون عنوان دخول: الأرقام التالية مباشرة تعتبر دخولاً
+                context, context_rank = 'ENTRY', 1
+                    
+            elif kind == 'WORD' and pending_label == 'SYMBOL' and value.isascii() and 2 <= len(value) <= 10:
+                # "الزوج: BTC" بدون لاحقة USDT
+                append(SignalToken('SYMBOL', _normalize_symbol(value), 0))
+                pending_label = None
+        
+        flush(tokens, context, numbers, context_rank)
+        return tokens
+    
+    @staticmethod
+    def _flush(tokens: List[SignalToken], context: Optional[str], numbers: List[float], rank: int):
+        """تحويل الأرقام المجمعة بعد عنوان إلى وحدة مصنفة"""
+        if not context or not numbers:
+            numbers.clear()
+            return
+        
+        if context == 'TARGETS':
+            tokens.extend(SignalToken('TARGET', number) for number in numbers)
+        elif context in _LINE_LISTS:
+            tokens.append(SignalToken(context, list(numbers), rank))
+        numbers.clear()
+    
+    def _extract_fields(self, signal_text: str) -> Dict:
+        """ملء حقول الإشارة من الوحدات المصنفة"""
+        best: Dict[str, SignalToken] = {}
+        targets: List[float] = []
+        support_levels: List[float] = []
+        resistance_levels: List[float] = []
+        
+        for token in self.tokenize(signal_text):
+            kind = token.kind
+            if kind == 'TARGET':
+                targets.append(token.value)
+            elif kind == 'SUPPORT':
+                support_levels.extend(token.value)
+            elif kind == 'RESISTANCE':
+                resistance_levels.extend(token.value)
+            elif kind not in best or token.rank < best[kind].rank:
+                # أول قيمة بأعلى ثقة لكل حقل مفرد
+                best[kind] = token
+        
+        return {
+            'symbol': best['SYMBOL'].value if 'SYMBOL' in best else None,
+            'direction': best['DIRECTION'].value if 'DIRECTION' in best else None,
+            'entry_prices': sorted(best['ENTRY'].value) if 'ENTRY' in best else [],
+            'stop_loss': best['STOP_LOSS'].value if 'STOP_LOSS' in best else None,
+            'targets': sorted(set(targets))[:5],  # أقصى 5 أهداف
+            'support_levels': sorted(set(support_levels)),
+            'resistance_levels': sorted(set(resistance_levels), reverse=True)
         }
     
     def parse_signal_text(self, signal_text: str) -> Dict:
@@ -64,22 +286,35 @@ class SignalParser:
                 'errors': []
             }
             
+            # رفض النصوص الطويلة قبل أي مسح
+            if len(signal_text) > self.max_length:
+                result['errors'].append(f"نص الإشارة أطول من الحد المسموح ({len(signal_text)} > {self.max_length} حرف)")
+                logger.warning(f"تم رفض إشارة بطول {len(signal_text)} حرف")
+                return result
+            
+            try:
+                fields = self._extract_fields(signal_text)
+            except SignalParseTimeout as e:
+                result['errors'].append("انتهت مهلة تحليل الإشارة")
+                logger.warning(f"انتهت مهلة تحليل الإشارة: {e}")
+                return result
+            
             # استخراج الرمز
-            symbol = self._extract_symbol(signal_text)
+            symbol = fields['symbol']
             if symbol:
                 result['symbol'] = symbol
             else:
                 result['errors'].append("لم يتم العثور على رمز العملة")
             
             # استخراج الاتجاه
-            direction = self._extract_direction(signal_text)
+            direction = fields['direction']
             if direction:
                 result['direction'] = direction
             else:
                 result['errors'].append("لم يتم العثور على اتجاه التداول")
             
             # استخراج سعر الدخول
-            entry_prices = self._extract_entry_price(signal_text)
+            entry_prices = fields['entry_prices']
             if entry_prices:
                 result['entry_price_min'] = entry_prices[0]
                 result['entry_price_max'] = entry_prices[1] if len(entry_prices) > 1 else entry_prices[0]
@@ -87,25 +322,25 @@ class SignalParser:
                 result['errors'].append("لم يتم العثور على سعر الدخول")
             
             # استخراج وقف الخسارة
-            stop_loss = self._extract_stop_loss(signal_text)
+            stop_loss = fields['stop_loss']
             if stop_loss:
                 result['stop_loss'] = stop_loss
             else:
                 result['errors'].append("لم يتم العثور على وقف الخسارة")
             
             # استخراج الأهداف
-            targets = self._extract_targets(signal_text)
+            targets = fields['targets']
             if targets:
                 result['targets'] = targets
             else:
                 result['errors'].append("لم يتم العثور على أهداف الربح")
             
             # استخراج مستويات الدعم
-            support_levels = self._extract_support_levels(signal_text)
+            support_levels = fields['support_levels']
             result['support_levels'] = support_levels
             
             # استخراج مستويات المقاومة
-            resistance_levels = self._extract_resistance_levels(signal_text)
+            resistance_levels = fields['resistance_levels']
             result['resistance_levels'] = resistance_levels
             
             # تحديد نجاح التحليل
@@ -127,119 +362,73 @@ class SignalParser:
                 'raw_text': signal_text
             }
     
-    def _extract_symbol(self, text: str) -> Optional[str]:
-        """استخراج رمز العملة"""
-        for pattern in self.patterns['symbol']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                symbol = match.group(1).upper().replace('/', '')
-                # تأكد من أن الرمز ينتهي بـ USDT
-                if not symbol.endswith('USDT'):
-                    symbol += 'USDT'
-                return symbol
-        return None
+    def split_batch_text(self, text: str) -> List[str]:
+        """تقسيم رسالة أو ملف نصي يحتوي على عدة إشارات مفصولة بسطر ---"""
+        return [block.strip() for block in _BATCH_SEPARATOR.split(text) if block.strip()]
     
-    def _extract_direction(self, text: str) -> Optional[str]:
-        """استخراج اتجاه التداول"""
-        for pattern in self.patterns['direction']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                direction = match.group(1).upper()
-                # توحيد الاتجاهات
-                if direction in ['BUY', 'شراء', 'LONG']:
-                    return 'BUY'
-                elif direction in ['SELL', 'بيع', 'SHORT']:
-                    return 'SELL'
-        return None
-    
-    def _extract_entry_price(self, text: str) -> List[float]:
-        """استخراج أسعار الدخول"""
-        prices = []
-        for pattern in self.patterns['entry_price']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                price_text = match.group(1)
-                # استخراج الأرقام من النص
-                numbers = re.findall(r'[\d,.]+', price_text)
-                for num in numbers:
-                    try:
-                        price = float(num.replace(',', ''))
-                        prices.append(price)
-                    except ValueError:
-                        continue
-                if prices:
-                    break
+    def split_batch_csv(self, text: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        قراءة نصوص الإشارات وتواريخها من ملف CSV
         
-        return sorted(prices) if prices else []
-    
-    def _extract_stop_loss(self, text: str) -> Optional[float]:
-        """استخراج وقف الخسارة"""
-        for pattern in self.patterns['stop_loss']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    return float(match.group(1).replace(',', ''))
-                except ValueError:
-                    continue
-        return None
-    
-    def _extract_targets(self, text: str) -> List[float]:
-        """استخراج أهداف الربح"""
-        targets = []
+        يُستخدم عمود signal_text أو signal أو text إن وُجد في الترويسة،
+        وإلا يُعتبر العمود الأول نص الإشارة في كل صف. خلية التاريخ تُقرأ
+        من عمود created_date أو date أو ما يماثلها إن وُجد.
         
-        # البحث عن الأهداف بأنماط مختلفة
-        target_patterns = [
-            r'(\d+)[️⃣]\s*T\d+:\s*([\d,.]+)',  # 1️⃣ T1: 62,200
-            r'T(\d+):\s*([\d,.]+)',             # T1: 62,200
-            r'هدف\s*(\d+):\s*([\d,.]+)',        # هدف 1: 62,200
-            r'(\d+)\.\s*([\d,.]+)',             # 1. 62,200
-        ]
+        Returns:
+            قائمة (نص الإشارة، خلية التاريخ أو None)
+        """
+        rows = list(csv.reader(io.StringIO(text)))
+        if not rows:
+            return []
         
-        for pattern in target_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                try:
-                    target_num = int(match[0])
-                    target_price = float(match[1].replace(',', ''))
-                    targets.append(target_price)
-                except (ValueError, IndexError):
-                    continue
+        header = [cell.strip().lower() for cell in rows[0]]
+        column = next((header.index(name) for name in _CSV_TEXT_COLUMNS if name in header), None)
+        date_column = next((header.index(name) for name in _CSV_DATE_COLUMNS if name in header), None)
+        if column is not None or date_column is not None:
+            rows = rows[1:]
+        if column is None:
+            column = 1 if date_column == 0 else 0
         
-        # إزالة المكررات وترتيب
-        targets = sorted(list(set(targets)))
-        return targets[:5]  # أقصى 5 أهداف
+        return [
+            (
+                row[column].strip(),
+                (row[date_column].strip() or None) if date_column is not None and len(row) > date_column else None
+            )
+            for row in rows if len(row) > column and row[column].strip()
+        ]
     
-    def _extract_support_levels(self, text: str) -> List[float]:
-        """استخراج مستويات الدعم"""
-        levels = []
-        for pattern in self.patterns['support']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                level_text = match.group(1)
-                numbers = re.findall(r'[\d,.]+', level_text)
-                for num in numbers:
-                    try:
-                        level = float(num.replace(',', ''))
-                        levels.append(level)
-                    except ValueError:
-                        continue
-        return sorted(list(set(levels)))
+    def extract_signal_date(self, text: str) -> Optional[str]:
+        """
+        تاريخ نشر الإشارة المذكور في نصها أو في خلية CSV
+        
+        يُفسر بالمنطقة الزمنية للبوت (TIMEZONE) مثل "⏰ وقت الإشارة" في رسائله،
+        ويُعاد بتوقيت UTC بصيغة created_date، أو None إذا لم يوجد تاريخ صالح.
+        """
+        if not text:
+            return None
+        
+        match = _DATE_PATTERN.search(text[:self.max_length])
+        if not match:
+            return None
+        
+        groups = match.groups()
+        if groups[0]:
+            year, month, day, hour, minute, second = groups[:6]
+        else:
+            day, month, year, hour, minute, second = groups[6:]
+        
+        try:
+            moment = datetime(
+                int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0)
+            )
+        except ValueError:
+            return None
+        moment = pytz.timezone(TIMEZONE).localize(moment)
+        return moment.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
     
-    def _extract_resistance_levels(self, text: str) -> List[float]:
-        """استخراج مستويات المقاومة"""
-        levels = []
-        for pattern in self.patterns['resistance']:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                level_text = match.group(1)
-                numbers = re.findall(r'[\d,.]+', level_text)
-                for num in numbers:
-                    try:
-                        level = float(num.replace(',', ''))
-                        levels.append(level)
-                    except ValueError:
-                        continue
-        return sorted(list(set(levels)), reverse=True)
+    def parse_batch(self, texts: List[str]) -> List[Dict]:
+        """تحليل مجموعة إشارات دفعة واحدة (النتائج بنفس ترتيب النصوص)"""
+        return [self.parse_signal_text(text) for text in texts]
     
     def validate_signal_data(self, parsed_data: Dict, current_price: float = None) -> Dict:
         """التحقق من صحة بيانات الإشارة"""
@@ -340,7 +529,7 @@ class SignalParser:
             
             message = f"""🎯 **إشارة تداول - SPOT**
 
-**⏰ وقت الإشارة:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**⏰ وقت الإشارة:** {datetime.now(pytz.timezone(TIMEZONE)).strftime('%Y-%m-%d %H:%M:%S')}
 **🪙 الزوج:** {symbol}
 **↗️ الاتجاه:** {direction_ar}
 
@@ -0,0 +1,269 @@
+"""
+تتبع الإشارات النشطة مقابل الأسعار الحية
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .database import db_manager
+from .level_index import PriceLevelIndex
+from config.config import SIGNAL_TRACKER_INTERVAL, SIGNAL_TRACKER_RELOAD_EVERY
+
+logger = logging.getLogger(__name__)
+
+
+class SignalBook:
+    """
+    الإشارات النشطة لرمز واحد كمصفوفات متوازية
+
+    أول سعر بعد التحميل يُقيَّم مقابل جميع الإشارات بعمليات على المصفوفات.
+    بعدها يحدد فهرس المستويات الإشارات التي عبر السعر حد دخولها أو أحد
+    أهدافها أو وقف خسارتها، فلا تُفحص إلا هذه الإشارات. أعلى ربح يبقى
+    عملية واحدة على المصفوفات لأنه يتغير مع كل حركة في صالح الصفقة.
+    """
+
+    def __init__(self, signals: List[Dict], use_index: bool = True):
+        count = len(signals)
+        width = max((len(signal['targets']) for signal in signals), default=0) or 1
+        self.use_index = use_index
+
+        self.ids = np.array([signal['id'] for signal in signals], dtype=np.int64)
+        self.side = np.array([1.0 if signal['direction'] == 'BUY' else -1.0 for signal in signals])
+        self.entry_min = np.array([signal['entry_price_min'] for signal in signals], dtype=float)
+        self.entry_max = np.array(
+            [signal['entry_price_max'] or signal['entry_price_min'] for signal in signals], dtype=float
+        )
+        self.entry_price = (self.entry_min + self.entry_max) / 2
+        self.stop_loss = np.array([signal['stop_loss'] for signal in signals], dtype=float)
+
+        # الأهداف في مصفوفة ثنائية مع NaN للخانات الفارغة
+        self.targets = np.full((count, width), np.nan)
+        for row, signal in enumerate(signals):
+            self.targets[row, :len(signal['targets'])] = signal['targets']
+        self.target_counts = np.array([len(signal['targets']) for signal in signals], dtype=np.int64)
+
+        self.entered = np.array([signal.get('entered', False) for signal in signals], dtype=bool)
+        self.targets_hit = np.array([signal.get('targets_hit', 0) for signal in signals], dtype=np.int64)
+        self.max_profit = np.array([signal.get('max_profit_percent', 0) for signal in signals], dtype=float)
+        self.stop_hit = np.zeros(count, dtype=bool)
+        self.active = np.ones(count, dtype=bool)
+        self.active_count = count
+
+        self.rows = {signal_id: row for row, signal_id in enumerate(self.ids.tolist())}
+        self.index = PriceLevelIndex(self._levels() if use_index else ())
+        self.last_price: Optional[float] = None
+
+    def __len__(self) -> int:
+        return self.active_count
+
+    def _levels(self):
+        """مستويات كل إشارة: حد الدخول ووقف الخسارة والأهداف"""
+        for row, signal_id in enumerate(self.ids.tolist()):
+            buy = self.side[row] > 0
+            yield float(self.entry_max[row] if buy else self.entry_min[row]), (signal_id, 'entry')
+            yield float(self.stop_loss[row]), (signal_id, 'stop')
+            for column in range(self.target_counts[row]):
+                yield float(self.targets[row, column]), (signal_id, 'target')
+
+    def _scan_all(self, price: float) -> Tuple[np.ndarray, np.ndarray]:
+        """تقييم كامل لجميع الإشارات"""
+        side = self.side
+
+        # الدخول: وصول السعر إلى نطاق الدخول أو تجاوزه في اتجاه الصفقة
+        reached = self.active & np.where(side > 0, price <= self.entry_max, price >= self.entry_min)
+        newly_entered = reached & ~self.entered
+        self.entered = self.entered | reached
+
+        # عدد الأهداف التي تجاوزها السعر (خانات NaN لا تُحتسب)
+        hits = (side[:, None] * (price - self.targets) >= 0).sum(axis=1)
+        targets_hit = np.where(self.entered, np.maximum(self.targets_hit, hits), self.targets_hit)
+        new_hits = targets_hit != self.targets_hit
+        self.targets_hit = targets_hit
+
+        self.stop_hit = self.entered & (side * (price - self.stop_loss) <= 0)
+        all_targets = self.entered & (self.target_counts > 0) & (targets_hit >= self.target_counts)
+        completed = self.active & (self.stop_hit | all_targets)
+
+        changed = self.active & (newly_entered | new_hits | completed)
+        return np.flatnonzero(changed), np.flatnonzero(completed)
+
+    def _scan_crossed(self, price: float) -> Tuple[List[int], List[int]]:
+        """تقييم الإشارات التي عبر السعر أحد مستوياتها منذ القراءة السابقة فقط"""
+        rising = price > self.last_price
+        changed = set()
+        completed = set()
+
+        # المستويات مرتبة حسب مسار السعر، فالدخول يسبق وقف الخسارة في نفس الهبوط
+        for _, (signal_id, kind) in self.index.crossed(self.last_price, price):
+            row = self.rows[signal_id]
+
+            # الحركة في صالح الصفقة: صعود للشراء وهبوط للبيع
+            favorable = rising == (self.side[row] > 0)
+
+            if kind == 'entry':
+                if not favorable and not self.entered[row]:
+                    self.entered[row] = True
+                    changed.add(row)
+
+            elif not self.entered[row]:
+                continue
+
+            elif kind == 'stop':
+                if not favorable:
+                    self.stop_hit[row] = True
+                    completed.add(row)
+                    changed.add(row)
+
+            elif favorable:  # target
+                hits = int((self.side[row] * (price - self.targets[row]) >= 0).sum())
+                if hits > self.targets_hit[row]:
+                    self.targets_hit[row] = hits
+                    changed.add(row)
+                if hits >= self.target_counts[row]:
+                    completed.add(row)
+
+        return sorted(changed), sorted(completed)
+
+    def evaluate(self, price: float) -> Tuple[List[Tuple], List[int]]:
+        """
+        تقييم إشارات الرمز مقابل سعر جديد
+
+        Returns:
+            (صفوف signal_stats المتغيرة، معرفات الإشارات المكتملة)
+        """
+        if self.last_price is None or not self.use_index:
+            changed, completed = self._scan_all(price)
+        else:
+            changed, completed = self._scan_crossed(price)
+        self.last_price = price
+
+        # أعلى ربح للإشارات الداخلة (بما فيها المكتملة الآن)
+        profit = self.side * (price - self.entry_price) / self.entry_price * 100
+        improved = self.active & self.entered & (profit > self.max_profit)
+        self.max_profit = np.where(improved, profit, self.max_profit)
+        changed = np.union1d(changed, np.flatnonzero(improved)).astype(np.int64)
+
+        for row in completed:
+            self.active[row] = False
+            self.index.discard(int(self.ids[row]), 2 + int(self.target_counts[row]))
+        self.active_count -= len(completed)
+
+        rows = []
+        for row in changed:
+            if self.active[row]:
+                final_result = 'pending'
+            else:
+                final_result = 'profit' if self.targets_hit[row] > 0 else 'loss'
+            rows.append((
+                int(self.ids[row]), float(price), int(self.targets_hit[row]),
+                float(self.max_profit[row]), int(self.stop_hit[row]), final_result
+            ))
+
+        return rows, [int(self.ids[row]) for row in completed]
+
+
+class SignalTracker:
+    """تتبع الإشارات النشطة وتحديث جدول signal_stats على دفعات"""
+
+    def __init__(
+        self,
+        interval: int = SIGNAL_TRACKER_INTERVAL,
+        reload_every: int = SIGNAL_TRACKER_RELOAD_EVERY
+    ):
+        self.interval = interval
+        self.reload_every = reload_every
+        self.tracking_active = False
+
+        self.books: Dict[str, SignalBook] = {}
+        self.last_tick: Optional[datetime] = None
+        self._ticks = 0
+        self._needs_reload = True
+
+    async def reload(self) -> int:
+        """تحميل الإشارات النشطة من قاعدة البيانات وتجميعها حسب الرمز"""
+        signals = await db_manager.get_active_signals_with_stats()
+
+        by_symbol: Dict[str, List[Dict]] = {}
+        for signal in signals:
+            if not signal['symbol'] or not signal['entry_price_min'] or not signal['stop_loss']:
+                continue
+            by_symbol.setdefault(signal['symbol'], []).append(signal)
+
+        self.books = {symbol: SignalBook(items) for symbol, items in by_symbol.items()}
+        self._needs_reload = False
+        return sum(len(book) for book in self.books.values())
+
+    def evaluate_prices(self, prices: Dict[str, float]) -> Tuple[List[Tuple], List[int]]:
+        """تقييم الأسعار الجديدة لكل الرموز المتتبعة"""
+        stats_rows: List[Tuple] = []
+        completed_ids: List[int] = []
+
+        for symbol, price in prices.items():
+            book = self.books.get(symbol)
+            if book is None or not price:
+                continue
+
+            rows, completed = book.evaluate(price)
+            stats_rows.extend(rows)
+            completed_ids.extend(completed)
+            if not len(book):
+                del self.books[symbol]
+
+        return stats_rows, completed_ids
+
+    async def tick(self, price_client) -> int:
+        """
+        تحديث واحد: جلب أسعار جميع الرموز في طلب واحد ثم تقييمها
+
+        Returns:
+            عدد صفوف الإحصائيات المحدثة
+        """
+        if self._needs_reload or self._ticks % self.reload_every == 0:
+            tracked = await self.reload()
+            logger.debug(f"تم تحميل {tracked} إشارة نشطة للتتبع")
+        self._ticks += 1
+
+        if not self.books:
+            return 0
+
+        prices = await price_client.get_current_prices(list(self.books))
+        stats_rows, completed_ids = self.evaluate_prices(prices)
+        self.last_tick = datetime.now()
+
+        if not stats_rows and not completed_ids:
+            return 0
+
+        if not await db_manager.save_signal_stats_batch(stats_rows, completed_ids):
+            # الحالة في الذاكرة تقدمت على قاعدة البيانات
+            self._needs_reload = True
+            return 0
+
+        if completed_ids:
+            logger.info(f"اكتملت {len(completed_ids)} إشارة")
+        return len(stats_rows)
+
+    async def start_tracking(self, price_client):
+        """بدء التتبع الدوري للإشارات النشطة"""
+        logger.info("بدء تتبع الإشارات النشطة...")
+        self.tracking_active = True
+
+        while self.tracking_active:
+            try:
+                await self.tick(price_client)
+                await asyncio.sleep(self.interval)
+
+            except Exception as e:
+                logger.error(f"خطأ في تتبع الإشارات: {e}")
+                self._needs_reload = True
+                await asyncio.sleep(60)  # انتظار دقيقة في حالة الخطأ
+
+    def stop_tracking(self):
+        """إيقاف التتبع الدوري"""
+        self.tracking_active = False
+        logger.info("تم إيقاف تتبع الإشارات")
+
+# إنشاء مثيل عام
+signal_tracker = SignalTracker()
@@ -5,11 +5,40 @@ import aiohttp
 import asyncio
 import json
 import logging
+import re
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from .trader_records import TraderRecord, LeaderboardTable
+
 logger = logging.getLogger(__name__)
 
+# عدد العناصر في كل صفحة عند جلب نتائج Apify
+DATASET_PAGE_SIZE = 100
+
+# الحقول المستخدمة من قائمة أفضل المتداولين فقط
+LEADERBOARD_FIELDS = [
+    "nickName", "rank", "pnl", "roi", "positionShared",
+    "encryptedUid", "followerCount", "updateTime", "winRate", "aum"
+]
+
+# معرف المتداول المشفر في Binance: 32 خانة ست عشرية
+TRADER_UID_PATTERN = re.compile(r'^[0-9A-F]{32}$')
+
+# عدد المتداولين المخزنين لكل فترة/نوع تداول، ومدة صلاحيتها بالثواني
+LEADERBOARD_CACHE_SIZE = 100
+LEADERBOARD_CACHE_TTL = 600
+
+def normalize_trader_uid(value: str) -> Optional[str]:
+    """
+    توحيد معرف المتداول والتحقق من صيغته
+
+    Returns:
+        المعرف بأحرف كبيرة، أو None إذا لم يكن معرفاً صالحاً (مثل معرفات العينة)
+    """
+    uid = (value or "").strip().upper()
+    return uid if TRADER_UID_PATTERN.match(uid) else None
+
 class TopTradersAPI:
     """عميل API لجلب بيانات أفضل المتداولين"""
     
@@ -18,6 +47,9 @@ class TopTradersAPI:
         self.base_url = "https://api.apify.com/v2"
         self.actor_id = "muhammetakkurtt/binance-leaderboard-scraper"
         self.session = None
+        
+        # (الفترة، نوع التداول، المشاركون فقط) -> (الجدول، وقت الجلب)
+        self._leaderboard_cache: Dict[tuple, tuple] = {}
     
     async def init_session(self):
         """تهيئة الجلسة"""
@@ -31,9 +63,9 @@ class TopTradersAPI:
         trade_type: str = "PERPETUAL",
         is_shared: bool = True,
         limit: int = 100
-    ) -> Optional[List[Dict]]:
+    ) -> Optional[LeaderboardTable]:
         """
-        الحصول على قائمة أفضل المتداولين
+        الحصول على قائمة أفضل المتداولين كجدول عمودي مضغوط
         
         Args:
             period_type: DAILY, WEEKLY, MONTHLY, ALL
@@ -41,6 +73,9 @@ class TopTradersAPI:
             trade_type: OPTIONS, PERPETUAL, DELIVERY
             is_shared: المتداولون الذين يشاركون مراكزهم فقط
             limit: عدد المتداولين المطلوب (افتراضي 100)
+        
+        Returns:
+            جدول المتداولين، أو None إذا فشل الجلب
         """
         try:
             await self.init_session()
@@ -67,23 +102,59 @@ class TopTradersAPI:
             ) as response:
                 if response.status != 201:
                     logger.error(f"فشل في تشغيل Actor: {response.status}")
-                    return await self._get_sample_data()
+                    return None
                 
                 run_data = await response.json()
                 run_id = run_data["data"]["id"]
                 
                 # انتظار اكتمال التشغيل
-                result = await self._wait_for_completion(run_id)
+                # جلب العدد المطلوب فقط من الحقول المستخدمة
+                result = await self._wait_for_completion(run_id, limit=limit, fields=LEADERBOARD_FIELDS)
                 
                 if result:
-                    # تحديد العدد المطلوب
-                    return result[:limit] if len(result) > limit else result
+                    return LeaderboardTable.from_payload(result)
                 else:
-                    return await self._get_sample_data()
+                    return None
                 
         except Exception as e:
             logger.error(f"خطأ في جلب بيانات أفضل المتداولين: {e}")
-            return await self._get_sample_data()
+            return None
+    
+    async def get_leaderboard(
+        self,
+        period_type: str = "WEEKLY",
+        trade_type: str = "PERPETUAL",
+        is_shared: bool = True,
+        force_refresh: bool = False
+    ) -> Optional[LeaderboardTable]:
+        """
+        الحصول على قائمة المتداولين المخزنة لفترة ونوع تداول
+        
+        الترتيب والفلترة والتقسيم تتم محلياً عبر LeaderboardTable.query،
+        لذلك لا يُطلب الـ Actor إلا لتركيبة فترة/نوع تداول جديدة أو منتهية الصلاحية.
+        """
+        key = (period_type, trade_type, is_shared)
+        cached = self._leaderboard_cache.get(key)
+        now = datetime.now().timestamp()
+        
+        if cached and not force_refresh and now - cached[1] < LEADERBOARD_CACHE_TTL:
+            return cached[0]
+        
+        table = await self.get_top_traders(
+            period_type=period_type,
+            statistics_type="ROI",
+            trade_type=trade_type,
+            is_shared=is_shared,
+            limit=LEADERBOARD_CACHE_SIZE
+        )
+        
+        if table:
+            self._leaderboard_cache[key] = (table, now)
+        elif cached:
+            # الاحتفاظ بالبيانات القديمة إذا فشل التحديث
+            return cached[0]
+        
+        return table
     
     async def get_trader_positions(self, encrypted_uids: List[str]) -> Optional[List[Dict]]:
         """
@@ -124,8 +195,27 @@ class TopTradersAPI:
             logger.error(f"خطأ في جلب مراكز المتداولين: {e}")
             return None
     
-    async def _wait_for_completion(self, run_id: str, max_wait: int = 60) -> Optional[List[Dict]]:
-        """انتظار اكتمال تشغيل الـ Actor"""
+    @staticmethod
+    def iter_positions(item: Dict) -> List[tuple]:
+        """استخراج أزواج (معرف المتداول، المركز) من عنصر بيانات Apify مهما كان شكله"""
+        uid = item.get('encryptedUid')
+        if item.get('symbol'):
+            return [(uid, item)]
+        
+        for key in ('positions', 'otherPositionRetList', 'positionList'):
+            positions = item.get(key)
+            if isinstance(positions, list):
+                return [(position.get('encryptedUid', uid), position) for position in positions]
+        return []
+    
+    async def _wait_for_completion(
+        self,
+        run_id: str,
+        max_wait: int = 60,
+        limit: int = None,
+        fields: List[str] = None
+    ) -> Optional[List[Dict]]:
+        """انتظار اكتمال تشغيل الـ Actor ثم جلب النتائج"""
         try:
             wait_time = 0
             while wait_time < max_wait:
@@ -146,7 +236,7 @@ class TopTradersAPI:
                     if status == "SUCCEEDED":
                         # جلب النتائج
                         dataset_id = status_data["data"]["defaultDatasetId"]
-                        return await self._get_dataset_items(dataset_id)
+                        return await self._get_dataset_items(dataset_id, limit=limit, fields=fields)
                     
                     elif status == "FAILED":
                         logger.error("فشل في تشغيل Actor")
@@ -163,25 +253,76 @@ class TopTradersAPI:
             logger.error(f"خطأ في انتظار اكتمال Actor: {e}")
             return None
     
-    async def _get_dataset_items(self, dataset_id: str) -> Optional[List[Dict]]:
-        """جلب عناصر البيانات من Dataset"""
+    async def _get_dataset_items(
+        self,
+        dataset_id: str,
+        limit: int = None,
+        fields: List[str] = None,
+        page_size: int = DATASET_PAGE_SIZE
+    ) -> Optional[List[Dict]]:
+        """
+        جلب عناصر البيانات من Dataset على صفحات
+        
+        تُطلب الصفحات بصيغة JSONL ويُفك ترميز كل سطر فور وصوله،
+        ويتوقف الجلب بمجرد الوصول إلى العدد المطلوب.
+        
+        Args:
+            dataset_id: معرف الـ Dataset
+            limit: الحد الأقصى لعدد العناصر (None = جميع العناصر)
+            fields: الحقول المطلوبة فقط لتقليل حجم الاستجابة
+            page_size: عدد العناصر في كل صفحة
+        """
         try:
             items_url = f"{self.base_url}/datasets/{dataset_id}/items"
             headers = {}
             if self.apify_token:
                 headers["Authorization"] = f"Bearer {self.apify_token}"
             
-            async with self.session.get(items_url, headers=headers) as response:
-                if response.status != 200:
-                    logger.error(f"خطأ في جلب عناصر البيانات: {response.status}")
-                    return None
+            items = []
+            offset = 0
+            
+            while limit is None or len(items) < limit:
+                page_limit = page_size if limit is None else min(page_size, limit - len(items))
+                params = {
+                    "format": "jsonl",
+                    "clean": "true",
+                    "offset": offset,
+                    "limit": page_limit
+                }
+                if fields:
+                    params["fields"] = ",".join(fields)
+                
+                page_count = 0
+                async with self.session.get(items_url, headers=headers, params=params) as response:
+                    if response.status != 200:
+                        logger.error(f"خطأ في جلب عناصر البيانات: {response.status}")
+                        return items or None
+                    
+                    # فك ترميز كل سطر فور وصوله بدلاً من تحميل الاستجابة كاملة
+                    async for line in response.content:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        items.append(json.loads(line))
+                        page_count += 1
+                        if limit is not None and len(items) >= limit:
+                            break
                 
-                return await response.json()
+                # صفحة ناقصة تعني نهاية البيانات
+                if page_count < page_limit:
+                    break
+                offset += page_count
+            
+            return items
                 
         except Exception as e:
             logger.error(f"خطأ في جلب عناصر البيانات: {e}")
             return None
     
+    async def get_sample_leaderboard(self) -> LeaderboardTable:
+        """جدول تجريبي للعرض فقط عند تعذر الجلب (لا يُخزن ولا يُستخدم لجلب المراكز)"""
+        return LeaderboardTable.from_payload(await self._get_sample_data())
+    
     async def _get_sample_data(self) -> List[Dict]:
         """بيانات عينة في حالة فشل API"""
         return [
@@ -237,9 +378,19 @@ class TopTradersAPI:
             }
         ]
     
-    async def format_top_traders_message(self, traders_data: List[Dict], period: str = "WEEKLY") -> str:
-        """تنسيق رسالة أفضل المتداولين"""
+    async def format_top_traders_message(
+        self,
+        traders_data: LeaderboardTable,
+        period: str = "WEEKLY",
+        statistics_type: str = "ROI",
+        start_rank: int = 1,
+        total: int = None
+    ) -> str:
+        """تنسيق رسالة أفضل المتداولين (صفحة واحدة من 10 متداولين)"""
         try:
+            if not isinstance(traders_data, LeaderboardTable):
+                traders_data = LeaderboardTable.from_payload(traders_data or [])
+            
             if not traders_data:
                 return "❌ لا توجد بيانات متداولين متاحة حالياً"
             
@@ -250,22 +401,30 @@ class TopTradersAPI:
                 "ALL": "الإجمالي"
             }.get(period, "الأسبوعي")
             
-            message = f"""🏆 **أفضل 10 متداولين - التصنيف {period_ar}**
+            statistics_ar = {
+                "ROI": "العائد على الاستثمار (ROI)",
+                "PNL": "الربح/الخسارة (PNL)",
+                "FOLLOWERS": "عدد المتابعين",
+                "WIN_RATE": "نسبة الفوز",
+                "AUM": "الأصول المُدارة (AUM)"
+            }.get(statistics_type, "العائد على الاستثمار (ROI)")
+            
+            message = f"""🏆 **أفضل المتداولين - التصنيف {period_ar}**
 
-📈 **بناءً على العائد على الاستثمار (ROI)**
+📈 **بناءً على {statistics_ar}**
 
 """
             
             # عرض أفضل 10 متداولين
-            top_10 = traders_data[:10]
+            top_10 = traders_data.head(10)
             
-            for i, trader in enumerate(top_10, 1):
+            for i, trader in enumerate(top_10, start_rank):
                 rank_emoji = {1: "🥇", 2: "🥈", 3: "🥉"}.get(i, "🏅")
                 
-                nickname = trader.get('nickName', 'غير محدد')[:20]  # تحديد طول الاسم
-                roi = trader.get('roi', 0)
-                pnl = trader.get('pnl', 0)
-                followers = trader.get('followerCount', 0)
+                nickname = trader.nickname[:20]  # تحديد طول الاسم
+                roi = trader.roi
+                pnl = trader.pnl
+                followers = trader.follower_count
                 
                 # تنسيق الأرقام
                 roi_formatted = f"{roi:+.2f}%" if roi else "0.00%"
@@ -275,18 +434,20 @@ class TopTradersAPI:
 • العائد: {roi_formatted}
 • الربح/الخسارة: ${pnl_formatted}
 • المتابعون: {followers:,}
+• المعرف: `{trader.encrypted_uid}`
 
 """
             
             message += f"""---
 📊 **إحصائيات إضافية:**
-• إجمالي المتداولين: {len(traders_data)}
-• متوسط العائد: {sum(t.get('roi', 0) for t in top_10) / len(top_10):+.2f}%
-• إجمالي الأرباح: ${sum(t.get('pnl', 0) for t in top_10):+,.2f}
+• إجمالي المتداولين: {total if total is not None else len(traders_data)}
+• متوسط العائد: {top_10.roi_mean():+.2f}%
+• إجمالي الأرباح: ${top_10.pnl_total():+,.2f}
 
 ⏰ **آخر تحديث:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
-💡 **ملاحظة:** هذه البيانات من Binance Futures Leaderboard وتُحدث بانتظام."""
+💡 **ملاحظة:** هذه البيانات من Binance Futures Leaderboard وتُحدث بانتظام.
+🔔 لمتابعة مراكز متداول: `/follow <المعرف>`"""
             
             return message
             
@@ -294,14 +455,17 @@ class TopTradersAPI:
             logger.error(f"خطأ في تنسيق رسالة أفضل المتداولين: {e}")
             return "❌ خطأ في تنسيق البيانات"
     
-    async def get_trader_analysis(self, trader_data: Dict) -> str:
+    async def get_trader_analysis(self, trader_data: TraderRecord) -> str:
         """تحليل بيانات متداول محدد"""
         try:
-            nickname = trader_data.get('nickName', 'غير محدد')
-            rank = trader_data.get('rank', 0)
-            roi = trader_data.get('roi', 0)
-            pnl = trader_data.get('pnl', 0)
-            followers = trader_data.get('followerCount', 0)
+            if not isinstance(trader_data, TraderRecord):
+                trader_data = TraderRecord.from_payload(trader_data)
+            
+            nickname = trader_data.nickname
+            rank = trader_data.rank
+            roi = trader_data.roi
+            pnl = trader_data.pnl
+            followers = trader_data.follower_count
             
             # تحليل الأداء
             performance_level = "ممتاز" if roi > 30 else "جيد" if roi > 15 else "متوسط" if roi > 0 else "ضعيف"
@@ -0,0 +1,237 @@
+"""
+تنبيهات تغير مراكز المتداولين المتابَعين
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Any
+
+from .database import db_manager
+from .db_writers import sent_message_writer
+from .top_traders_api import top_traders_api, normalize_trader_uid
+from config.config import (
+    TRADER_ALERTS_INTERVAL, TRADER_ALERTS_BATCH_SIZE,
+    DELIVERY_BATCH_SIZE, DELIVERY_BATCH_DELAY
+)
+
+logger = logging.getLogger(__name__)
+
+# حالة مركز واحد: (الرمز، الاتجاه) -> (الكمية، سعر الدخول)
+PositionState = Dict[Tuple[str, str], Tuple[float, float]]
+
+
+class TraderAlertPipeline:
+    """استطلاع مراكز المتداولين المتابَعين وإرسال تنبيهات التغيير"""
+
+    def __init__(
+        self,
+        poll_interval: int = TRADER_ALERTS_INTERVAL,
+        batch_size: int = TRADER_ALERTS_BATCH_SIZE
+    ):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.polling_active = False
+
+        # آخر حالة معروفة لمراكز كل متداول
+        self._last_state: Dict[str, PositionState] = {}
+        self.last_poll: Optional[datetime] = None
+
+    @staticmethod
+    def _build_state(positions: List[Dict]) -> PositionState:
+        """تحويل قائمة المراكز إلى حالة قابلة للمقارنة"""
+        state: PositionState = {}
+        for position in positions:
+            try:
+                symbol = str(position.get('symbol', '')).upper()
+                amount = float(position.get('amount') or 0)
+                entry_price = float(position.get('entryPrice') or 0)
+            except (TypeError, ValueError):
+                continue
+
+            if not symbol or amount == 0:
+                continue
+
+            side = 'LONG' if amount > 0 else 'SHORT'
+            state[(symbol, side)] = (abs(amount), entry_price)
+        return state
+
+    @staticmethod
+    def diff_positions(old: PositionState, new: PositionState) -> List[Dict[str, Any]]:
+        """مقارنة حالتين واستخراج أحداث الفتح والإغلاق وتغير الحجم"""
+        events = []
+
+        for key, (amount, entry_price) in new.items():
+            symbol, side = key
+            if key not in old:
+                events.append({
+                    'type': 'opened', 'symbol': symbol, 'side': side,
+                    'amount': amount, 'entry_price': entry_price
+                })
+            elif old[key][0] != amount:
+                events.append({
+                    'type': 'increased' if amount > old[key][0] else 'decreased',
+                    'symbol': symbol, 'side': side,
+                    'old_amount': old[key][0], 'amount': amount, 'entry_price': entry_price
+                })
+
+        for key, (amount, entry_price) in old.items():
+            if key not in new:
+                symbol, side = key
+                events.append({
+                    'type': 'closed', 'symbol': symbol, 'side': side,
+                    'amount': amount, 'entry_price': entry_price
+                })
+
+        return events
+
+    @staticmethod
+    def group_positions(uids: List[str], items: List[Dict]) -> Tuple[Dict[str, List[Dict]], Dict[str, str]]:
+        """
+        تجميع المراكز حسب المتداول
+
+        يُحتسب المتداول حاضراً فقط إذا ظهر في النتيجة (ولو بلا مراكز)، فلا
+        يُعامل غيابه عن نتيجة جزئية كإغلاق لجميع مراكزه.
+
+        Returns:
+            (المراكز لكل متداول حاضر، الأسماء المستعارة)
+        """
+        wanted = set(uids)
+        positions_by_uid: Dict[str, List[Dict]] = {}
+        nicknames: Dict[str, str] = {}
+        for item in items:
+            uid = item.get('encryptedUid')
+            if uid in wanted:
+                positions_by_uid.setdefault(uid, [])
+                if item.get('nickName'):
+                    nicknames[uid] = item['nickName']
+            for position_uid, position in top_traders_api.iter_positions(item):
+                if position_uid in wanted:
+                    positions_by_uid.setdefault(position_uid, []).append(position)
+        return positions_by_uid, nicknames
+
+    async def poll_once(self, bot) -> int:
+        """
+        استطلاع واحد لجميع المتداولين المتابَعين
+
+        يتم استطلاع كل متداول مرة واحدة مهما كان عدد متابعيه،
+        ثم تُجمع التنبيهات في رسالة واحدة لكل مستخدم.
+
+        Returns:
+            عدد الرسائل المرسلة
+        """
+        followers = await db_manager.get_trader_followers()
+
+        # نسيان حالة المتداولين الذين لم يعد لهم متابعون
+        for uid in list(self._last_state):
+            if uid not in followers:
+                del self._last_state[uid]
+
+        if not followers:
+            return 0
+
+        # المعرفات غير الصالحة (متابعات سابقة للتحقق) لا تُرسل للـ Actor المدفوع
+        uids = [uid for uid in followers if normalize_trader_uid(uid) == uid]
+        pending: Dict[int, List[str]] = {}
+
+        for i in range(0, len(uids), self.batch_size):
+            chunk = uids[i:i + self.batch_size]
+            items = await top_traders_api.get_trader_positions(chunk)
+            if items is None:
+                logger.warning(f"تعذر جلب مراكز {len(chunk)} متداول، سيتم المحاولة لاحقاً")
+                continue
+
+            positions_by_uid, nicknames = self.group_positions(chunk, items)
+
+            # المتداول الغائب عن نتيجة جزئية تبقى حالته السابقة كما هي
+            missing = len(chunk) - len(positions_by_uid)
+            if missing:
+                logger.warning(f"لم تُرجع مراكز {missing} متداول، سيتم المحاولة لاحقاً")
+
+            for uid, positions in positions_by_uid.items():
+                new_state = self._build_state(positions)
+                old_state = self._last_state.get(uid)
+                self._last_state[uid] = new_state
+
+                # أول استطلاع للمتداول يحدد الحالة الأساسية فقط
+                if old_state is None:
+                    continue
+
+                events = self.diff_positions(old_state, new_state)
+                if not events:
+                    continue
+
+                text = self.format_events(nicknames.get(uid, uid[:8]), events)
+                for user_id in followers[uid]:
+                    pending.setdefault(user_id, []).append(text)
+
+        self.last_poll = datetime.now()
+
+        messages = {user_id: "\n\n".join(texts) for user_id, texts in pending.items()}
+        return await self.deliver(bot, messages)
+
+    async def deliver(self, bot, messages: Dict[int, str], message_type: str = "notification") -> int:
+        """إرسال الرسائل على دفعات متزامنة مع فاصل زمني بين الدفعات"""
+        sent_count = 0
+        recipients = list(messages.items())
+
+        async def send(user_id: int, text: str) -> bool:
+            try:
+                await bot.send_message(user_id, text, parse_mode="Markdown")
+                sent_message_writer.log(user_id, message_type, text, True)
+                return True
+            except Exception as e:
+                logger.error(f"فشل في إرسال التنبيه للمستخدم {user_id}: {e}")
+                sent_message_writer.log(user_id, message_type, text, False)
+                return False
+
+        for i in range(0, len(recipients), DELIVERY_BATCH_SIZE):
+            batch = recipients[i:i + DELIVERY_BATCH_SIZE]
+            results = await asyncio.gather(*(send(user_id, text) for user_id, text in batch))
+            sent_count += sum(results)
+
+            if i + DELIVERY_BATCH_SIZE < len(recipients):
+                await asyncio.sleep(DELIVERY_BATCH_DELAY)
+
+        return sent_count
+
+    def format_events(self, nickname: str, events: List[Dict[str, Any]]) -> str:
+        """تنسيق أحداث متداول واحد"""
+        message = f"🔔 **تحديث مراكز المتداول: {nickname}**\n"
+
+        for event in events:
+            side_ar = "شراء 🟢" if event['side'] == 'LONG' else "بيع 🔴"
+            if event['type'] == 'opened':
+                message += f"\n➕ فتح مركز {side_ar} على **{event['symbol']}** بكمية {event['amount']:,.4f} عند {event['entry_price']:,.4f}"
+            elif event['type'] == 'closed':
+                message += f"\n✖️ إغلاق مركز {side_ar} على **{event['symbol']}**"
+            elif event['type'] == 'increased':
+                message += f"\n⬆️ زيادة مركز {side_ar} على **{event['symbol']}**: {event['old_amount']:,.4f} ← {event['amount']:,.4f}"
+            else:
+                message += f"\n⬇️ تقليص مركز {side_ar} على **{event['symbol']}**: {event['old_amount']:,.4f} ← {event['amount']:,.4f}"
+
+        return message
+
+    async def start_polling(self, bot):
+        """بدء الاستطلاع الدوري لمراكز المتداولين المتابَعين"""
+        logger.info("بدء استطلاع مراكز المتداولين المتابَعين...")
+        self.polling_active = True
+
+        while self.polling_active:
+            try:
+                sent_count = await self.poll_once(bot)
+                if sent_count:
+                    logger.info(f"تم إرسال {sent_count} تنبيه لمراكز المتداولين")
+
+                await asyncio.sleep(self.poll_interval)
+
+            except Exception as e:
+                logger.error(f"خطأ في استطلاع مراكز المتداولين: {e}")
+                await asyncio.sleep(60)  # انتظار دقيقة في حالة الخطأ
+
+    def stop_polling(self):
+        """إيقاف الاستطلاع الدوري"""
+        self.polling_active = False
+        logger.info("تم إيقاف استطلاع مراكز المتداولين")
+
+# إنشاء مثيل عام
+trader_alerts = TraderAlertPipeline()
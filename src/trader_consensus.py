@@ -0,0 +1,305 @@
+"""
+محرك إجماع مراكز أفضل المتداولين
+"""
+import logging
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Any
+
+from .top_traders_api import top_traders_api
+from .trader_records import LeaderboardTable
+
+logger = logging.getLogger(__name__)
+
+# ترتيب حقول مساهمة المتداول في رمز واحد (تُجمع وتُطرح كمتجه واحد)
+_LONG_NOTIONAL = 0
+_SHORT_NOTIONAL = 1
+_LEVERAGED_NOTIONAL = 2
+_ENTRY_WEIGHT = 3
+_ENTRY_WEIGHTED_SUM = 4
+_ENTRY_WEIGHTED_SQUARES = 5
+_LONG_TRADERS = 6
+_SHORT_TRADERS = 7
+_VECTOR_SIZE = 8
+
+
+class TraderConsensus:
+    """تجميع مراكز أفضل المتداولين لكل رمز وحساب درجة الإجماع"""
+
+    def __init__(self, top_n: int = 20, cache_ttl: int = 300):
+        self.top_n = top_n
+        self.cache_ttl = cache_ttl
+
+        # مساهمات كل متداول: uid -> {symbol: (vector, min_entry, max_entry)}
+        self._contributions: Dict[str, Dict[str, Tuple[List[float], float, float]]] = {}
+        # المجاميع التراكمية لكل رمز
+        self._totals: Dict[str, List[float]] = {}
+        # المتداولون الذين يملكون مراكز في كل رمز
+        self._holders: Dict[str, set] = {}
+
+        # الرموز التي تغيرت منذ آخر حساب
+        self._dirty: set = set()
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._sorted_rows: Optional[List[Dict[str, Any]]] = None
+
+        self._message_cache: Optional[str] = None
+        self.last_refresh: Optional[datetime] = None
+
+    @staticmethod
+    def _build_contributions(positions: List[Dict]) -> Dict[str, Tuple[List[float], float, float]]:
+        """تحويل مراكز متداول واحد إلى متجهات مساهمة لكل رمز"""
+        contributions = {}
+
+        for position in positions:
+            try:
+                symbol = str(position.get('symbol', '')).upper()
+                amount = float(position.get('amount') or 0)
+                entry_price = float(position.get('entryPrice') or 0)
+                mark_price = float(position.get('markPrice') or entry_price)
+                leverage = float(position.get('leverage') or 1)
+            except (TypeError, ValueError):
+                continue
+
+            if not symbol or amount == 0 or entry_price <= 0:
+                continue
+
+            notional = abs(amount) * mark_price
+            vector, min_entry, max_entry = contributions.get(
+                symbol, ([0.0] * _VECTOR_SIZE, entry_price, entry_price)
+            )
+
+            if amount > 0:
+                vector[_LONG_NOTIONAL] += notional
+                vector[_LONG_TRADERS] = 1
+            else:
+                vector[_SHORT_NOTIONAL] += notional
+                vector[_SHORT_TRADERS] = 1
+
+            vector[_LEVERAGED_NOTIONAL] += notional * leverage
+            vector[_ENTRY_WEIGHT] += notional
+            vector[_ENTRY_WEIGHTED_SUM] += notional * entry_price
+            vector[_ENTRY_WEIGHTED_SQUARES] += notional * entry_price * entry_price
+
+            contributions[symbol] = (vector, min(min_entry, entry_price), max(max_entry, entry_price))
+
+        return contributions
+
+    def _apply(self, uid: str, symbol: str, vector: List[float], sign: int):
+        """إضافة أو طرح مساهمة من مجاميع الرمز"""
+        totals = self._totals.setdefault(symbol, [0.0] * _VECTOR_SIZE)
+        for i, value in enumerate(vector):
+            totals[i] += sign * value
+
+        holders = self._holders.setdefault(symbol, set())
+        if sign > 0:
+            holders.add(uid)
+        else:
+            holders.discard(uid)
+            if not holders:
+                del self._holders[symbol]
+                del self._totals[symbol]
+
+        self._dirty.add(symbol)
+
+    def update_trader_positions(self, uid: str, positions: List[Dict]) -> bool:
+        """
+        تحديث مراكز متداول واحد بشكل تزايدي
+
+        يتم طرح المساهمات القديمة للرموز المتغيرة فقط وإضافة الجديدة،
+        لذلك لا يعاد حساب الرموز التي لم تتغير.
+
+        Returns:
+            True إذا تغيرت مراكز المتداول
+        """
+        new_contributions = self._build_contributions(positions)
+        old_contributions = self._contributions.get(uid, {})
+        changed = False
+
+        for symbol, (vector, _, _) in old_contributions.items():
+            if new_contributions.get(symbol) != old_contributions[symbol]:
+                self._apply(uid, symbol, vector, -1)
+                changed = True
+
+        for symbol, (vector, _, _) in new_contributions.items():
+            if old_contributions.get(symbol) != new_contributions[symbol]:
+                self._apply(uid, symbol, vector, 1)
+                changed = True
+
+        if new_contributions:
+            self._contributions[uid] = new_contributions
+        else:
+            self._contributions.pop(uid, None)
+
+        if changed:
+            self._sorted_rows = None
+            self._message_cache = None
+
+        return changed
+
+    def remove_trader(self, uid: str):
+        """إزالة متداول خرج من قائمة أفضل المتداولين"""
+        self.update_trader_positions(uid, [])
+
+    def _compute_row(self, symbol: str) -> Dict[str, Any]:
+        """حساب صف الإجماع لرمز واحد من مجاميعه"""
+        totals = self._totals[symbol]
+        long_notional = totals[_LONG_NOTIONAL]
+        short_notional = totals[_SHORT_NOTIONAL]
+        gross = long_notional + short_notional
+        weight = totals[_ENTRY_WEIGHT]
+
+        avg_entry = totals[_ENTRY_WEIGHTED_SUM] / weight if weight else 0.0
+        variance = totals[_ENTRY_WEIGHTED_SQUARES] / weight - avg_entry ** 2 if weight else 0.0
+
+        holders = self._holders.get(symbol, ())
+        entries = [self._contributions[uid][symbol] for uid in holders]
+        long_traders = int(round(totals[_LONG_TRADERS]))
+        short_traders = int(round(totals[_SHORT_TRADERS]))
+        traders = len(holders)
+
+        # درجة الإجماع: حصة الاتجاه الغالب من الحجم ومن عدد المتداولين
+        notional_agreement = max(long_notional, short_notional) / gross if gross else 0.0
+        trader_agreement = max(long_traders, short_traders) / (long_traders + short_traders) if traders else 0.0
+
+        return {
+            'symbol': symbol,
+            'traders': traders,
+            'long_traders': long_traders,
+            'short_traders': short_traders,
+            'long_notional': long_notional,
+            'short_notional': short_notional,
+            'net_exposure': long_notional - short_notional,
+            'gross_exposure': gross,
+            'avg_leverage': totals[_LEVERAGED_NOTIONAL] / gross if gross else 0.0,
+            'avg_entry': avg_entry,
+            'entry_std': math.sqrt(max(variance, 0.0)),
+            'min_entry': min(entry[1] for entry in entries) if entries else 0.0,
+            'max_entry': max(entry[2] for entry in entries) if entries else 0.0,
+            'direction': 'LONG' if long_notional >= short_notional else 'SHORT',
+            'agreement_score': (notional_agreement + trader_agreement) / 2 * 100
+        }
+
+    def get_consensus(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """الحصول على صفوف الإجماع مرتبة حسب إجمالي الحجم"""
+        if self._dirty:
+            for symbol in self._dirty:
+                if symbol in self._totals:
+                    self._rows[symbol] = self._compute_row(symbol)
+                else:
+                    self._rows.pop(symbol, None)
+            self._dirty.clear()
+            self._sorted_rows = None
+
+        if self._sorted_rows is None:
+            self._sorted_rows = sorted(
+                self._rows.values(),
+                key=lambda row: row['gross_exposure'],
+                reverse=True
+            )
+
+        return self._sorted_rows[:limit]
+
+    async def refresh(self, traders: Optional[LeaderboardTable] = None) -> bool:
+        """
+        تحديث المراكز من أفضل المتداولين
+
+        المتداولون يؤخذون من الجدول المخزن (get_leaderboard) الذي تعرضه شاشة
+        أفضل المتداولين، فلا تُطلب قائمة منفصلة وتعرض الشاشتان البيانات نفسها.
+        """
+        try:
+            if traders is None:
+                leaderboard = await top_traders_api.get_leaderboard()
+                if leaderboard:
+                    traders, _ = leaderboard.query(sort_by='ROI', limit=self.top_n)
+
+            uids = [uid for uid in (traders.uids if traders else []) if uid][:self.top_n]
+            if not uids:
+                return False
+
+            items = await top_traders_api.get_trader_positions(uids)
+            if items is None:
+                return False
+
+            positions_by_uid: Dict[str, List[Dict]] = {uid: [] for uid in uids}
+            for item in items:
+                for uid, position in top_traders_api.iter_positions(item):
+                    if uid in positions_by_uid:
+                        positions_by_uid[uid].append(position)
+
+            for uid in list(self._contributions):
+                if uid not in positions_by_uid:
+                    self.remove_trader(uid)
+
+            changed = 0
+            for uid, positions in positions_by_uid.items():
+                if self.update_trader_positions(uid, positions):
+                    changed += 1
+
+            self.last_refresh = datetime.now()
+            logger.info(f"تم تحديث إجماع المتداولين: {changed} متداول تغيرت مراكزه")
+            return True
+
+        except Exception as e:
+            logger.error(f"خطأ في تحديث إجماع المتداولين: {e}")
+            return False
+
+    def is_stale(self) -> bool:
+        """هل انتهت صلاحية البيانات المخزنة"""
+        if not self.last_refresh:
+            return True
+        return (datetime.now() - self.last_refresh).total_seconds() > self.cache_ttl
+
+    async def get_consensus_message(self, force_refresh: bool = False) -> str:
+        """رسالة شاشة الإجماع (مخزنة حتى يتغير أي مركز)"""
+        if force_refresh or self.is_stale():
+            await self.refresh()
+
+        if self._message_cache is None or self._dirty:
+            self._message_cache = self.format_consensus_message(self.get_consensus())
+        return self._message_cache
+
+    @staticmethod
+    def _format_price(price: float) -> str:
+        """تنسيق السعر حسب حجمه (العملات الصغيرة تحتاج منازل أكثر)"""
+        return f"{price:,.2f}" if price >= 1 else f"{price:.6f}"
+
+    def format_consensus_message(self, rows: List[Dict[str, Any]]) -> str:
+        """تنسيق رسالة إجماع المتداولين"""
+        try:
+            if not rows:
+                return "❌ لا توجد مراكز مشتركة متاحة حالياً"
+
+            message = f"""🧭 **إجماع أفضل المتداولين**
+
+📊 **بناءً على مراكز أفضل {self.top_n} متداول**
+
+"""
+
+            for row in rows:
+                direction_emoji = "🟢" if row['direction'] == 'LONG' else "🔴"
+                gross = row['gross_exposure']
+                long_share = row['long_notional'] / gross * 100 if gross else 0
+
+                message += f"""{direction_emoji} **{row['symbol']}** - إجماع {row['agreement_score']:.0f}%
+• المتداولون: {row['traders']} (🟢 {row['long_traders']} / 🔴 {row['short_traders']})
+• صافي التعرض: ${row['net_exposure']:+,.0f} (شراء {long_share:.0f}%)
+• متوسط الرافعة: {row['avg_leverage']:.1f}x
+• متوسط الدخول: {self._format_price(row['avg_entry'])} ± {self._format_price(row['entry_std'])}
+• نطاق الدخول: {self._format_price(row['min_entry'])} - {self._format_price(row['max_entry'])}
+
+"""
+
+            updated = self.last_refresh.strftime('%Y-%m-%d %H:%M:%S') if self.last_refresh else 'غير محدد'
+            message += f"""---
+⏰ **آخر تحديث:** {updated}
+
+💡 **ملاحظة:** الإجماع لا يعني صحة الاتجاه. يرجى إدارة المخاطر دائماً."""
+
+            return message
+
+        except Exception as e:
+            logger.error(f"خطأ في تنسيق رسالة الإجماع: {e}")
+            return "❌ خطأ في تنسيق البيانات"
+
+# إنشاء مثيل عام
+trader_consensus = TraderConsensus()
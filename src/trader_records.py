@@ -0,0 +1,260 @@
+"""
+سجلات أفضل المتداولين بتخزين مضغوط وأعمدة رقمية
+"""
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    """تحويل قيمة رقمية من بيانات Apify (قد تكون نصاً أو None)"""
+    if value is None or value == '':
+        return default
+    try:
+        if isinstance(value, str):
+            value = value.replace(',', '').replace('%', '').strip()
+        result = float(value)
+        return result if math.isfinite(result) else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_int(value, default: int = 0) -> int:
+    """تحويل قيمة صحيحة من بيانات Apify"""
+    return int(_to_float(value, default))
+
+
+def _percent_scale(values: Iterable) -> float:
+    """
+    مضاعف النسب المئوية لعمود كامل
+
+    بعض المصادر ترسل 0.65 بدلاً من 65. يُحدد المقياس مرة للعمود كله:
+    كسور فقط إذا كانت جميع القيم بين 0 و 1، فلا تتحول نسبة فعلية مثل
+    0.5% إلى 50% بجانب متداولين آخرين بنسب أكبر.
+    """
+    numbers = [_to_float(value) for value in values if value not in (None, '')]
+    if numbers and any(numbers) and all(0 <= number <= 1 for number in numbers):
+        return 100.0
+    return 1.0
+
+
+# أعمدة الترتيب المتاحة حسب نوع الإحصائية
+SORT_COLUMNS = {
+    'ROI': 'roi',
+    'PNL': 'pnl',
+    'FOLLOWERS': 'followers',
+    'WIN_RATE': 'win_rate',
+    'AUM': 'aum'
+}
+
+
+class TraderRecord:
+    """سجل متداول واحد بحقول ثابتة بدلاً من قاموس JSON"""
+
+    __slots__ = (
+        'encrypted_uid', 'nickname', 'rank', 'roi', 'pnl',
+        'follower_count', 'position_shared', 'update_time',
+        'win_rate', 'aum'
+    )
+
+    def __init__(
+        self,
+        encrypted_uid: str = '',
+        nickname: str = 'غير محدد',
+        rank: int = 0,
+        roi: float = 0.0,
+        pnl: float = 0.0,
+        follower_count: int = 0,
+        position_shared: bool = False,
+        update_time: int = 0,
+        win_rate: float = 0.0,
+        aum: float = 0.0
+    ):
+        self.encrypted_uid = encrypted_uid
+        self.nickname = nickname
+        self.rank = rank
+        self.roi = roi
+        self.pnl = pnl
+        self.follower_count = follower_count
+        self.position_shared = position_shared
+        self.update_time = update_time
+        self.win_rate = win_rate
+        self.aum = aum
+
+    @classmethod
+    def from_payload(cls, item: Dict, win_rate_scale: float = 1.0) -> 'TraderRecord':
+        """
+        فك ترميز عنصر من بيانات Apify مع توحيد الحقول الرقمية
+
+        Args:
+            win_rate_scale: مضاعف نسبة الفوز المحدد للبيانات كاملة (_percent_scale)
+        """
+        return cls(
+            encrypted_uid=str(item.get('encryptedUid') or ''),
+            nickname=str(item.get('nickName') or 'غير محدد'),
+            rank=_to_int(item.get('rank')),
+            roi=_to_float(item.get('roi')),
+            pnl=_to_float(item.get('pnl')),
+            follower_count=_to_int(item.get('followerCount')),
+            position_shared=bool(item.get('positionShared')),
+            update_time=_to_int(item.get('updateTime')),
+            win_rate=_to_float(item.get('winRate')) * win_rate_scale,
+            aum=_to_float(item.get('aum'))
+        )
+
+    def __repr__(self) -> str:
+        return f"TraderRecord({self.nickname!r}, rank={self.rank}, roi={self.roi}, pnl={self.pnl})"
+
+
+class LeaderboardTable:
+    """
+    جدول أفضل المتداولين بتخزين عمودي
+
+    كل حقل رقمي مخزن في array متصلة بدلاً من قاموس لكل متداول،
+    لذلك تكون المجاميع عمليات على الأعمدة مباشرة ويقل استهلاك الذاكرة.
+    """
+
+    __slots__ = (
+        'uids', 'nicknames', 'ranks', 'roi', 'pnl',
+        'followers', 'shared', 'update_time', 'win_rate', 'aum'
+    )
+
+    def __init__(self):
+        self.uids: List[str] = []
+        self.nicknames: List[str] = []
+        self.ranks = array('l')
+        self.roi = array('d')
+        self.pnl = array('d')
+        self.followers = array('q')
+        self.shared = array('b')
+        self.update_time = array('q')
+        self.win_rate = array('d')
+        self.aum = array('d')
+
+    @classmethod
+    def from_payload(cls, items: Iterable[Union[Dict, TraderRecord]]) -> 'LeaderboardTable':
+        """بناء الجدول من بيانات Apify أو من سجلات جاهزة"""
+        items = list(items)
+        win_rate_scale = _percent_scale(
+            item.get('winRate') for item in items if not isinstance(item, TraderRecord)
+        )
+
+        table = cls()
+        for item in items:
+            record = item if isinstance(item, TraderRecord) else TraderRecord.from_payload(item, win_rate_scale)
+            table.append(record)
+        return table
+
+    def append(self, record: TraderRecord):
+        """إضافة سجل إلى نهاية الجدول"""
+        self.uids.append(record.encrypted_uid)
+        self.nicknames.append(record.nickname)
+        self.ranks.append(record.rank)
+        self.roi.append(record.roi)
+        self.pnl.append(record.pnl)
+        self.followers.append(record.follower_count)
+        self.shared.append(1 if record.position_shared else 0)
+        self.update_time.append(record.update_time)
+        self.win_rate.append(record.win_rate)
+        self.aum.append(record.aum)
+
+    def record(self, index: int) -> TraderRecord:
+        """الحصول على سجل صف واحد"""
+        return TraderRecord(
+            encrypted_uid=self.uids[index],
+            nickname=self.nicknames[index],
+            rank=self.ranks[index],
+            roi=self.roi[index],
+            pnl=self.pnl[index],
+            follower_count=self.followers[index],
+            position_shared=bool(self.shared[index]),
+            update_time=self.update_time[index],
+            win_rate=self.win_rate[index],
+            aum=self.aum[index]
+        )
+
+    def take(self, indices: Iterable[int]) -> 'LeaderboardTable':
+        """إنشاء جدول جديد من صفوف محددة بالترتيب المعطى"""
+        indices = list(indices)
+        table = LeaderboardTable()
+        table.uids = [self.uids[i] for i in indices]
+        table.nicknames = [self.nicknames[i] for i in indices]
+        table.ranks = array('l', (self.ranks[i] for i in indices))
+        table.roi = array('d', (self.roi[i] for i in indices))
+        table.pnl = array('d', (self.pnl[i] for i in indices))
+        table.followers = array('q', (self.followers[i] for i in indices))
+        table.shared = array('b', (self.shared[i] for i in indices))
+        table.update_time = array('q', (self.update_time[i] for i in indices))
+        table.win_rate = array('d', (self.win_rate[i] for i in indices))
+        table.aum = array('d', (self.aum[i] for i in indices))
+        return table
+
+    def head(self, n: int) -> 'LeaderboardTable':
+        """أول n صفوف"""
+        table = LeaderboardTable()
+        table.uids = self.uids[:n]
+        table.nicknames = self.nicknames[:n]
+        table.ranks = self.ranks[:n]
+        table.roi = self.roi[:n]
+        table.pnl = self.pnl[:n]
+        table.followers = self.followers[:n]
+        table.shared = self.shared[:n]
+        table.update_time = self.update_time[:n]
+        table.win_rate = self.win_rate[:n]
+        table.aum = self.aum[:n]
+        return table
+
+    def query(
+        self,
+        sort_by: str = 'ROI',
+        min_win_rate: float = None,
+        min_aum: float = None,
+        offset: int = 0,
+        limit: int = 10
+    ) -> Tuple['LeaderboardTable', int]:
+        """
+        ترتيب وفلترة وتقسيم الجدول محلياً دون أي طلب خارجي
+
+        Args:
+            sort_by: ROI, PNL, FOLLOWERS, WIN_RATE, AUM
+            min_win_rate: الحد الأدنى لنسبة الفوز (%)
+            min_aum: الحد الأدنى للأصول المُدارة
+            offset: بداية الصفحة
+            limit: عدد الصفوف في الصفحة
+
+        Returns:
+            (جدول الصفحة، عدد الصفوف المطابقة للفلتر)
+        """
+        indices = range(len(self))
+        if min_win_rate is not None:
+            win_rate = self.win_rate
+            indices = [i for i in indices if win_rate[i] >= min_win_rate]
+        if min_aum is not None:
+            aum = self.aum
+            indices = [i for i in indices if aum[i] >= min_aum]
+
+        column = getattr(self, SORT_COLUMNS.get(sort_by, 'roi'))
+        ordered = sorted(indices, key=column.__getitem__, reverse=True)
+
+        return self.take(ordered[offset:offset + limit]), len(ordered)
+
+    def roi_mean(self, n: Optional[int] = None) -> float:
+        """متوسط العائد لأول n صفوف"""
+        column = self.roi if n is None else self.roi[:n]
+        return math.fsum(column) / len(column) if column else 0.0
+
+    def pnl_total(self, n: Optional[int] = None) -> float:
+        """إجمالي الأرباح لأول n صفوف"""
+        return math.fsum(self.pnl if n is None else self.pnl[:n])
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    def __iter__(self) -> Iterator[TraderRecord]:
+        for i in range(len(self.uids)):
+            yield self.record(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        return self.record(index)
@@ -4,18 +4,36 @@
 """
 import asyncio
 import logging
+import random
 import sys
 import os
-from datetime import datetime
+import tempfile
+import numpy as np
+import pytz
+from datetime import datetime, timezone
 
 # إضافة مجلد المشروع للمسار
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.database import db_manager
+from src.database import db_manager, DatabaseManager
 from src.api_clients import APIManager
+from src import signal_parser as signal_parser_module
 from src.signal_parser import signal_parser
-from src.top_traders_api import top_traders_api
+from src.signal_cache import SignalCache, signal_content_hash
+from src.top_traders_api import top_traders_api, TopTradersAPI, normalize_trader_uid
+from src.handlers import follow_trader_checked, parse_traders_page, current_page_counter
+from src.keyboards import get_top_traders_keyboard
+from src.trader_records import LeaderboardTable
+from src.trader_alerts import TraderAlertPipeline
+from src.trader_consensus import TraderConsensus
+from src.level_index import PriceLevelIndex
+from src.signal_tracker import SignalBook
+from src.backtester import Backtester, CandleStore, simulate_signal, summarize_results
+from src.backtest_runner import ParallelBacktestRunner
+from src.db_writers import SentMessageWriter, ActivityWriter
+from src.retention import RetentionManager
 from src.monitoring import bot_monitor
+from signal_samples import REAL_SIGNAL_SAMPLES
 from config.config import *
 
 # إعداد التسجيل
@@ -25,6 +43,85 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# الاستعلامات المتكررة التي يجب أن تستخدم فهرساً (الاسم -> (الاستعلام، المعاملات))
+HOT_QUERIES = {
+    "إشارات الشهر": (
+        "SELECT SUM(value) FROM daily_stats WHERE metric = 'signals' AND day >= date('now', '-30 days')", ()
+    ),
+    "آخر إشارة نشطة": ("SELECT * FROM signals WHERE is_active = 1 ORDER BY created_date DESC LIMIT 1", ()),
+    "آخر إشارة": (
+        "SELECT symbol, direction, created_date FROM signals "
+        "WHERE status IS NOT 'imported' ORDER BY created_date DESC LIMIT 1", ()
+    ),
+    "إشارات التتبع": (
+        "SELECT s.id, st.targets_hit FROM signals s "
+        "LEFT JOIN signal_stats st ON st.signal_id = s.id WHERE s.status = 'active'", ()
+    ),
+    "إشارات الاختبار الرجعي": (
+        "SELECT id FROM signals WHERE entry_price_min IS NOT NULL AND stop_loss IS NOT NULL "
+        "AND created_date IS NOT NULL AND created_date >= datetime('now', ?) ORDER BY created_date", ('-30 days',)
+    ),
+    "المستخدمون النشطون": ("SELECT COUNT(*) FROM users WHERE last_activity >= datetime('now', '-7 days')", ()),
+    "نشاط الساعات": (
+        "SELECT hour, value FROM hourly_stats WHERE metric = 'active_users' AND hour >= ?", ('2025-01-01 00:00',)
+    ),
+    "رسائل فترة زمنية": (
+        "SELECT COUNT(*) FROM sent_messages WHERE sent_date >= ? AND sent_date < ?",
+        ('2025-01-01', '2025-01-02')
+    ),
+    "رسائل ناجحة في فترة": (
+        "SELECT COUNT(*) FROM sent_messages WHERE sent_date >= ? AND sent_date < ? AND is_successful = 1",
+        ('2025-01-01', '2025-01-02')
+    ),
+}
+
+# العدادات المحفوظة مقابل العد الفعلي من الجداول
+COUNTER_QUERIES = {
+    "total_users": "SELECT COUNT(*) FROM users",
+    "allowed_users": "SELECT COUNT(*) FROM allowed_users",
+    "premium_users": "SELECT COUNT(*) FROM allowed_users WHERE is_premium = 1",
+    "total_signals": "SELECT COUNT(*) FROM signals",
+    "active_signals": "SELECT COUNT(*) FROM signals WHERE is_active = 1",
+    "signals_last_week": (
+        "SELECT COUNT(*) FROM signals WHERE created_date >= date('now', '-7 days') AND status IS NOT 'imported'"
+    ),
+    "signals_last_month": (
+        "SELECT COUNT(*) FROM signals WHERE created_date >= date('now', '-30 days') AND status IS NOT 'imported'"
+    ),
+}
+
+# نصوص إشارات وحقولها المتوقعة (الدخول، الوقف، الأهداف)
+PARSER_CASES = {
+    "شراء بدون عنوان دخول": (
+        "BTCUSDT buy 61500\ntargets 62000, 63000\nstop 60000",
+        ("BUY", 61500.0, 61500.0, 60000.0, [62000.0, 63000.0])
+    ),
+    "بيع بدون عنوان دخول": (
+        "BTCUSDT sell 61500\ntargets 61000, 60000\nstop 62500",
+        ("SELL", 61500.0, 61500.0, 62500.0, [60000.0, 61000.0])
+    ),
+    "short بنطاق دخول": (
+        "ETHUSDT short 3,450 - 3,480\ntargets 3,300\nstop 3,560",
+        ("SELL", 3450.0, 3480.0, 3560.0, [3300.0])
+    ),
+    "بيع من إلى": (
+        "#SOL/USDT\nبيع من 150 إلى 152\nالأهداف: 140 / 135\nوقف الخسارة: 158",
+        ("SELL", 150.0, 152.0, 158.0, [135.0, 140.0])
+    ),
+    "أهداف بفواصل دون مسافات": (
+        "BNBUSDT\nالاتجاه: شراء\nالدخول: 90\nالأهداف: 100,200,300\nوقف الخسارة: 80",
+        ("BUY", 90.0, 90.0, 80.0, [100.0, 200.0, 300.0])
+    ),
+    "فواصل آلاف في قائمة": (
+        "Symbol: BTCUSDT\nDirection: Long\nEntry: 61,500\nStop Loss: 60,900\nTargets: 62,200, 63,000",
+        ("BUY", 61500.0, 61500.0, 60900.0, [62200.0, 63000.0])
+    ),
+    "فاصلة يليها أكثر من ثلاثة أرقام": (
+        "Symbol: LINKUSDT\nDirection: Long\nEntry: 14\nStop Loss: 13\nTargets: 15,1600",
+        ("BUY", 14.0, 14.0, 13.0, [15.0, 1600.0])
+    ),
+}
+
 class BotTester:
     """فئة اختبار البوت"""
     
@@ -39,9 +136,27 @@ class BotTester:
         
         tests = [
             ("اختبار قاعدة البيانات", self.test_database),
+            ("اختبار خطط الاستعلامات", self.test_query_plans),
+            ("اختبار عدادات الإحصائيات", self.test_stats_counters),
             ("اختبار Binance API", self.test_binance_api),
             ("اختبار محلل الإشارات", self.test_signal_parser),
+            ("اختبار حالات المحلل", self.test_signal_parser_cases),
+            ("اختبار نماذج القنوات الفعلية", self.test_real_signal_samples),
+            ("اختبار ملفات الاستيراد", self.test_bulk_import_files),
+            ("اختبار ذاكرة الإشارات المؤقتة", self.test_signal_cache),
+            ("اختبار فهرس مستويات الأسعار", self.test_price_level_index),
+            ("اختبار تتبع الإشارات", self.test_signal_book),
+            ("اختبار محاكاة الاختبار الرجعي", self.test_backtest_simulation),
+            ("اختبار المهام الفاشلة في الاختبار الرجعي", self.test_backtest_failed_jobs),
             ("اختبار أفضل المتداولين", self.test_top_traders),
+            ("اختبار جدول المتداولين", self.test_leaderboard),
+            ("اختبار لوحة المتداولين", self.test_traders_keyboard),
+            ("اختبار تنبيهات المراكز", self.test_position_alerts),
+            ("اختبار الاستطلاع الجزئي للمراكز", self.test_partial_position_poll),
+            ("اختبار التحقق من المتابعة", self.test_follow_validation),
+            ("اختبار إجماع المتداولين", self.test_trader_consensus),
+            ("اختبار الكتابة المؤجلة", self.test_batch_writers),
+            ("اختبار وضع التفريغ التدريجي", self.test_vacuum_mode),
             ("اختبار نظام المراقبة", self.test_monitoring),
             ("اختبار APIs الخارجية", self.test_external_apis),
         ]
@@ -107,6 +222,45 @@ class BotTester:
             logger.error(f"خطأ في اختبار قاعدة البيانات: {e}")
             return False
     
+    async def test_query_plans(self) -> bool:
+        """التحقق من أن الاستعلامات المتكررة لا تمسح الجداول كاملة"""
+        try:
+            failed = []
+            for name, (query, params) in HOT_QUERIES.items():
+                plan = await db_manager.explain_query_plan(query, params)
+                # SCAN بدون فهرس أو فرز مؤقت يعني أن الزمن ينمو مع حجم الجدول
+                if any(
+                    (step.startswith("SCAN") and "INDEX" not in step) or "TEMP B-TREE" in step
+                    for step in plan
+                ):
+                    failed.append(name)
+                    logger.error(f"الاستعلام '{name}' لا يستخدم فهرساً: {plan}")
+            
+            return not failed
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار خطط الاستعلامات: {e}")
+            return False
+    
+    async def test_stats_counters(self) -> bool:
+        """التحقق من تطابق العدادات المحدثة بالمحفزات مع العد الفعلي"""
+        try:
+            stats = await db_manager.get_detailed_stats()
+            mismatched = []
+            for name, query in COUNTER_QUERIES.items():
+                async with db_manager._read() as db:
+                    cursor = await db.execute(query)
+                    actual = (await cursor.fetchone())[0]
+                if stats.get(name) != actual:
+                    mismatched.append(name)
+                    logger.error(f"العداد '{name}' = {stats.get(name)} والعد الفعلي {actual}")
+            
+            return not mismatched
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار عدادات الإحصائيات: {e}")
+            return False
+    
     async def test_binance_api(self) -> bool:
         """اختبار Binance API"""
         try:
@@ -164,6 +318,328 @@ class BotTester:
             logger.error(f"خطأ في اختبار محلل الإشارات: {e}")
             return False
     
+    async def test_signal_parser_cases(self) -> bool:
+        """اختبار حقول المحلل على صيغ متماثلة الاتجاه وقوائم الأرقام"""
+        try:
+            failed = []
+            for name, (text, expected) in PARSER_CASES.items():
+                result = signal_parser.parse_signal_text(text)
+                actual = (
+                    result["direction"], result["entry_price_min"], result["entry_price_max"],
+                    result["stop_loss"], result["targets"]
+                )
+                if actual != expected:
+                    failed.append(name)
+                    logger.error(f"الحالة '{name}': المتوقع {expected} والناتج {actual}")
+            
+            return not failed
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار حالات المحلل: {e}")
+            return False
+    
+    async def test_real_signal_samples(self) -> bool:
+        """اختبار انحدار على رسائل بصيغ القنوات الفعلية ونتائجها المكتوبة يدوياً"""
+        try:
+            failed = []
+            for name, (text, expected) in REAL_SIGNAL_SAMPLES.items():
+                result = signal_parser.parse_signal_text(text)
+                actual = {field: result[field] for field in expected}
+                if not result["parsed_successfully"] or actual != expected:
+                    failed.append(name)
+                    logger.error(f"النموذج '{name}': المتوقع {expected} والناتج {actual}")
+            
+            return not failed
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار نماذج القنوات الفعلية: {e}")
+            return False
+    
+    async def test_bulk_import_files(self) -> bool:
+        """اختبار قراءة نصوص الإشارات وتواريخها من ملفات الاستيراد"""
+        try:
+            rows = signal_parser.split_batch_csv(
+                "date,signal_text\n2024-03-01 09:30,BTCUSDT buy 61500\n,ETHUSDT sell 3450\n"
+            )
+            assert rows == [("BTCUSDT buy 61500", "2024-03-01 09:30"), ("ETHUSDT sell 3450", None)], rows
+            
+            # بدون ترويسة معروفة يُقرأ العمود الأول كنص
+            assert signal_parser.split_batch_csv("BTCUSDT buy 61500,x\n") == [("BTCUSDT buy 61500", None)]
+            
+            texts = signal_parser.split_batch_text("BTCUSDT buy 1\n---\n\nETHUSDT sell 2\n===\n")
+            assert texts == ["BTCUSDT buy 1", "ETHUSDT sell 2"], texts
+            
+            # التاريخ بالمنطقة الزمنية للبوت لا منطقة الخادم
+            local = pytz.timezone(TIMEZONE).localize(datetime(2024, 3, 1, 9, 30))
+            utc = local.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            assert signal_parser.extract_signal_date("⏰ وقت الإشارة: 2024-03-01 09:30:00") == utc
+            assert signal_parser.extract_signal_date("نُشرت في 01/03/2024 09:30") == utc
+            if TIMEZONE == "Asia/Riyadh":
+                assert utc == "2024-03-01 06:30:00", utc
+            assert signal_parser.extract_signal_date("2024-02-30") is None
+            assert signal_parser.extract_signal_date("BTCUSDT buy 61500") is None
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار ملفات الاستيراد: {e}")
+            return False
+    
+    async def test_signal_cache(self) -> bool:
+        """اختبار بصمة المحتوى وإعادة المعاينة من الذاكرة المؤقتة بوقت إشارة جديد"""
+        
+        class FakePriceClient:
+            def __init__(self):
+                self.calls = 0
+            
+            async def get_current_price(self, symbol):
+                self.calls += 1
+                return 60500.0
+        
+        class FixedClock(datetime):
+            current = datetime(2024, 3, 1, 9, 30)
+            
+            @classmethod
+            def now(cls, tz=None):
+                return cls.current
+        
+        original_datetime = signal_parser_module.datetime
+        try:
+            text = "BTCUSDT BUY entry 60000 SL 58000 TP 62000 64000"
+            reformatted = "#btcusdt   buy\nentry: 60,000\nsl: 58,000\ntp: 64000, 62000"
+            other = "BTCUSDT BUY entry 60000 SL 57000 TP 62000 64000"
+            
+            # التنسيق وترتيب الأهداف لا يغيران البصمة، وتغيير أي سعر يغيرها
+            content_hash = signal_content_hash(signal_parser.parse_signal_text(text))
+            assert content_hash == signal_content_hash(signal_parser.parse_signal_text(reformatted))
+            assert content_hash != signal_content_hash(signal_parser.parse_signal_text(other))
+            
+            cache = SignalCache(ttl=60, max_entries=2)
+            client = FakePriceClient()
+            signal_parser_module.datetime = FixedClock
+            
+            first = await cache.prepare(text, client)
+            assert not first['cached'] and first['parsed']['content_hash'] == content_hash
+            assert "2024-03-01 09:30:00" in first['formatted']
+            
+            # النص نفسه (بمسافات مختلفة) يُعاد من الذاكرة دون طلب سعر، بوقت المعاينة الجديدة
+            FixedClock.current = datetime(2024, 3, 1, 10, 45)
+            second = await cache.prepare("  btcusdt buy ENTRY 60000 sl 58000 tp 62000 64000 ", client)
+            assert second['cached'] and client.calls == 1
+            assert "2024-03-01 10:45:00" in second['formatted'], second['formatted']
+            assert "09:30:00" not in second['formatted']
+            
+            # نسخة المعاينة لا تعدل المدخل المخزن
+            second['parsed']['signal_text'] = "x"
+            assert 'signal_text' not in (await cache.prepare(text, client))['parsed']
+            
+            # الحد الأقصى للمدخلات يطرد الأقدم استخداماً
+            await cache.prepare(other, client)
+            await cache.prepare(reformatted, client)
+            assert cache.get(text) is None and client.calls == 3
+            
+            # بث الإشارة نفسها مرتين في الوقت ذاته ممنوع حتى يُحرر الحجز
+            assert cache.claim_broadcast(content_hash)
+            assert not cache.claim_broadcast(content_hash)
+            cache.release_broadcast(content_hash)
+            assert cache.claim_broadcast(content_hash)
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار ذاكرة الإشارات المؤقتة: {e}")
+            return False
+        finally:
+            signal_parser_module.datetime = original_datetime
+    
+    async def test_price_level_index(self) -> bool:
+        """اختبار المستويات المتجاوزة وترتيبها وحذف مستويات إشارة"""
+        try:
+            index = PriceLevelIndex([
+                (100.0, (1, 'entry')), (95.0, (1, 'stop')), (105.0, (1, 'target')),
+                (110.0, (1, 'target')), (102.0, (2, 'entry')), (108.0, (2, 'stop')),
+            ])
+            
+            # الصعود يشمل (p0, p1] بترتيب تصاعدي
+            assert [price for price, _ in index.crossed(100.0, 108.0)] == [102.0, 105.0, 108.0]
+            # الهبوط يشمل [p1, p0) بترتيب تنازلي
+            assert [price for price, _ in index.crossed(108.0, 95.0)] == [105.0, 102.0, 100.0, 95.0]
+            assert index.crossed(100.0, 100.0) == []
+            
+            index.add(103.0, (3, 'entry'))
+            assert [key for _, key in index.crossed(101.0, 104.0)] == [(2, 'entry'), (3, 'entry')]
+            
+            index.discard(2, 2)
+            assert [key[0] for _, key in index.crossed(90.0, 120.0)] == [1, 1, 3, 1, 1]
+            assert len(index) == 5
+            
+            # حذف أكثر من نصف المستويات يضغط القوائم
+            index.discard(1, 4)
+            assert len(index) == 1 and index._prices == [103.0], index._prices
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار فهرس مستويات الأسعار: {e}")
+            return False
+    
+    async def test_signal_book(self) -> bool:
+        """اختبار دخول الإشارات وأهدافها ووقفها، وتطابق الفهرس مع التقييم الكامل"""
+        try:
+            signals = [
+                {'id': 1, 'direction': 'BUY', 'entry_price_min': 99.0, 'entry_price_max': 100.0,
+                 'stop_loss': 95.0, 'targets': [105.0, 110.0]},
+                {'id': 2, 'direction': 'SELL', 'entry_price_min': 102.0, 'entry_price_max': None,
+                 'stop_loss': 106.0, 'targets': [98.0]},
+            ]
+            book = SignalBook(signals)
+            
+            rows, completed = book.evaluate(101.0)
+            assert rows == [] and completed == [], rows
+            
+            # الشراء يدخل عند وصول السعر إلى أعلى نطاق الدخول
+            rows, completed = book.evaluate(100.0)
+            assert [row[0] for row in rows] == [1] and book.entered.tolist() == [True, False]
+            
+            # صعود واحد يحقق هدف الشراء الأول ويُدخل البيع (102) ثم يضرب وقفه (106)
+            rows, completed = book.evaluate(106.0)
+            assert completed == [2] and book.targets_hit.tolist() == [1, 0], rows
+            assert {row[0]: row[5] for row in rows} == {1: 'pending', 2: 'loss'}, rows
+            
+            # إشارة مكتملة لا تعود في النتائج
+            rows, completed = book.evaluate(101.0)
+            assert 2 not in [row[0] for row in rows], rows
+            
+            rows, completed = book.evaluate(111.0)
+            assert completed == [1] and [row[5] for row in rows] == ['profit'], rows
+            assert len(book) == 0
+            
+            # الفهرس يعطي نفس النتائج التي يعطيها التقييم الكامل لكل سعر
+            rng = random.Random(3)
+            generated = []
+            for signal_id in range(200):
+                entry = rng.uniform(95, 105)
+                side = rng.choice((1, -1))
+                generated.append({
+                    'id': signal_id, 'direction': 'BUY' if side > 0 else 'SELL',
+                    'entry_price_min': entry, 'entry_price_max': entry + rng.uniform(0, 1),
+                    'stop_loss': entry - side * rng.uniform(2, 6),
+                    'targets': sorted((entry + side * rng.uniform(1, 8) for _ in range(3)), reverse=side < 0)
+                })
+            indexed, full_scan = SignalBook(generated), SignalBook(generated, use_index=False)
+            price = 100.0
+            for _ in range(400):
+                price *= 1 + rng.gauss(0, 0.004)
+                assert indexed.evaluate(price) == full_scan.evaluate(price), f"اختلاف عند السعر {price}"
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار تتبع الإشارات: {e}")
+            return False
+    
+    async def test_backtest_simulation(self) -> bool:
+        """اختبار قواعد التنفيذ والأهداف ووقف الخسارة في محاكاة إشارة"""
+        try:
+            hour = 3_600_000
+            
+            def candles(rows):
+                # (افتتاح، أعلى، أدنى، إغلاق) لشموع ساعية متتالية
+                return np.array([[i * hour, *row, 1.0] for i, row in enumerate(rows)], dtype=float)
+            
+            buy = {
+                'id': 1, 'symbol': 'BTCUSDT', 'direction': 'BUY', 'created_ts': 0,
+                'entry_price_min': 99.0, 'entry_price_max': 100.0, 'stop_loss': 95.0,
+                'targets': [110.0, 105.0]
+            }
+            trend = candles([(102, 103, 101, 102), (101, 101, 99.5, 100.5), (101, 106, 100, 105), (105, 111, 104, 110)])
+            
+            # limit: التنفيذ عند أعلى نطاق الدخول، ثم الهدفان بوزنين متساويين
+            result = simulate_signal(buy, trend)
+            assert (result['status'], result['entry_price'], result['targets_hit']) == ('target', 100.0, 2), result
+            assert abs(result['r_multiple'] - 1.5) < 1e-9 and result['hours_to_first_target'] == 1.0, result
+            
+            assert simulate_signal(buy, trend, fill_rule='mid')['entry_price'] == 99.5
+            assert simulate_signal(buy, trend, fill_rule='market')['entry_price'] == 102.0
+            
+            # وزن كامل على الهدف الأول يغلق المركز عنده
+            result = simulate_signal(buy, trend, tp_weights=[1, 0])
+            assert (result['status'], result['exit_price'], result['r_multiple']) == ('target', 105.0, 1.0), result
+            
+            # الهدف ووقف الخسارة في نفس الشمعة: الوقف أولاً
+            result = simulate_signal(buy, candles([(102, 103, 101, 102), (101, 101, 99.5, 100.5), (101, 106, 94, 96)]))
+            assert (result['status'], result['targets_hit'], result['r_multiple']) == ('stopped', 0, -1.0), result
+            
+            # فجوة تحت حد الدخول: التنفيذ بسعر الافتتاح الأفضل
+            gap = candles([(102, 103, 101, 102), (98, 99, 97, 98.5), (99, 104.5, 98, 104)])
+            result = simulate_signal(dict(buy, targets=[104.0]), gap)
+            assert (result['entry_price'], result['r_multiple']) == (98.0, 2.0), result
+            
+            sell = {
+                'id': 2, 'symbol': 'BTCUSDT', 'direction': 'SELL', 'created_ts': 0,
+                'entry_price_min': 100.0, 'entry_price_max': 101.0, 'stop_loss': 104.0, 'targets': [96.0]
+            }
+            result = simulate_signal(sell, candles([(98, 99, 97, 98), (102, 102.5, 101.5, 102), (101, 101.5, 97, 98)]))
+            assert (result['status'], result['entry_price'], result['r_multiple']) == ('open', 102.0, 2.0), result
+            
+            no_fill = simulate_signal(buy, candles([(102, 103, 101, 102)]))
+            no_data = simulate_signal(dict(buy, created_ts=10 * hour), trend)
+            assert (no_fill['status'], no_data['status']) == ('no_fill', 'no_data')
+            
+            summary = summarize_results([
+                simulate_signal(buy, trend), simulate_signal(buy, trend, tp_weights=[1, 0]),
+                simulate_signal(buy, candles([(102, 103, 101, 102), (101, 101, 99.5, 100.5), (101, 106, 94, 96)])),
+                no_fill, no_data
+            ])
+            assert (summary['total'], summary['closed'], summary['no_fill'], summary['no_data']) == (5, 3, 1, 1), summary
+            assert abs(summary['win_rate'] - 200 / 3) < 1e-9 and abs(summary['expectancy'] - 0.5) < 1e-9, summary
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار محاكاة الاختبار الرجعي: {e}")
+            return False
+    
+    async def test_backtest_failed_jobs(self) -> bool:
+        """اختبار احتساب إشارات المهام الفاشلة وإظهارها في التقرير"""
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                store = CandleStore(directory)
+                hour = 3_600_000
+                store.save("BTCUSDT", "1h", np.array(
+                    [[i * hour, 100.0, 106.0, 99.0, 105.0, 1.0] for i in range(5)]
+                ))
+                # ملف شموع تالف يجعل مهمة ETHUSDT تفشل
+                store.path("ETHUSDT", "1h").write_bytes(b"not a numpy file")
+                
+                def signal(signal_id, symbol):
+                    return {
+                        'id': signal_id, 'symbol': symbol, 'direction': 'BUY', 'created_ts': 0,
+                        'entry_price_min': 100.0, 'entry_price_max': 100.0, 'stop_loss': 95.0,
+                        'targets': [105.0]
+                    }
+                
+                runner = ParallelBacktestRunner(Backtester(store=store, interval="1h"), workers=1, chunk_size=2)
+                try:
+                    reports = await runner.run_jobs(
+                        {"BTCUSDT": [signal(1, "BTCUSDT")], "ETHUSDT": [signal(i, "ETHUSDT") for i in range(2, 5)]},
+                        variants={"limit": ("limit", None)}
+                    )
+                finally:
+                    runner.close()
+            
+            summary = reports["limit"]["summary"]
+            assert (summary['total'], summary['failed_jobs'], summary['failed_signals']) == (1, 2, 3), summary
+            
+            report = runner.format_report(reports)
+            assert "الإشارات: 4" in report and "فشل اختبارها: 3" in report and "فشلت 2 مهمة" in report, report
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار المهام الفاشلة في الاختبار الرجعي: {e}")
+            return False
+    
     async def test_top_traders(self) -> bool:
         """اختبار نظام أفضل المتداولين"""
         try:
@@ -190,6 +666,394 @@ class BotTester:
             logger.error(f"خطأ في اختبار أفضل المتداولين: {e}")
             return True  # نعتبره نجاحاً لأن API قد لا يكون متاحاً
     
+    async def test_leaderboard(self) -> bool:
+        """اختبار الترتيب والفلترة محلياً والاحتفاظ بالجدول عند فشل التحديث"""
+        try:
+            table = LeaderboardTable.from_payload([
+                {"encryptedUid": "A", "roi": "12.5", "pnl": 900, "winRate": 0.7, "aum": 50000},
+                {"encryptedUid": "B", "roi": 30, "pnl": 100, "winRate": 55, "aum": 200000},
+                {"encryptedUid": "C", "roi": -4, "pnl": 5000, "winRate": 80, "aum": 150000},
+                {"encryptedUid": "D", "roi": None, "pnl": "1,200", "winRate": 65, "aum": None},
+            ])
+            
+            page, total = table.query(sort_by="ROI", limit=2)
+            assert (page.uids, total) == (["B", "A"], 4), f"ترتيب ROI: {page.uids}"
+            
+            page, total = table.query(sort_by="ROI", offset=2, limit=2)
+            assert page.uids == ["D", "C"], f"الصفحة الثانية: {page.uids}"
+            
+            # نسبة 0.7 بين نسب مئوية تبقى 0.7% ولا تُضخم إلى 70%
+            assert table.win_rate[0] == 0.7
+            page, total = table.query(sort_by="PNL", min_win_rate=60.0)
+            assert (page.uids, total) == (["C", "D"], 2), f"فلتر نسبة الفوز: {page.uids}"
+            
+            # عمود كسور بالكامل يُحول إلى نسب مئوية
+            fractions = LeaderboardTable.from_payload([
+                {"encryptedUid": "E", "winRate": 0.65}, {"encryptedUid": "F", "winRate": "0.005"},
+                {"encryptedUid": "G", "winRate": None},
+            ])
+            assert list(fractions.win_rate) == [65.0, 0.5, 0.0], list(fractions.win_rate)
+            
+            page, total = table.query(sort_by="AUM", min_aum=100000.0)
+            assert (page.uids, total) == (["B", "C"], 2), f"فلتر الأصول: {page.uids}"
+            
+            # فشل التحديث لا يستبدل الجدول المخزن ببيانات تجريبية
+            api = TopTradersAPI()
+            results = [table, None]
+            
+            async def fake_get_top_traders(**kwargs):
+                return results.pop(0)
+            
+            api.get_top_traders = fake_get_top_traders
+            assert await api.get_leaderboard() is table
+            assert await api.get_leaderboard(force_refresh=True) is table, "تم استبدال الجدول المخزن"
+            
+            # بدون جدول مخزن يُعاد None ولا يُخزن شيء
+            api = TopTradersAPI()
+            api.get_top_traders = fake_get_top_traders
+            results[:] = [None]
+            assert await api.get_leaderboard() is None
+            assert not api._leaderboard_cache
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار جدول المتداولين: {e}")
+            return False
+    
+    async def test_traders_keyboard(self) -> bool:
+        """اختبار أن أزرار لوحة المتداولين تحفظ الفلتر والصفحة ولكل زر معالج"""
+        
+        class FakeCallback:
+            answered = False
+            
+            async def answer(self, *args, **kwargs):
+                self.answered = True
+        
+        try:
+            keyboard = get_top_traders_keyboard("win_rate", 3, 5)
+            data = [button.callback_data for row in keyboard.inline_keyboard for button in row]
+            assert "refresh_traders_win_rate_3" in data, data
+            assert {"traders_page_win_rate_2", "traders_page_win_rate_4", "current_page"} <= set(data), data
+            assert all(len(item.encode()) <= 64 for item in data)
+            
+            assert parse_traders_page("win_rate_3") == ("win_rate", 3)
+            assert parse_traders_page("high_aum_0") == ("high_aum", 1)
+            assert parse_traders_page("unknown_2") == ("weekly_roi", 1)
+            assert parse_traders_page("") == ("weekly_roi", 1)
+            
+            # زر رقم الصفحة يُجاب فوراً حتى لا يبقى مؤشر الانتظار
+            callback = FakeCallback()
+            await current_page_counter(callback)
+            assert callback.answered
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار لوحة المتداولين: {e}")
+            return False
+    
+    async def test_position_alerts(self) -> bool:
+        """اختبار استخراج أحداث تغير مراكز المتداول"""
+        try:
+            build = TraderAlertPipeline._build_state
+            old = build([
+                {"symbol": "btcusdt", "amount": "0.5", "entryPrice": "60000"},
+                {"symbol": "ETHUSDT", "amount": -2, "entryPrice": 3000},
+                {"symbol": "SOLUSDT", "amount": 10, "entryPrice": 150},
+                {"symbol": "XRPUSDT", "amount": 0, "entryPrice": 0.5},
+                {"symbol": "BADUSDT", "amount": "n/a"},
+            ])
+            assert set(old) == {("BTCUSDT", "LONG"), ("ETHUSDT", "SHORT"), ("SOLUSDT", "LONG")}, old
+            
+            new = build([
+                {"symbol": "BTCUSDT", "amount": 0.8, "entryPrice": 61000},
+                {"symbol": "ETHUSDT", "amount": -1, "entryPrice": 3000},
+                {"symbol": "SOLUSDT", "amount": 10, "entryPrice": 155},
+                {"symbol": "DOGEUSDT", "amount": -500, "entryPrice": 0.1},
+            ])
+            events = {
+                (event['type'], event['symbol'], event['side'])
+                for event in TraderAlertPipeline.diff_positions(old, new)
+            }
+            assert events == {
+                ("increased", "BTCUSDT", "LONG"),
+                ("decreased", "ETHUSDT", "SHORT"),
+                ("opened", "DOGEUSDT", "SHORT"),
+            }, events
+            
+            # انعكاس الاتجاه إغلاق للقديم وفتح للجديد
+            flipped = TraderAlertPipeline.diff_positions(
+                build([{"symbol": "BTCUSDT", "amount": 1}]),
+                build([{"symbol": "BTCUSDT", "amount": -1}])
+            )
+            assert [(e['type'], e['side']) for e in flipped] == [("opened", "SHORT"), ("closed", "LONG")], flipped
+            assert TraderAlertPipeline.diff_positions(new, new) == []
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار تنبيهات المراكز: {e}")
+            return False
+    
+    async def test_partial_position_poll(self) -> bool:
+        """اختبار أن غياب متداول عن نتيجة جزئية لا يولد تنبيهات إغلاق"""
+        
+        class FakeBot:
+            def __init__(self):
+                self.sent = []
+            
+            async def send_message(self, user_id, text, parse_mode=None):
+                self.sent.append((user_id, text))
+        
+        responses = []
+        UID_A, UID_B = "A" * 32, "B" * 32
+        
+        async def fake_positions(uids):
+            return responses.pop(0)
+        
+        async def fake_followers():
+            return {UID_A: [1], UID_B: [2]}
+        
+        positions_a = {"encryptedUid": UID_A, "nickName": "Alpha", "positions": [
+            {"symbol": "BTCUSDT", "amount": 1, "entryPrice": 60000}
+        ]}
+        positions_b = {"encryptedUid": UID_B, "nickName": "Beta", "positions": [
+            {"symbol": "ETHUSDT", "amount": -2, "entryPrice": 3000}
+        ]}
+        
+        try:
+            top_traders_api.get_trader_positions = fake_positions
+            db_manager.get_trader_followers = fake_followers
+            pipeline = TraderAlertPipeline(poll_interval=60, batch_size=10)
+            bot = FakeBot()
+            
+            # الاستطلاع الأول يحدد الحالة الأساسية دون تنبيهات
+            responses.append([positions_a, positions_b])
+            assert await pipeline.poll_once(bot) == 0
+            
+            # المتداول B غائب عن النتيجة: لا إغلاق لمراكزه وتبقى حالته السابقة
+            responses.append([positions_a])
+            assert await pipeline.poll_once(bot) == 0 and bot.sent == [], bot.sent
+            assert ("ETHUSDT", "SHORT") in pipeline._last_state[UID_B]
+            
+            # عودته بالمراكز نفسها لا تولد تنبيه فتح
+            responses.append([positions_a, positions_b])
+            assert await pipeline.poll_once(bot) == 0 and bot.sent == [], bot.sent
+            
+            # ظهوره بلا مراكز إغلاق حقيقي يُرسل لمتابعه فقط
+            responses.append([positions_a, {"encryptedUid": UID_B, "nickName": "Beta", "positions": []}])
+            assert await pipeline.poll_once(bot) == 1
+            assert [user_id for user_id, _ in bot.sent] == [2] and "ETHUSDT" in bot.sent[0][1], bot.sent
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار الاستطلاع الجزئي للمراكز: {e}")
+            return False
+        finally:
+            del top_traders_api.get_trader_positions
+            del db_manager.get_trader_followers
+    
+    async def test_follow_validation(self) -> bool:
+        """اختبار رفض معرفات المتداولين غير الصالحة وحد المتابعة لكل مستخدم"""
+        test_user_id = 999999998
+        try:
+            assert normalize_trader_uid(" d64ddd2177fa081e3f361f70c703a562 ") == "D64DDD2177FA081E3F361F70C703A562"
+            for value in ("SAMPLE001", "ABC123", "G" * 32, "A" * 33, ""):
+                assert normalize_trader_uid(value) is None, value
+            
+            # أطول بيانات نقر ضمن حد تيليجرام (64 بايت)
+            assert len(f"unfollow_trader_{'F' * 32}".encode()) <= 64
+            
+            assert await follow_trader_checked(test_user_id, "SAMPLE001")
+            uids = [f"{i:032X}" for i in range(MAX_FOLLOWED_TRADERS + 1)]
+            for uid in uids[:-1]:
+                assert await follow_trader_checked(test_user_id, uid.lower()) is None
+            
+            # المتداول الجديد فوق الحد مرفوض، وإعادة متابعة متداول حالي مقبولة
+            assert await follow_trader_checked(test_user_id, uids[-1])
+            assert await follow_trader_checked(test_user_id, uids[0]) is None
+            followed = await db_manager.get_user_followed_traders(test_user_id)
+            assert sorted(t['encrypted_uid'] for t in followed) == uids[:-1], followed
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار التحقق من المتابعة: {e}")
+            return False
+        finally:
+            for trader in await db_manager.get_user_followed_traders(test_user_id):
+                await db_manager.unfollow_trader(test_user_id, trader['encrypted_uid'])
+    
+    async def test_trader_consensus(self) -> bool:
+        """اختبار بناء الإجماع من جدول المتداولين المخزن دون جلب قائمة منفصلة"""
+        requested = []
+        
+        async def fake_leaderboard(**kwargs):
+            return LeaderboardTable.from_payload([
+                {"encryptedUid": "A", "roi": 10}, {"encryptedUid": "B", "roi": 50}, {"encryptedUid": "C", "roi": 30},
+            ])
+        
+        async def fake_top_traders(**kwargs):
+            raise AssertionError("تم طلب قائمة المتداولين من الـ Actor مباشرة")
+        
+        async def fake_positions(uids):
+            requested.append(list(uids))
+            return [
+                {"encryptedUid": "B", "positions": [{"symbol": "BTCUSDT", "amount": 1, "entryPrice": 60000}]},
+                {"encryptedUid": "C", "positions": [{"symbol": "BTCUSDT", "amount": -1, "entryPrice": 62000}]},
+            ]
+        
+        try:
+            top_traders_api.get_leaderboard = fake_leaderboard
+            top_traders_api.get_top_traders = fake_top_traders
+            top_traders_api.get_trader_positions = fake_positions
+            
+            consensus = TraderConsensus(top_n=2)
+            assert await consensus.refresh()
+            
+            # أفضل متداولَين حسب العائد من الجدول المخزن
+            assert requested == [["B", "C"]], requested
+            row = consensus.get_consensus()[0]
+            assert (row['symbol'], row['long_traders'], row['short_traders']) == ("BTCUSDT", 1, 1), row
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار إجماع المتداولين: {e}")
+            return False
+        finally:
+            del top_traders_api.get_leaderboard
+            del top_traders_api.get_top_traders
+            del top_traders_api.get_trader_positions
+    
+    async def test_batch_writers(self) -> bool:
+        """اختبار عزل الصفوف المرفوضة وإبقاء الدفعات عند تعذر الكتابة"""
+        
+        class FakeDatabase:
+            """قاعدة بيانات وهمية ترفض أي دفعة تحتوي صفاً معيباً، أو تكون مقفلة"""
+            
+            def __init__(self, is_bad):
+                self.is_bad = is_bad
+                self.locked = False
+                self.rows = []
+                self.calls = 0
+            
+            async def write(self, rows):
+                self.calls += 1
+                if self.locked:
+                    return None
+                if any(self.is_bad(row) for row in rows):
+                    return False
+                self.rows.extend(rows)
+                return True
+            
+            log_sent_messages_batch = write
+            update_users_activity_batch = write
+        
+        try:
+            db = FakeDatabase(lambda row: row[0] == 3)
+            writer = SentMessageWriter(db=db, batch_size=4, flush_interval=60, max_pending=100)
+            for user_id in range(1, 11):
+                writer.log(user_id, "signal", f"رسالة {user_id}")
+            
+            # الصف المعيب يُتجاهل والدفعات التالية تُكتب في الدورة نفسها
+            assert await writer.flush() == 9
+            assert len(writer) == 0
+            assert [row[0] for row in db.rows] == [1, 2, 4, 5, 6, 7, 8, 9, 10], db.rows
+            
+            # التقسيم نصفين: الدفعة الأولى (4) ثم نصفاها ثم صفا النصف المعيب، ودفعتان سليمتان
+            assert db.calls == 1 + 2 + 2 + 2, db.calls
+            
+            # قاعدة مقفلة: محاولة واحدة بلا تقسيم، والسجلات تبقى معلقة بترتيبها حتى max_pending
+            db = FakeDatabase(lambda row: False)
+            db.locked = True
+            writer = SentMessageWriter(db=db, batch_size=4, flush_interval=60, max_pending=6)
+            for user_id in range(1, 6):
+                writer.log(user_id, "signal", f"رسالة {user_id}")
+            assert await writer.flush() == 0 and db.calls == 1
+            assert len(writer) == 5
+            
+            writer.log(6, "signal", "رسالة 6")
+            writer.log(7, "signal", "رسالة 7")
+            db.locked = False
+            assert await writer.flush() == 6
+            assert [row[0] for row in db.rows] == [2, 3, 4, 5, 6, 7], db.rows
+            
+            activity_db = FakeDatabase(lambda row: row[1] == 2)
+            activity = ActivityWriter(db=activity_db, flush_interval=60)
+            for user_id in (1, 2, 3, 1):
+                activity.touch(user_id)
+            
+            assert await activity.flush() == 2
+            assert len(activity) == 0
+            assert sorted(user_id for _, user_id in activity_db.rows) == [1, 3], activity_db.rows
+            
+            assert await activity.flush() == 0
+            
+            # قاعدة مقفلة: النشاط يعود معلقاً، والنشاط الأحدث أثناء الكتابة يبقى له الأولوية
+            activity_db = FakeDatabase(lambda row: False)
+            activity = ActivityWriter(db=activity_db, flush_interval=60)
+            activity._pending = {1: "2024-01-01 10:00:00", 2: "2024-01-01 10:00:00"}
+            
+            async def locked_write(rows):
+                activity._pending[1] = "2024-01-01 10:05:00"
+                return None
+            
+            activity_db.update_users_activity_batch = locked_write
+            assert await activity.flush() == 0
+            assert activity._pending == {1: "2024-01-01 10:05:00", 2: "2024-01-01 10:00:00"}, activity._pending
+            
+            del activity_db.update_users_activity_batch
+            assert await activity.flush() == 2
+            assert sorted(activity_db.rows) == [("2024-01-01 10:00:00", 2), ("2024-01-01 10:05:00", 1)]
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار الكتابة المؤجلة: {e}")
+            return False
+    
+    async def test_vacuum_mode(self) -> bool:
+        """اختبار تخطي التفريغ في القواعد القديمة حتى تُحوّل بـ /vacuum"""
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                # قاعدة أُنشئت قبل ضبط auto_vacuum = INCREMENTAL
+                db = DatabaseManager(
+                    os.path.join(directory, "old.db"), reader_pool_size=1,
+                    pragmas={**DB_PRAGMAS, "auto_vacuum": "NONE"}
+                )
+                await db.init_database()
+                try:
+                    assert not db.incremental_vacuum_enabled
+                    
+                    calls = []
+                    
+                    async def counting_vacuum(pages):
+                        calls.append(pages)
+                        return 0, 0
+                    
+                    manager = RetentionManager(db, retention_days=30, archive_dir=os.path.join(directory, "archive"))
+                    db.incremental_vacuum = counting_vacuum
+                    try:
+                        assert await manager.vacuum() == 0
+                        assert not calls, calls
+                    finally:
+                        del db.incremental_vacuum
+                    
+                    assert await db.enable_incremental_vacuum()
+                    assert db.incremental_vacuum_enabled
+                    assert await db.incremental_vacuum(10) == (0, 0)
+                finally:
+                    await db.close()
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"خطأ في اختبار وضع التفريغ التدريجي: {e}")
+            return False
+    
     async def test_monitoring(self) -> bool:
         """اختبار نظام المراقبة"""
         try:
@@ -292,6 +1156,7 @@ async def main():
     
     # تشغيل جميع الاختبارات
     await tester.run_all_tests()
+    await db_manager.close()
     
     # إنشاء تقرير اختبار
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")